@@ -0,0 +1,59 @@
+"""
+Encodes and decodes the beatgrids of a few thousand tracks with BeatGridEncoder, which packs one marker at a time
+and checks the markers as it goes, and with an unchecked per marker encoder for reference. Decoding unpacks a whole
+grid with a single struct cached per marker count.
+
+    python benchmarks/bench_beatgrid.py [n_tracks] [markers_per_track]
+"""
+import struct
+import sys
+import time
+from pathlib import Path
+
+from pyserato.encoders.beatgrid_encoder import BeatGridEncoder
+from pyserato.model.tempo import Tempo
+from pyserato.model.track import Track
+
+
+def per_marker_encode(markers: list[Tempo]) -> bytes:
+    """Packs each marker with its own struct call without checking the markers, kept here for reference."""
+    data = struct.pack(">BBI", 1, 0, len(markers))
+    for marker, next_marker in zip(markers, markers[1:]):
+        data += struct.pack(">fI", marker.position, round((next_marker.position - marker.position) * marker.bpm / 60))
+    data += struct.pack(">ff", markers[-1].position, markers[-1].bpm)
+    return data + b"\x00"
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    n_tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_markers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    tracks = [
+        Track(Path(f"/music/{i}.mp3"), beatgrid=[Tempo(position=m * 8.0, bpm=120.0) for m in range(n_markers)])
+        for i in range(n_tracks)
+    ]
+    encoder = BeatGridEncoder()
+
+    grids = [encoder.encode(track) for track in tracks]
+    assert grids == [per_marker_encode(track.beatgrid) for track in tracks]
+
+    legacy_elapsed = best_of(5, lambda: [per_marker_encode(track.beatgrid) for track in tracks])
+    elapsed = best_of(5, lambda: [encoder.encode(track) for track in tracks])
+    decode_elapsed = best_of(5, lambda: [encoder.decode(grid) for grid in grids])
+
+    print(f"{n_tracks} grids of {n_markers} markers")
+    print(f"unchecked encode:  {legacy_elapsed:.3f}s  {n_tracks / legacy_elapsed:8.0f} grids/s")
+    print(f"encode:            {elapsed:.3f}s  {n_tracks / elapsed:8.0f} grids/s  ({legacy_elapsed / elapsed:.2f}x)")
+    print(f"decode:            {decode_elapsed:.3f}s  {n_tracks / decode_elapsed:8.0f} grids/s")
+
+
+if __name__ == "__main__":
+    main()
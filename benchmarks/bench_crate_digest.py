@@ -0,0 +1,75 @@
+"""
+Compares two identical crate trees, and finds the one changed crate in them, by walking every crate and comparing its
+tracks, and with the cached digests of Crate, which only descend in to the subtrees whose digests differ.
+
+    python benchmarks/bench_crate_digest.py [depth] [width] [tracks_per_crate]
+"""
+import sys
+import time
+from pathlib import Path
+
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+
+
+def build(depth: int, width: int, n_tracks: int, prefix: str = "root") -> Crate:
+    children = {}
+    if depth > 0:
+        for i in range(width):
+            child = build(depth - 1, width, n_tracks, f"{prefix}-{i}")
+            children[child.name] = child
+    crate = Crate(prefix, children=children)
+    for i in range(n_tracks):
+        crate.add_track(Track(Path(f"/music/{prefix}/{i}.mp3")))
+    return crate
+
+
+def walk_equal(a: Crate, b: Crate) -> bool:
+    """Compares every crate, kept here for comparison."""
+    if a.name != b.name or a.children.keys() != b.children.keys():
+        return False
+    if {t.path for t in a.tracks} != {t.path for t in b.tracks}:
+        return False
+    return all(walk_equal(a.children[name], b.children[name]) for name in a.children)
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    n_tracks = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    a = build(depth, width, n_tracks)
+    b = build(depth, width, n_tracks)
+    n_crates = sum(width**level for level in range(depth + 1))
+
+    start = time.perf_counter()
+    a.digest, b.digest
+    first = time.perf_counter() - start
+    walk = best_of(5, lambda: walk_equal(a, b))
+    cached = best_of(5, lambda: a == b)
+    assert walk_equal(a, b) and a == b
+
+    leaf = b
+    while leaf.children:
+        leaf = next(iter(leaf.children.values()))
+    leaf.add_track(Track(Path("/music/new.mp3")))
+    diff = best_of(5, lambda: list(a.diff(b)))
+    assert list(a.diff(b)) == ["%%".join(["root"] + [f"root{'-0' * i}" for i in range(1, depth + 1)])]
+
+    print(f"{n_crates} crates of {n_tracks} tracks")
+    print(f"first digest of both trees: {first:.4f}s")
+    print(f"full walk equality:         {walk:.6f}s")
+    print(f"cached digest equality:     {cached:.6f}s  ({walk / cached:.0f}x)")
+    print(f"diff after one change:      {diff:.6f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Times Builder._parse_crate_tracks on synthetic crates of increasing size. The time per track should stay flat as the
+crate grows, showing the reader scales linearly.
+
+    python benchmarks/bench_crate_reader.py
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from pyserato.builder import Builder
+from pyserato.crate_writer import encode_record
+from pyserato.util import serato_encode
+
+SIZES = [1_000, 10_000, 50_000, 100_000]
+
+
+def make_crate(n_tracks: int) -> bytes:
+    records = [encode_record("vrsn", serato_encode("1.0/Serato ScratchLive Crate"))]
+    for i in range(n_tracks):
+        path = serato_encode(f"Music/Artist {i % 500}/Album {i % 50}/{i:06d} Track.mp3")
+        records.append(encode_record("otrk", encode_record("ptrk", path)))
+    return b"".join(records)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_tracks in SIZES:
+            filepath = Path(tmp) / f"{n_tracks}.crate"
+            filepath.write_bytes(make_crate(n_tracks))
+            start = time.perf_counter()
+            count = sum(1 for _ in Builder._parse_crate_tracks(filepath))
+            elapsed = time.perf_counter() - start
+            assert count == n_tracks
+            print(f"{n_tracks:>7} tracks: {elapsed:8.4f}s  {elapsed / n_tracks * 1e6:6.2f}us/track")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Streams a synthetic 'database V2' file with iter_database_tracks and reports the throughput and the peak memory
+traced while reading, which stays flat as the number of tracks grows.
+
+    python benchmarks/bench_database_reader.py
+"""
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pyserato.database_reader import iter_database_tracks
+from pyserato.crate_writer import encode_record
+from pyserato.util import serato_encode
+
+SIZES = [10_000, 100_000]
+
+
+def _text(tag: str, text: str) -> bytes:
+    return encode_record(tag, serato_encode(text))
+
+
+def write_database(path: Path, n_tracks: int):
+    with path.open("wb") as f:
+        f.write(_text("vrsn", "2.0/Serato Scratch LIVE Database"))
+        for i in range(n_tracks):
+            f.write(
+                encode_record(
+                    "otrk",
+                    _text("ttyp", "mp3")
+                    + _text("pfil", f"Music/Artist {i % 500}/{i:06d} Track.mp3")
+                    + _text("tsng", f"Track {i}")
+                    + _text("tbpm", f"{100 + i % 40}.00")
+                    + _text("tkey", "Am")
+                    + _text("tlen", "04:21.50")
+                    + _text("tadd", "1700000000"),
+                )
+            )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_tracks in SIZES:
+            database = Path(tmp) / f"database V2 {n_tracks}"
+            write_database(database, n_tracks)
+            for fields in (None, {"average_bpm"}):
+                start = time.perf_counter()
+                count = sum(1 for _ in iter_database_tracks(database, fields=fields))
+                elapsed = time.perf_counter() - start
+                # traced separately as tracing slows the read down
+                tracemalloc.start()
+                for _ in iter_database_tracks(database, fields=fields):
+                    pass
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                assert count == n_tracks
+                label = ",".join(sorted(fields)) if fields else "all"
+                print(
+                    f"{n_tracks:>7} tracks fields={label:<12} {elapsed:7.3f}s "
+                    f"{n_tracks / elapsed:9.0f} tracks/s  peak {peak / 1024:7.1f} KiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares parsing a synthetic library eagerly with parse_crates_from_root_path against building the tree lazily with
+parse_crates_lazily, listing the crates, and reading the tracks of one subtree. Also measures the peak memory of
+parsing eagerly against streaming every (crate path, track path) pair with iter_crate_tracks.
+
+    python benchmarks/bench_lazy_parse.py [depth] [width] [tracks_per_crate]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic_library import LibrarySpec, generate_library
+
+from pyserato.builder import Builder
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def count_crates(crates) -> int:
+    return sum(1 + count_crates(crate.children) for crate in crates.values())
+
+
+def main():
+    spec = LibrarySpec(*(int(arg) for arg in sys.argv[1:4]), unique_tracks=2000, cues=0)
+    builder = Builder()
+    with tempfile.TemporaryDirectory() as tmp:
+        library = generate_library(Path(tmp), spec)
+        subcrates = library.subcrates
+
+        eager, eager_elapsed = timed(lambda: builder.parse_crates_from_root_path(subcrates))
+        lazy, lazy_elapsed = timed(lambda: builder.parse_crates_lazily(subcrates))
+        assert count_crates(lazy) == count_crates(eager) == spec.crate_count
+        subtree = next(iter(lazy[library.root.name].children.values()))
+
+        def read_subtree(crate):
+            return len(crate.tracks) + sum(read_subtree(child) for child in crate.children.values())
+
+        _, subtree_elapsed = timed(lambda: read_subtree(subtree))
+        assert lazy == eager
+
+        eager_peak = peak_memory(lambda: builder.parse_crates_from_root_path(subcrates))
+        stream_peak = peak_memory(lambda: sum(1 for _ in builder.iter_crate_tracks(subcrates)))
+
+    print(f"{spec.crate_count} crates of {spec.tracks_per_crate} tracks")
+    print(f"eager parse:             {eager_elapsed:.3f}s")
+    print(f"lazy tree:               {lazy_elapsed:.3f}s  ({eager_elapsed / lazy_elapsed:.1f}x)")
+    print(f"lazy tree + one subtree: {lazy_elapsed + subtree_elapsed:.3f}s")
+    print(f"peak memory eager:       {eager_peak / 1e6:.1f}MB")
+    print(f"peak memory streamed:    {stream_peak / 1e6:.3f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Decodes a few thousand Serato Markers2 tags shaped like real ones (track color, 8 cues, 4 loops and a BPM lock) with
+the previous BytesIO based decoder and with V2Mp3Encoder._decode. Both use the current HotCue.from_bytes, so the
+comparison isolates how the entries are found.
+
+    python benchmarks/bench_markers2.py [n_tags]
+"""
+import base64
+import struct
+import sys
+import time
+from io import BytesIO
+
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.serato_color import SeratoColor
+from pyserato.model.track import Track
+
+
+def make_tags(n_tags: int) -> list[bytes]:
+    encoder = V2Mp3Encoder()
+    colors = list(SeratoColor)
+    tags = []
+    for i in range(n_tags):
+        track = Track.from_path(f"/music/{i}.mp3", trust_path=True)
+        track.color = "FFFFFF"
+        track.bpm_locked = bool(i % 2)
+        for index in range(8):
+            track.add_hot_cue(
+                HotCue(
+                    name=f"cue {index}",
+                    type=HotCueType.CUE,
+                    start=i + index * 15000,
+                    index=index,
+                    color=colors[(i + index) % len(colors)],
+                )
+            )
+        for index in range(4):
+            track.add_hot_cue(
+                HotCue(name=f"loop {index}", type=HotCueType.LOOP, start=index * 30000, end=index * 30000 + 8000,
+                       index=index)
+            )
+        tags.append(encoder._encode(track))
+    return tags
+
+
+def legacy_decode(data: bytes) -> list[HotCue]:
+    """The decoder as it was before it worked on memoryviews, kept here for comparison."""
+    fp = BytesIO(data)
+    assert struct.unpack("BB", fp.read(2)) == (0x01, 0x01)
+    payload = fp.read()
+    payload = b"".join(payload[: payload.index(b"\x00")].split(b"\n"))
+    payload += b"A==" if len(payload) % 4 == 1 else (b"=" * (-len(payload) % 4))
+    fp = BytesIO(base64.b64decode(payload))
+    assert struct.unpack("BB", fp.read(2)) == (0x01, 0x01)
+    cues = []
+    while True:
+        entry_name = b""
+        for x in iter(lambda: fp.read(1), b""):
+            if x == b"\x00":
+                break
+            entry_name += x
+        if not entry_name:
+            break
+        struct_length = struct.unpack(">I", fp.read(4))[0]
+        entry_data = fp.read(struct_length)
+        if entry_name == b"CUE":
+            cues.append(HotCue.from_bytes(entry_data, hotcue_type=HotCueType.CUE))
+        elif entry_name == b"LOOP":
+            cues.append(HotCue.from_bytes(entry_data, hotcue_type=HotCueType.LOOP))
+    return cues
+
+
+def main():
+    n_tags = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tags = make_tags(n_tags)
+    encoder = V2Mp3Encoder()
+
+    start = time.perf_counter()
+    legacy = [legacy_decode(tag) for tag in tags]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = [list(encoder._decode(tag)) for tag in tags]
+    elapsed = time.perf_counter() - start
+    assert decoded == legacy
+
+    start = time.perf_counter()
+    for tag in tags:
+        encoder.decode_into(Track.from_path("/music/x.mp3", trust_path=True), tag)
+    full_elapsed = time.perf_counter() - start
+
+    print(f"{n_tags} tags")
+    print(f"legacy decode:   {legacy_elapsed:.3f}s  {n_tags / legacy_elapsed:8.0f} tags/s")
+    print(f"_decode:         {elapsed:.3f}s  {n_tags / elapsed:8.0f} tags/s  ({legacy_elapsed / elapsed:.2f}x)")
+    print(f"decode_into:     {full_elapsed:.3f}s  {n_tags / full_elapsed:8.0f} tags/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Encodes and decodes Serato Markers_ data with the previous one group per call codec and with the whole buffer codec,
+with and without numpy, then times V1Mp3Encoder round trips of full tags.
+
+    python benchmarks/bench_markers_v1.py [n_tracks]
+"""
+import os
+import struct
+import sys
+import time
+
+from pyserato.encoders import utils
+from pyserato.encoders.v1_mp3_encoder import V1Mp3Encoder
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.track import Track
+
+
+def legacy_encode_group(data: bytes) -> bytes:
+    """The codec as it was before it worked on whole buffers, kept here for comparison."""
+    a, b, c = struct.unpack("BBB", data)
+    z = c & 0x7F
+    y = ((c >> 7) | (b << 1)) & 0x7F
+    x = ((b >> 6) | (a << 2)) & 0x7F
+    w = a >> 5
+    return bytes(bytearray([w, x, y, z]))
+
+
+def legacy_decode_group(data: bytes) -> bytes:
+    w, x, y, z = struct.unpack("BBBB", data)
+    c = (z & 0x7F) | ((y & 0x01) << 7)
+    b = ((y & 0x7F) >> 1) | ((x & 0x03) << 6)
+    a = ((x & 0x7F) >> 2) | ((w & 0x07) << 5)
+    return struct.pack("BBB", a, b, c)
+
+
+def legacy_encode(data: bytes) -> bytes:
+    return b"".join(legacy_encode_group(data[i: i + 3]) for i in range(0, len(data), 3))
+
+
+def legacy_decode(data: bytes) -> bytes:
+    return b"".join(legacy_decode_group(data[i: i + 4]) for i in range(0, len(data), 4))
+
+
+def timed(label: str, fn, data: bytes, groups: int, baseline: float = 0.0) -> float:
+    start = time.perf_counter()
+    fn(data)
+    elapsed = time.perf_counter() - start
+    speedup = f"  ({baseline / elapsed:.1f}x)" if baseline else ""
+    print(f"{label:<26}{elapsed:.3f}s  {groups / elapsed / 1e6:6.2f}M groups/s{speedup}")
+    return elapsed
+
+
+def main():
+    n_tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # every Markers_ tag holds 14 entries of 3 groups plus the track color
+    groups = n_tracks * 43
+    plain = os.urandom(groups * 3)
+    encoded = utils.encode_buffer(plain)
+    assert legacy_encode(plain) == encoded and legacy_decode(encoded) == plain
+
+    print(f"{groups} groups")
+    baseline = timed("legacy encode", legacy_encode, plain, groups)
+    timed("encode_buffer", utils.encode_buffer, plain, groups, baseline)
+    baseline = timed("legacy decode", legacy_decode, encoded, groups)
+    timed("decode_buffer", utils.decode_buffer, encoded, groups, baseline)
+    if utils.np is not None:
+        numpy, utils.np = utils.np, None
+        timed("encode_buffer (python)", utils.encode_buffer, plain, groups)
+        timed("decode_buffer (python)", utils.decode_buffer, encoded, groups)
+        utils.np = numpy
+
+    encoder = V1Mp3Encoder()
+    tracks = []
+    for i in range(n_tracks):
+        track = Track.from_path(f"/music/{i}.mp3", trust_path=True)
+        for index in range(5):
+            track.add_hot_cue(HotCue(name="", type=HotCueType.CUE, start=i + index * 15000, index=index))
+        for index in range(4):
+            track.add_hot_cue(
+                HotCue(name="", type=HotCueType.LOOP, start=index * 30000, end=index * 30000 + 8000, index=index)
+            )
+        tracks.append(track)
+
+    start = time.perf_counter()
+    tags = [encoder._encode(track) for track in tracks]
+    encode_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for tag in tags:
+        encoder.decode_into(Track.from_path("/music/x.mp3", trust_path=True), tag)
+    decode_elapsed = time.perf_counter() - start
+    print(f"{n_tracks} tags")
+    print(f"{'V1Mp3Encoder._encode':<26}{encode_elapsed:.3f}s  {n_tracks / encode_elapsed:8.0f} tags/s")
+    print(f"{'V1Mp3Encoder.decode_into':<26}{decode_elapsed:.3f}s  {n_tracks / decode_elapsed:8.0f} tags/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares the memory used to hold a synthetic library in memory: a dataclass Track with a per-instance __dict__, as
+Track was before it was slotted, the slotted Track, and crates referencing rows of a TrackTable by id.
+
+    python benchmarks/bench_memory.py [n_tracks] [n_crates] [tracks_per_crate]
+"""
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+from pyserato.model.track_table import TrackTable
+
+
+@dataclass
+class DataclassTrack:
+    """The Track model as it was before it was slotted, kept here for comparison. Crates only use its path."""
+
+    path: Path
+    track_id: str = ""
+    average_bpm: float = 0.0
+    date_added: str = ""
+    play_count: str = ""
+    tonality: str = ""
+    total_time: float = 0.0
+    beatgrid: list = field(default_factory=list)
+    hot_cues: list = field(default_factory=list)
+    cue_loops: list = field(default_factory=list)
+
+    def __eq__(self, other):
+        return self.path == other.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+def load_dataclass(paths: list[str], memberships: list[list[int]]) -> object:
+    tracks = [DataclassTrack(Path(p)) for p in paths]
+    crates = []
+    for members in memberships:
+        crate = Crate("crate")
+        for i in members:
+            crate.add_track(tracks[i])
+        crates.append(crate)
+    return tracks, crates
+
+
+def load_slotted(paths: list[str], memberships: list[list[int]]) -> object:
+    tracks = [Track(Path(p)) for p in paths]
+    crates = []
+    for members in memberships:
+        crate = Crate("crate")
+        for i in members:
+            crate.add_track(tracks[i])
+        crates.append(crate)
+    return tracks, crates
+
+
+def load_table(paths: list[str], memberships: list[list[int]]) -> object:
+    table = TrackTable()
+    ids = [table.add(p) for p in paths]
+    crates = []
+    for members in memberships:
+        crate = Crate("crate")
+        for i in members:
+            crate.add_track_id(ids[i], table)
+        crates.append(crate)
+    return table, crates
+
+
+def measure(load: Callable[[list[str], list[list[int]]], object], paths, memberships) -> int:
+    tracemalloc.start()
+    library = load(paths, memberships)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del library
+    return current
+
+
+def main():
+    n_tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_crates = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    tracks_per_crate = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    paths = [f"/music/Artist {i % 2000}/Album {i % 300}/{i:06d} Track.mp3" for i in range(n_tracks)]
+    memberships = [
+        [(c * 7919 + j * 104729) % n_tracks for j in range(tracks_per_crate)] for c in range(n_crates)
+    ]
+    memberships = [list(dict.fromkeys(m)) for m in memberships]
+    print(f"{n_tracks} tracks, {n_crates} crates of {tracks_per_crate} tracks")
+    baseline = measure(load_dataclass, paths, memberships)
+    for name, load in (("dataclass", load_dataclass), ("slotted", load_slotted), ("table", load_table)):
+        used = measure(load, paths, memberships)
+        print(f"{name:<10} {used / 1024 ** 2:8.1f} MiB  ({used / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Generates Serato overviews from WAV files. It compares a per-slice Python loop with compute_overview's single numpy
+reduction, then writes a batch of overviews serially and with write_overviews on a process pool.
+
+    python benchmarks/bench_overview.py [n_files] [seconds]
+"""
+import shutil
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from pyserato.encoders.overview_encoder import (
+    OVERVIEW_BLOCK_SIZE,
+    OVERVIEW_BLOCKS,
+    _write_overview,
+    compute_overview,
+    read_wav,
+    write_overviews,
+)
+
+RATE = 44100
+# a silent MPEG-1 layer III frame at 128kbps and 44.1kHz
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def loop_overview(samples) -> bytes:
+    """Reduces one slice at a time, kept here for comparison."""
+    amplitude = np.abs(samples)
+    slices = OVERVIEW_BLOCKS * OVERVIEW_BLOCK_SIZE
+    bounds = [i * len(amplitude) // slices for i in range(slices + 1)]
+    peaks = [float(amplitude[start:end].max()) for start, end in zip(bounds, bounds[1:])]
+    loudest = max(peaks)
+    return bytes(round(peak * 255 / loudest) for peak in peaks)
+
+
+def make_wav(path: Path, seconds: int) -> None:
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1, 1, (seconds * RATE, 2)) * np.linspace(0.1, 1, seconds * RATE)[:, None]
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    with tempfile.TemporaryDirectory() as folder:
+        wav_path = Path(folder) / "track.wav"
+        make_wav(wav_path, seconds)
+        samples, _ = read_wav(wav_path)
+
+        start = time.perf_counter()
+        expected = loop_overview(samples)
+        loop_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        overview = compute_overview(samples)
+        elapsed = time.perf_counter() - start
+        assert max(abs(a - b) for a, b in zip(overview, expected)) <= 1
+        print(f"{seconds}s of stereo audio")
+        print(f"per slice loop:    {loop_elapsed * 1000:8.1f}ms")
+        print(f"compute_overview:  {elapsed * 1000:8.1f}ms  ({loop_elapsed / elapsed:.1f}x)")
+
+        jobs = []
+        for i in range(n_files):
+            track_path = Path(folder) / f"{i}.mp3"
+            track_path.write_bytes(MP3_FRAME * 100)
+            track_wav = Path(folder) / f"{i}.wav"
+            shutil.copy(wav_path, track_wav)
+            jobs.append((track_path, track_wav))
+
+        start = time.perf_counter()
+        for job in jobs:
+            _write_overview(job)
+        serial_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        assert all(error is None for _, error in write_overviews(jobs))
+        pool_elapsed = time.perf_counter() - start
+        print(f"{n_files} files")
+        print(f"serial:            {serial_elapsed:.3f}s  {n_files / serial_elapsed:6.1f} files/s")
+        print(f"process pool:      {pool_elapsed:.3f}s  {n_files / pool_elapsed:6.1f} files/s  "
+              f"({serial_elapsed / pool_elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Times Builder.parse_crates_from_root_path on a generated SubCrates folder serially, on thread pools and on a process
+pool, and checks every mode builds the same crate tree.
+
+    python benchmarks/bench_parallel_parse.py [n_crates] [tracks_per_crate]
+"""
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pyserato.builder import Builder
+from pyserato.crate_writer import serialize_crate
+
+
+def make_subcrates(subcrates: Path, n_crates: int, tracks_per_crate: int):
+    subcrates.mkdir()
+    for i in range(n_crates):
+        name = f"root%%group{i % 20}%%crate{i}.crate"
+        paths = [
+            f"/music/Artist {j % 300}/Album {j % 40}/{(i + j) % 20000:05d} Track.mp3" for j in range(tracks_per_crate)
+        ]
+        (subcrates / name).write_bytes(serialize_crate(paths))
+
+
+def main():
+    n_crates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tracks_per_crate = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    builder = Builder()
+    with tempfile.TemporaryDirectory() as tmp:
+        subcrates = Path(tmp) / "SubCrates"
+        make_subcrates(subcrates, n_crates, tracks_per_crate)
+
+        start = time.perf_counter()
+        expected = builder.parse_crates_from_root_path(subcrates)
+        serial = time.perf_counter() - start
+        print(f"serial:           {serial:.3f}s")
+
+        for max_workers in (4, 16):
+            start = time.perf_counter()
+            crates = builder.parse_crates_from_root_path(subcrates, max_workers=max_workers)
+            elapsed = time.perf_counter() - start
+            assert crates == expected
+            print(f"threads={max_workers:<3}:     {elapsed:.3f}s  ({serial / elapsed:.2f}x)")
+
+        with ProcessPoolExecutor() as executor:
+            start = time.perf_counter()
+            crates = builder.parse_crates_from_root_path(subcrates, executor=executor)
+            elapsed = time.perf_counter() - start
+        assert crates == expected
+        print(f"processes:        {elapsed:.3f}s  ({serial / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
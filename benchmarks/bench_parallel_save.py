@@ -0,0 +1,64 @@
+"""
+Compares a serial Builder.save with a concurrent one on a synthetic tree of 5,001 crates (a root, 50 children and 99
+grandchildren under each child) and checks both produce identical files.
+
+    python benchmarks/bench_parallel_save.py [max_workers ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pyserato.builder import Builder
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+
+WIDTH = 50
+SUB_WIDTH = 99
+TRACKS_PER_CRATE = 10
+
+
+def make_tree() -> Crate:
+    def make(name: str) -> Crate:
+        crate = Crate(name)
+        for i in range(TRACKS_PER_CRATE):
+            crate.add_track(Track.from_path(f"/music/{name}/{i:02d} Track.mp3"))
+        return crate
+
+    root = make("root")
+    for i in range(WIDTH):
+        child = make(f"child{i}")
+        for j in range(SUB_WIDTH):
+            grandchild = make(f"child{i}_{j}")
+            child.children[grandchild.name] = grandchild
+        root.children[child.name] = child
+    return root
+
+
+def timed_save(root: Crate, save_path: Path, max_workers=None) -> float:
+    save_path.mkdir()
+    start = time.perf_counter()
+    report = Builder().save(root, save_path, max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+    assert report.ok and len(report.written) == 1 + WIDTH + WIDTH * SUB_WIDTH
+    return elapsed
+
+
+def main():
+    workers = [int(w) for w in sys.argv[1:]] or [4, 16]
+    root = make_tree()
+    with tempfile.TemporaryDirectory() as tmp:
+        serial_path = Path(tmp) / "serial"
+        serial = timed_save(root, serial_path)
+        print(f"serial:              {serial:.3f}s")
+        expected = {f.name: f.read_bytes() for f in (serial_path / "SubCrates").iterdir()}
+        for max_workers in workers:
+            parallel_path = Path(tmp) / f"parallel_{max_workers}"
+            parallel = timed_save(root, parallel_path, max_workers=max_workers)
+            actual = {f.name: f.read_bytes() for f in (parallel_path / "SubCrates").iterdir()}
+            assert actual == expected
+            print(f"max_workers={max_workers:<3}:     {parallel:.3f}s  ({serial / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
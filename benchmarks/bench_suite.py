@@ -0,0 +1,167 @@
+"""
+Times the hot paths of pyserato on a synthetic library, see synthetic_library.py, and writes the timings as JSON so
+runs on different commits can be compared:
+
+    python benchmarks/bench_suite.py --output before.json
+    git checkout my-branch
+    python benchmarks/bench_suite.py --output after.json --compare before.json
+
+With --compare, a benchmark whose best time is more than --threshold times the previous one is reported as a
+regression and the exit status is 1.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from synthetic_library import LibrarySpec, SyntheticLibrary, generate_library
+
+from pyserato.builder import Builder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.util import serato_decode, serato_encode
+
+
+def measure(fn: Callable[[], object], repeat: int, ops: int) -> dict:
+    """Runs fn repeat times. ops is the number of items fn processes, to report a rate."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "best": best,
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "repeat": repeat,
+        "ops": ops,
+        "ops_per_s": ops / best if best else None,
+    }
+
+
+def run(library: SyntheticLibrary, repeat: int, workdir: Path) -> dict[str, dict]:
+    builder = Builder()
+    encoder = V2Mp3Encoder()
+    results = {}
+    crate_count = library.spec.crate_count
+
+    expected = builder.parse_crates_from_root_path(library.subcrates)
+    assert expected == {library.root.name: library.root}
+    results["parse_crates_from_root_path"] = measure(
+        lambda: builder.parse_crates_from_root_path(library.subcrates), repeat, crate_count
+    )
+
+    save_folder = workdir / "save"
+    (save_folder / "SubCrates").mkdir(parents=True)
+    results["builder_save"] = measure(
+        lambda: builder.save(library.root, save_folder, overwrite=True), repeat, crate_count
+    )
+
+    paths = [str(track.path) for track in library.tracks]
+    encoded_paths = [serato_encode(path) for path in paths]
+    assert [serato_decode(data) for data in encoded_paths] == paths
+    results["serato_encode"] = measure(lambda: [serato_encode(path) for path in paths], repeat, len(paths))
+    results["serato_decode"] = measure(lambda: [serato_decode(data) for data in encoded_paths], repeat, len(paths))
+
+    tags = [encoder._encode(track) for track in library.tracks]
+    cue_count = sum(len(track.get_hot_cues()) + len(track.get_cue_loops()) for track in library.tracks)
+    assert sum(len(list(encoder._decode(tag))) for tag in tags) == cue_count
+    results["v2_encode"] = measure(lambda: [encoder._encode(track) for track in library.tracks], repeat, len(tags))
+    results["v2_decode"] = measure(lambda: [list(encoder._decode(tag)) for tag in tags], repeat, len(tags))
+
+    types = {"CUE": HotCueType.CUE, "LOOP": HotCueType.LOOP}
+    entries = [
+        (bytes(data), types[name]) for tag in tags for name, data in encoder._decode_entries(tag) if name in types
+    ]
+    results["hot_cue_from_bytes"] = measure(
+        lambda: [HotCue.from_bytes(data, hotcue_type) for data, hotcue_type in entries], repeat, len(entries)
+    )
+    return results
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict[str, dict], previous: dict[str, dict], threshold: float) -> list[str]:
+    """Prints each benchmark against the previous run and returns the names of those that regressed."""
+    regressions = []
+    for name, result in results.items():
+        before = previous.get(name)
+        if before is None:
+            print(f"{name:<28} new")
+            continue
+        ratio = result["best"] / before["best"]
+        regressed = ratio > threshold
+        if regressed:
+            regressions.append(name)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<28} {before['best']:.4f}s -> {result['best']:.4f}s  {ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = LibrarySpec()
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--width", type=int, default=defaults.width)
+    parser.add_argument("--tracks-per-crate", type=int, default=defaults.tracks_per_crate)
+    parser.add_argument("--unique-tracks", type=int, default=defaults.unique_tracks)
+    parser.add_argument("--ascii", action="store_true", help="use ASCII names and paths only")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write the results as JSON to this file rather than stdout")
+    parser.add_argument("--compare", type=Path, help="the JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    spec = LibrarySpec(
+        depth=args.depth,
+        width=args.width,
+        tracks_per_crate=args.tracks_per_crate,
+        unique_tracks=args.unique_tracks,
+        unicode=not args.ascii,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        library = generate_library(Path(tmp) / "library", spec)
+        results = run(library, args.repeat, Path(tmp))
+
+    report = {
+        "commit": _commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": asdict(spec),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        if previous.get("spec") != report["spec"]:
+            print("warning: the previous run used a different library spec", file=sys.stderr)
+        if compare(results, previous["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Writes Serato Markers2 and Markers_ and clears the other Serato tags of a set of large MP3 files. It compares one
+save per tag, as separate encoder writes and clear_all_tags do, with a single CompositeEncoder save per file.
+
+    python benchmarks/bench_tag_writes.py [n_files] [file_mb]
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pyserato.encoders.composite_encoder import CompositeEncoder
+from pyserato.encoders.serato_tags import SERATO_ANALYSIS, SERATO_OVERVIEW, clear_all_tags
+from pyserato.encoders.v1_mp3_encoder import V1Mp3Encoder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.track import Track
+
+# a silent MPEG-1 layer III frame at 128kbps and 44.1kHz
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def make_files(folder: Path, n_files: int, file_mb: int) -> list[Track]:
+    template = folder / "template.mp3"
+    template.write_bytes(MP3_FRAME * (file_mb * 1024 * 1024 // len(MP3_FRAME)))
+    tracks = []
+    for i in range(n_files):
+        path = folder / f"{i}.mp3"
+        shutil.copy(template, path)
+        track = Track.from_path(path)
+        for index in range(5):
+            track.add_hot_cue(HotCue(name=f"cue {index}", type=HotCueType.CUE, start=index * 15000, index=index))
+        track.add_hot_cue(HotCue(name="loop", type=HotCueType.LOOP, start=1000, end=9000, index=0))
+        tracks.append(track)
+    return tracks
+
+
+def separate(tracks: list[Track]) -> None:
+    v2, v1 = V2Mp3Encoder(), V1Mp3Encoder()
+    for track in tracks:
+        clear_all_tags(track.path)
+        v2.write(track)
+        v1.write(track)
+
+
+def combined(tracks: list[Track]) -> None:
+    encoder = CompositeEncoder([V2Mp3Encoder(), V1Mp3Encoder()], clear=[SERATO_OVERVIEW, SERATO_ANALYSIS])
+    for track in tracks:
+        encoder.write(track)
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    file_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{n_files} files of {file_mb}MB")
+    results = {}
+    for name, write in (("separate saves", separate), ("single save", combined)):
+        with tempfile.TemporaryDirectory() as folder:
+            tracks = make_files(Path(folder), n_files, file_mb)
+            start = time.perf_counter()
+            write(tracks)
+            results[name] = time.perf_counter() - start
+            print(f"{name:<16}{results[name]:.3f}s  {n_files / results[name]:8.1f} files/s")
+    print(f"speedup: {results['separate saves'] / results['single save']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Generates synthetic Serato libraries for the benchmarks: a tree of crates of configurable depth and width, the
+_Serato_/SubCrates folder holding its crate files, and a music folder of tiny MP3 stubs each tagged with Serato
+Markers2 cues and loops. Names and paths can be unicode heavy, mixing accents, CJK, Cyrillic and emoji outside the
+Basic Multilingual Plane, to exercise the UTF-16 encoding of crate files.
+
+    python benchmarks/synthetic_library.py <folder> [depth] [width] [tracks_per_crate]
+"""
+import random
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pyserato.builder import Builder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.crate import Crate
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.serato_color import SeratoColor
+from pyserato.model.track import Track
+
+# a silent MPEG-1 layer III frame at 128kbps and 44.1kHz, enough for mutagen to open the file
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+ASCII_WORDS = ["House", "Techno", "Disco", "Garage", "Dub", "Jungle", "Ambient", "Funk"]
+UNICODE_WORDS = ["Café", "Björk", "東京", "Москва", "Ñandú", "Ελληνικά", "संगीत", "🎧", "naïve", "Zoë 🌙"]
+
+
+@dataclass
+class LibrarySpec:
+    """
+    The shape of a synthetic library.
+    depth: levels of crates below the root, 0 for a root crate alone.
+    width: children of every crate above the deepest level.
+    tracks_per_crate: tracks in every crate, the root included. Crates share tracks as real libraries do.
+    unique_tracks: the size of the pool the crates draw their tracks from, so the number of MP3 stubs.
+    cues: hot cues on each track, at most 8, each track also has cues // 2 loops.
+    """
+
+    depth: int = 3
+    width: int = 5
+    tracks_per_crate: int = 50
+    unique_tracks: int = 500
+    unicode: bool = True
+    cues: int = 8
+    seed: int = 0
+
+    @property
+    def crate_count(self) -> int:
+        return sum(self.width**level for level in range(self.depth + 1))
+
+
+@dataclass
+class SyntheticLibrary:
+    """
+    A generated library.
+    root: the crate tree, whose files are in subcrates.
+    tracks: the MP3 stubs, with the cues and loops written to their Markers2 tags.
+    """
+
+    spec: LibrarySpec
+    serato_folder: Path
+    music_folder: Path
+    root: Crate
+    tracks: list[Track]
+
+    @property
+    def subcrates(self) -> Path:
+        return self.serato_folder / "SubCrates"
+
+
+def _words(spec: LibrarySpec) -> list[str]:
+    return ASCII_WORDS + UNICODE_WORDS if spec.unicode else ASCII_WORDS
+
+
+def _track_paths(spec: LibrarySpec, music_folder: Path, rng: random.Random) -> Iterator[Path]:
+    words = _words(spec)
+    for i in range(spec.unique_tracks):
+        artist = f"{rng.choice(words)} {i % 97}"
+        album = f"{rng.choice(words)} {rng.choice(words)}"
+        yield music_folder / artist / album / f"{i:05d} {rng.choice(words)} {rng.choice(words)}.mp3"
+
+
+def _add_markers(track: Track, spec: LibrarySpec, rng: random.Random) -> None:
+    colors = list(SeratoColor)
+    words = _words(spec)
+    track.color = "FFFFFF"
+    track.bpm_locked = rng.random() < 0.5
+    for index in range(min(spec.cues, 8)):
+        track.add_hot_cue(
+            HotCue(
+                name=f"{rng.choice(words)} {index}",
+                type=HotCueType.CUE,
+                start=rng.randrange(600_000),
+                index=index,
+                color=rng.choice(colors),
+            )
+        )
+    for index in range(min(spec.cues // 2, 4)):
+        start = rng.randrange(600_000)
+        track.add_hot_cue(
+            HotCue(name=f"loop {index}", type=HotCueType.LOOP, start=start, end=start + 8000, index=index)
+        )
+
+
+def build_tree(spec: LibrarySpec, tracks: list[Track], rng: random.Random) -> Crate:
+    """Builds the crate tree of spec, each crate holding tracks_per_crate tracks drawn from tracks."""
+    words = _words(spec)
+    per_crate = min(spec.tracks_per_crate, len(tracks))
+
+    def build(name: str, depth: int) -> Crate:
+        children = {}
+        if depth < spec.depth:
+            for i in range(spec.width):
+                # sanitizing can map different unicode names to the same crate name, the index keeps siblings apart
+                child = build(f"{rng.choice(words)} {i}", depth + 1)
+                children[child.name] = child
+        crate = Crate(name, children=children)
+        for track in rng.sample(tracks, per_crate):
+            crate.add_track(track)
+        return crate
+
+    return build("Synthetic", 0)
+
+
+def generate_library(folder: Path, spec: Optional[LibrarySpec] = None) -> SyntheticLibrary:
+    """
+    Writes a synthetic library to folder: the crate files in folder/_Serato_/SubCrates and the tagged MP3 stubs in
+    folder/music. The same spec always generates the same library.
+    """
+    spec = spec or LibrarySpec()
+    rng = random.Random(spec.seed)
+    music_folder = folder / "music"
+    serato_folder = folder / "_Serato_"
+    encoder = V2Mp3Encoder()
+    tracks = []
+    for path in _track_paths(spec, music_folder, rng):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(MP3_FRAME * 4)
+        track = Track.from_path(path, trust_path=True)
+        _add_markers(track, spec, rng)
+        encoder.write(track)
+        tracks.append(track)
+    root = build_tree(spec, tracks, rng)
+    (serato_folder / "SubCrates").mkdir(parents=True, exist_ok=True)
+    Builder().save(root, serato_folder)
+    return SyntheticLibrary(spec, serato_folder, music_folder, root, tracks)
+
+
+def main():
+    folder = Path(sys.argv[1])
+    spec = LibrarySpec(*(int(arg) for arg in sys.argv[2:5]))
+    library = generate_library(folder, spec)
+    print(asdict(spec))
+    print(f"{spec.crate_count} crates and {len(library.tracks)} tracks in {folder}")
+
+
+if __name__ == "__main__":
+    main()
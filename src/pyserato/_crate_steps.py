@@ -0,0 +1,219 @@
+"""
+The steps of parsing and saving crate files that hold no state, shared by Builder and AsyncBuilder. Internal to
+pyserato, use Builder or AsyncBuilder instead.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pyserato import metrics
+from pyserato.crate_reader import is_crate_file, iter_track_paths
+from pyserato.crate_writer import serialize_crate, write_crate
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track, TrackRegistry
+from pyserato.model.track_table import TrackTable
+from pyserato.report import CrateSaveStatus
+
+
+def resolve_crate_paths(root: Crate) -> Iterator[tuple[Crate, str]]:
+    """
+    DFS through the crate tree returning a generator of paths with the current crate as the root.
+    :return:
+    """
+    path = ""
+    crates = [(root, path)]
+    while crates:
+        crate, path = crates.pop()
+        path += f"{crate.name}%%"
+        children = crate.children
+        if children:
+            for child in children.values():
+                crates.append((child, path))
+        yield crate, path.rstrip("%%") + ".crate"
+
+
+def parse_crate_names(filepath: Path) -> Iterator[str]:
+    for name in str(filepath.name).split("%%"):
+        yield name.replace(".crate", "")
+
+
+def find_or_create(crate_names: list[str], top_level_crate_map: dict[str, Crate]) -> tuple[Crate, Crate]:
+    """
+    Finds the crate at the path of crate names, creating it and any of its ancestors that don't exist yet.
+    :return: the top level crate and the crate.
+    """
+    root = top_level_crate_map.get(crate_names[0])
+    if root is None:
+        root = Crate(crate_names[0])
+        top_level_crate_map[root.name] = root
+    current = root
+    for crate_name in crate_names[1:]:
+        next_crate = current.children.get(crate_name)
+        if next_crate is None:
+            next_crate = Crate(crate_name)
+            current.children[crate_name] = next_crate
+        current = next_crate
+    return root, current
+
+
+def crate_filepaths(crate: Crate, serato_folder: Path) -> Iterator[tuple[Crate, Path]]:
+    subcrate_folder = serato_folder / "SubCrates"
+    subcrate_folder.mkdir(exist_ok=True)
+    for crate, paths in resolve_crate_paths(crate):
+        yield crate, subcrate_folder / paths
+
+
+def read_crate_paths(filepath: Path) -> tuple[list[str], list[str]]:
+    """
+    Reads the crate names and track paths of a single crate file. This only touches the one file so is safe to
+    run on any worker.
+    """
+    observer = metrics.get_observer()
+    if observer is not None:
+        start = time.perf_counter()
+    crate_names = list(parse_crate_names(filepath))
+    if not crate_names:
+        raise ValueError(f"No crates parsed from {filepath}")
+    data = filepath.read_bytes()
+    track_paths = list(iter_track_paths(data))
+    if observer is not None:
+        observer.on_file(metrics.READ_CRATE, time.perf_counter() - start, filepath, len(data))
+    return crate_names, track_paths
+
+
+def merge_crate(
+    crate_names: list[str],
+    track_paths: list[str],
+    top_level_crate_map: dict[str, Crate],
+    registry: Optional[TrackRegistry] = None,
+    table: Optional[TrackTable] = None,
+) -> Crate:
+    """
+    Adds the tracks of a parsed crate file to the crate tree, creating any crates on its path that don't exist yet.
+    """
+    root, current = find_or_create(crate_names, top_level_crate_map)
+
+    if table is not None:
+        for track_path in track_paths:
+            current.add_track_id(table.add(track_path), table)
+        return root
+
+    # paths read back from a crate file are already absolute
+    for track in Track.from_paths(track_paths, trust_paths=True, registry=registry):
+        current.add_track(track)
+
+    return root
+
+
+def resolved_track_paths(crate: Crate) -> Iterator[str]:
+    """
+    Yields the absolute path of each track in the crate, resolving each path exactly once.
+    """
+    for track in crate.tracks:
+        yield str(Path(track.path).resolve())
+
+
+def construct(crate: Crate) -> bytes:
+    """
+    Constructs the crate in bytes ready to save to disk.
+    Tags are not written here, see Builder._write_tags.
+    """
+    observer = metrics.get_observer()
+    if observer is None:
+        return serialize_crate(resolved_track_paths(crate))
+    # resolve the paths up front so resolving and serializing are timed separately
+    start = time.perf_counter()
+    track_paths = list(resolved_track_paths(crate))
+    resolved = time.perf_counter()
+    observer.on_file(metrics.RESOLVE, resolved - start)
+    buffer = serialize_crate(track_paths)
+    observer.on_file(metrics.SERIALIZE, time.perf_counter() - resolved, nbytes=len(buffer))
+    return buffer
+
+
+def stream_crate(crate: Crate, filepath: Path) -> int:
+    """
+    Streams the crate straight to disk one record at a time rather than building it in memory first.
+    The crate is written to a temporary file that then replaces filepath, so a crate whose tracks are still to be
+    read from filepath, see parse_crates_lazily, reads them before the file is overwritten.
+    """
+    tmp_path = filepath.with_name(f"{filepath.name}.tmp")
+    try:
+        with tmp_path.open("wb") as fp:
+            written = write_crate(fp, resolved_track_paths(crate))
+        os.replace(tmp_path, filepath)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return written
+
+
+def matches_file(filepath: Path, buffer: bytes) -> bool:
+    """Whether the file on disk already holds exactly buffer. The size is checked first to avoid most reads."""
+    return filepath.stat().st_size == len(buffer) and filepath.read_bytes() == buffer
+
+
+def save_crate(
+    crate: Crate,
+    filepath: Path,
+    overwrite: bool,
+    stream: bool,
+    incremental: bool = False,
+) -> CrateSaveStatus:
+    """
+    Writes a single crate file.
+    """
+    exists = filepath.exists()
+    if exists and overwrite is False and incremental is False:
+        return CrateSaveStatus.SKIPPED
+    observer = metrics.get_observer()
+    if stream and not incremental:
+        if observer is not None:
+            start = time.perf_counter()
+        written = stream_crate(crate, filepath)
+    else:
+        buffer = construct(crate)
+        if incremental and exists and matches_file(filepath, buffer):
+            return CrateSaveStatus.UNCHANGED
+        if observer is not None:
+            start = time.perf_counter()
+        written = filepath.write_bytes(buffer)
+    if observer is not None:
+        observer.on_file(metrics.WRITE_CRATE, time.perf_counter() - start, filepath, written)
+    return CrateSaveStatus.CHANGED if exists else CrateSaveStatus.ADDED
+
+
+def find_removed(root: Crate, crate_files: list[tuple[Crate, Path]]) -> list[Path]:
+    """
+    Finds the crate files on disk that belong to root but whose crate is no longer in the tree.
+    """
+    if not crate_files:
+        return []
+    subcrate_folder = crate_files[0][1].parent
+    expected = {filepath.name for _, filepath in crate_files}
+    return sorted(
+        f
+        for f in subcrate_folder.iterdir()
+        if is_crate_file(f)
+        and f.name not in expected
+        and next(parse_crate_names(f)) == root.name
+    )
+
+
+def plan_tag_writes(
+    crate_files: list[tuple[Crate, Path]],
+    tagged: set[Path],
+) -> tuple[list[Track], list[Track]]:
+    """
+    Collects the unique tracks across the crate tree so each file is tagged once however many crates it is in.
+    Only tracks in the crates of tagged are tagged, tracks that are only in other crates are skipped.
+    If different Track objects share a path the first one found is written.
+    :return: the tracks to tag and the tracks skipped.
+    """
+    to_write: dict[Track, None] = {}
+    to_skip: dict[Track, None] = {}
+    for crate, filepath in crate_files:
+        target = to_write if filepath in tagged else to_skip
+        for track in crate.tracks:
+            target.setdefault(track)
+    return list(to_write), [track for track in to_skip if track not in to_write]
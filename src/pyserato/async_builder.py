@@ -0,0 +1,262 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
+
+from pyserato._crate_steps import (
+    crate_filepaths,
+    find_removed,
+    merge_crate,
+    plan_tag_writes,
+    read_crate_paths,
+    save_crate,
+)
+from pyserato.builder import DEFAULT_SERATO_FOLDER
+from pyserato.crate_reader import is_crate_file
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.model.crate import Crate
+from pyserato.model.track import TrackRegistry
+from pyserato.model.track_table import TrackTable
+from pyserato.report import SaveReport
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = 8
+
+
+@dataclass
+class ParseProgress:
+    """
+    Reported after each crate file is merged in to the tree.
+    crates: the tree parsed so far, the same map parse_crates_from_root_path returns once every file is merged.
+    """
+
+    filepath: Path
+    done: int
+    total: int
+    crates: dict[str, Crate]
+
+
+@dataclass
+class SaveProgress:
+    """
+    Reported after each crate file is saved, phase 'crates', and after each track is tagged, phase 'tags'.
+    report: the report of the save so far. Once the save completes it matches the report of Builder.save.
+    """
+
+    phase: str
+    path: Path
+    done: int
+    total: int
+    report: SaveReport
+    error: Optional[Exception] = None
+
+
+class AsyncBuilder:
+    """
+    An asyncio front end to Builder. Every file read and write, and every tag write, runs on an executor so the event
+    loop is never blocked, with at most concurrency of them in flight at once. Tasks are created as others complete
+    rather than all up front, so a large library does not queue a task per file.
+    The files written are byte-identical to Builder's and the parsed crate tree is the same.
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[BaseEncoder] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param concurrency: the most file operations in flight at once.
+        :param executor: the executor the file operations run on, the event loop's default executor by default.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._encoder = encoder
+        self._concurrency = concurrency
+        self._executor = executor
+
+    def _limit(self) -> Callable[..., Awaitable]:
+        semaphore = asyncio.Semaphore(self._concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def call(fn: Callable[..., T], *args) -> T:
+            async with semaphore:
+                return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+        return call
+
+    async def parse_crates_from_root_path(
+        self,
+        subcrate_path: Path,
+        registry: Optional[TrackRegistry] = None,
+        table: Optional[TrackTable] = None,
+    ) -> dict[str, Crate]:
+        """See Builder.parse_crates_from_root_path."""
+        crates: dict[str, Crate] = {}
+        async for progress in self.iter_parse(subcrate_path, registry, table):
+            crates = progress.crates
+        return crates
+
+    async def iter_parse(
+        self,
+        subcrate_path: Path,
+        registry: Optional[TrackRegistry] = None,
+        table: Optional[TrackTable] = None,
+    ) -> AsyncIterator[ParseProgress]:
+        """
+        Parses the crate files concurrently, reporting progress as each one is merged in to the tree. Files are merged
+        in the same order as Builder, so a file that is read early waits for the files before it.
+        """
+        if registry is None:
+            registry = TrackRegistry()
+        call = self._limit()
+        crate_files: list[Path] = await call(
+            lambda: sorted(f for f in subcrate_path.iterdir() if is_crate_file(f))
+        )
+        crates: dict[str, Crate] = {}
+        reads = (call(read_crate_paths, filepath) for filepath in crate_files)
+        done = 0
+        async for crate_names, track_paths in _in_order(reads, self._concurrency):
+            merge_crate(crate_names, track_paths, crates, registry, table)
+            done += 1
+            yield ParseProgress(filepath=crate_files[done - 1], done=done, total=len(crate_files), crates=crates)
+
+    async def save(
+        self,
+        root: Crate,
+        save_path: Path = DEFAULT_SERATO_FOLDER,
+        overwrite: bool = False,
+        stream: bool = False,
+        incremental: bool = False,
+    ) -> SaveReport:
+        """
+        See Builder.save. The crate files and tags are always written concurrently, so an error writing one file is
+        recorded in the report rather than raised.
+        """
+        report = SaveReport()
+        async for _ in self._iter_save(report, root, save_path, overwrite, stream, incremental):
+            pass
+        return report
+
+    def iter_save(
+        self,
+        root: Crate,
+        save_path: Path = DEFAULT_SERATO_FOLDER,
+        overwrite: bool = False,
+        stream: bool = False,
+        incremental: bool = False,
+    ) -> AsyncIterator[SaveProgress]:
+        """Saves like save, reporting progress as each crate file is saved and each track is tagged."""
+        return self._iter_save(SaveReport(), root, save_path, overwrite, stream, incremental)
+
+    async def _iter_save(
+        self,
+        report: SaveReport,
+        root: Crate,
+        save_path: Path,
+        overwrite: bool,
+        stream: bool,
+        incremental: bool,
+    ) -> AsyncIterator[SaveProgress]:
+        if incremental and stream:
+            raise ValueError("an incremental save needs the serialized crate to compare, so cannot be streamed")
+        call = self._limit()
+        crate_files = await call(lambda: list(crate_filepaths(root, save_path)))
+
+        async def save_one(crate: Crate, filepath: Path):
+            try:
+                return filepath, await call(save_crate, crate, filepath, overwrite, stream, incremental), None
+            except Exception as e:
+                return filepath, None, e
+
+        done = 0
+        saves = (save_one(crate, filepath) for crate, filepath in crate_files)
+        async for filepath, status, error in _as_completed(saves, self._concurrency):
+            if error is not None:
+                report.failed[filepath] = error
+            else:
+                report.record(filepath, status)
+            done += 1
+            yield SaveProgress("crates", filepath, done, len(crate_files), report, error)
+        # the crate files complete in any order, the report lists them in the order Builder.save does
+        order = [filepath for _, filepath in crate_files]
+        for paths in (report.written, report.added, report.changed, report.unchanged, report.skipped):
+            _reorder(paths, order)
+        report.failed = _reorder_failed(report.failed, order)
+
+        if incremental:
+            report.removed = await call(find_removed, root, crate_files)
+        if self._encoder is None:
+            return
+        encoder = self._encoder
+        # planning reads the tracks of every crate, which for lazily parsed crates reads their files
+        to_write, to_skip = await call(plan_tag_writes, crate_files, set(report.written) | set(report.unchanged))
+
+        async def write_tags(track):
+            try:
+                await call(encoder.write, track)
+            except Exception as e:
+                return track.path, e
+            return track.path, None
+
+        done = 0
+        async for path, error in _as_completed((write_tags(track) for track in to_write), self._concurrency):
+            if error is not None:
+                report.tags.failed[path] = error
+            else:
+                report.tags.written.append(path)
+            done += 1
+            yield SaveProgress("tags", path, done, len(to_write), report, error)
+        tag_order = [track.path for track in to_write]
+        _reorder(report.tags.written, tag_order)
+        report.tags.failed = _reorder_failed(report.tags.failed, tag_order)
+        report.tags.skipped.extend(track.path for track in to_skip)
+
+
+async def _as_completed(coroutines: Iterable[Awaitable[T]], limit: int) -> AsyncIterator[T]:
+    """
+    Yields the result of each coroutine as it completes, cancelling the rest if iteration stops early.
+    At most limit of them are running at once, the next coroutine is only taken from coroutines as one completes.
+    """
+    coroutines = iter(coroutines)
+    pending = {asyncio.ensure_future(coroutine) for coroutine in islice(coroutines, limit)}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.update(asyncio.ensure_future(coroutine) for coroutine in islice(coroutines, 1))
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _in_order(coroutines: Iterable[Awaitable[T]], limit: int) -> AsyncIterator[T]:
+    """
+    Yields the result of each coroutine in the order given, running at most limit of them ahead of the one awaited
+    and cancelling the rest if iteration stops early.
+    """
+    coroutines = iter(coroutines)
+    pending = deque(asyncio.ensure_future(coroutine) for coroutine in islice(coroutines, limit))
+    try:
+        while pending:
+            result = await pending.popleft()
+            pending.extend(asyncio.ensure_future(coroutine) for coroutine in islice(coroutines, 1))
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _reorder(paths: list[Path], order: list[Path]) -> None:
+    index = {path: i for i, path in enumerate(order)}
+    paths.sort(key=index.__getitem__)
+
+
+def _reorder_failed(failed: dict[Path, Exception], order: list[Path]) -> dict[Path, Exception]:
+    return {path: failed[path] for path in order if path in failed}
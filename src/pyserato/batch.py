@@ -0,0 +1,194 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Mapping, Optional, TypeVar
+
+from pyserato.encoders.analysis_decoder import read_analysis
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.crate import Crate
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.track import Track
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+TrackSource = Crate | Mapping[str, Crate] | Iterable[Track]
+
+
+def iter_unique_tracks(source: TrackSource) -> Iterator[Track]:
+    """
+    Yields each track once from a crate and all its descendants, from the map of top level crates returned by
+    Builder.parse_crates_from_root_path, or from an iterable of tracks.
+    """
+    seen: set[Track] = set()
+    if isinstance(source, Crate):
+        crates = [source]
+    elif isinstance(source, Mapping):
+        crates = list(source.values())
+    else:
+        for track in source:
+            if track not in seen:
+                seen.add(track)
+                yield track
+        return
+
+    while crates:
+        crate = crates.pop()
+        for track in crate.tracks:
+            if track not in seen:
+                seen.add(track)
+                yield track
+        crates.extend(crate.children.values())
+
+
+def iter_completed(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    executor: Optional[Executor] = None,
+) -> Iterator[tuple[T, Optional[R], Optional[Exception]]]:
+    """
+    Runs fn over items on a thread pool, yielding (item, result, error) as each call completes. Items are submitted
+    as earlier calls finish, with at most twice max_workers in flight, so items can be a lazy iterable of any size.
+    An error raised by one call is yielded with its item rather than raised.
+    :param executor: run the calls on this executor instead, e.g. a ProcessPoolExecutor for CPU bound work. It is not
+    shut down.
+    """
+    max_in_flight = max_workers * 2
+    pending: dict[Future, T] = {}
+    remaining = iter(items)
+    with nullcontext(executor) if executor is not None else ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for item in islice(remaining, max_in_flight):
+                pending[pool.submit(fn, item)] = item
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        yield item, future.result(), None
+                    elif isinstance(error, Exception):
+                        yield item, None, error
+                    else:
+                        raise error
+                for item in islice(remaining, len(done)):
+                    pending[pool.submit(fn, item)] = item
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+@dataclass
+class BatchStats:
+    """Throughput counters of a batch run."""
+
+    completed: int = 0
+    failed: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def succeeded(self) -> int:
+        return self.completed - self.failed
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed else 0.0
+
+
+@dataclass
+class CueReadResult:
+    track: Track
+    cues: list[HotCue] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkCueReader:
+    """
+    Reads the cues of many tracks concurrently. A file that cannot be read, e.g. because it has no Serato tag or the
+    tag is corrupt, produces a CueReadResult with the error instead of stopping the run. Raises TypeError up front if
+    the encoder cannot read cues.
+    """
+
+    def __init__(self, encoder: Optional[BaseEncoder] = None, max_workers: int = 8):
+        self._encoder = encoder if encoder is not None else V2Mp3Encoder()
+        if not self._encoder.can_read_cues:
+            raise TypeError(f"{type(self._encoder).__name__} cannot read cues")
+        self._max_workers = max_workers
+        self.stats = BatchStats()
+
+    def read(self, source: TrackSource) -> Iterator[CueReadResult]:
+        """
+        Streams a result for each unique track in source in the order the reads complete. stats is reset at the start
+        of each run and updated as results are yielded.
+        """
+        self.stats = BatchStats()
+        for track, cues, error in _run_batch(self.stats, self._encoder.read_cues, source, self._max_workers):
+            if error is not None:
+                yield CueReadResult(track, error=error)
+            else:
+                yield CueReadResult(track, cues=cues or [])
+
+
+@dataclass
+class AnalysisLoadResult:
+    track: Track
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkAnalysisLoader:
+    """
+    Fills average_bpm, tonality and total_time of many tracks concurrently from Serato's analysis stored in their
+    files, see analysis_decoder.read_analysis. Each file's tag is read once. A file that cannot be read produces an
+    AnalysisLoadResult with the error instead of stopping the run.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self._max_workers = max_workers
+        self.stats = BatchStats()
+
+    def load(self, source: TrackSource) -> Iterator[AnalysisLoadResult]:
+        """
+        Loads each unique track in source, streaming a result per track in the order the loads complete. The tracks
+        are updated in place. stats is reset at the start of each run.
+        """
+        self.stats = BatchStats()
+        for track, _, error in _run_batch(self.stats, read_analysis, source, self._max_workers):
+            yield AnalysisLoadResult(track, error=error)
+
+
+def _run_batch(
+    stats: BatchStats,
+    fn: Callable[[Track], R],
+    source: TrackSource,
+    max_workers: int,
+) -> Iterator[tuple[Track, Optional[R], Optional[Exception]]]:
+    stats.started = time.perf_counter()
+    try:
+        for track, result, error in iter_completed(fn, iter_unique_tracks(source), max_workers):
+            stats.completed += 1
+            if error is not None:
+                stats.failed += 1
+            yield track, result, error
+    finally:
+        stats.finished = time.perf_counter()
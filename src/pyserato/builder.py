@@ -1,11 +1,27 @@
 import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Iterator, Optional
-
+from typing import Callable, Iterator, Optional
+
+from pyserato import metrics
+from pyserato._crate_steps import (
+    crate_filepaths,
+    find_or_create,
+    find_removed,
+    merge_crate,
+    parse_crate_names,
+    plan_tag_writes,
+    read_crate_paths,
+    save_crate,
+)
+from pyserato.crate_reader import CrateFile, is_crate_file, iter_track_paths, read_crate, stream_track_paths
 from pyserato.encoders.base_encoder import BaseEncoder
 from pyserato.model.crate import Crate
-from pyserato.model.track import Track
-from pyserato.util import serato_encode, serato_decode
+from pyserato.model.track import Track, TrackRegistry
+from pyserato.model.track_table import TrackTable
+from pyserato.report import SaveReport, TagWriteReport
 
 DEFAULT_SERATO_FOLDER = Path(os.path.expanduser("~/Music/_Serato_"))
 
@@ -15,157 +31,220 @@ class Builder:
     def __init__(self, encoder: Optional[BaseEncoder] = None):
         self._encoder = encoder
 
-    @staticmethod
-    def _resolve_path(root: Crate) -> Iterator[tuple[Crate, str]]:
+    def parse_crates_from_root_path(
+        self,
+        subcrate_path: Path,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        registry: Optional[TrackRegistry] = None,
+        table: Optional[TrackTable] = None,
+    ) -> dict[str, Crate]:
         """
-        DFS through the crate tree returning a generator of paths with the current crate as the root.
-        :return:
+        Parses every crate file in the SubCrates folder in to a tree of crates.
+        :param max_workers: read and parse the crate files concurrently on a thread pool of this size.
+        :param executor: an existing executor to read and parse the crate files on, for example a
+        ProcessPoolExecutor for very large libraries. Takes precedence over max_workers and is not shut down once
+        parsing completes.
+        The files are always merged in to the tree in the same order, so the result does not depend on the number of
+        workers.
+        :param registry: registry the tracks are interned in, so a track in many crates is a single shared Track. A
+        new registry is used for each call by default, pass one in to share tracks across calls or to see how many
+        were deduplicated.
+        :param table: load the tracks in to this table and have the crates reference its rows by id instead of
+        holding Tracks, see TrackTable. Much more compact for large libraries. Tracks are only created for the crates
+        whose tracks are accessed. The registry is not used when loading in to a table.
+        :return: map from top level crate name to crate.
         """
-        path = ""
-        crates = [(root, path)]
-        while crates:
-            crate, path = crates.pop()
-            path += f"{crate.name}%%"
-            children = crate.children
-            if children:
-                for child in children.values():
-                    crates.append((child, path))
-            yield crate, path.rstrip("%%") + ".crate"
-
-    @staticmethod
-    def _parse_crate_names(filepath: Path) -> Iterator[str]:
-        for name in str(filepath.name).split("%%"):
-            yield name.replace(".crate", "")
-
-    def _build_crate_filepath(self, crate: Crate, serato_folder: Path) -> Iterator[tuple[Crate, Path]]:
-        subcrate_folder = serato_folder / "SubCrates"
-        subcrate_folder.mkdir(exist_ok=True)
-        for crate, paths in self._resolve_path(crate):
-            yield crate, subcrate_folder / paths
-
-    def parse_crates_from_root_path(self, subcrate_path: Path) -> dict[str, Crate]:
+        observer = metrics.get_observer()
+        if observer is not None:
+            start = time.perf_counter()
+        if registry is None:
+            registry = TrackRegistry()
         # map from top level crate name to crate
         top_level_crate_map: dict[str, Crate] = {}
-        for f in subcrate_path.iterdir():
-            if not f.name.endswith("crate"):
-                continue
-            crate = self._build_crates_from_filepath(f, top_level_crate_map)
-            if crate.name not in top_level_crate_map:
-                top_level_crate_map[crate.name] = crate
+        crate_files = sorted(f for f in subcrate_path.iterdir() if is_crate_file(f))
+        if max_workers is None and executor is None:
+            for crate_names, track_paths in map(read_crate_paths, crate_files):
+                merge_crate(crate_names, track_paths, top_level_crate_map, registry, table)
+        else:
+            pool = executor if executor is not None else ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                # map yields results in the order of crate_files whichever worker finishes first
+                for crate_names, track_paths in pool.map(read_crate_paths, crate_files):
+                    merge_crate(crate_names, track_paths, top_level_crate_map, registry, table)
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        if observer is not None:
+            observer.on_phase(metrics.PARSE, time.perf_counter() - start, files=len(crate_files))
         return top_level_crate_map
 
+    def parse_crates_lazily(
+        self,
+        subcrate_path: Path,
+        registry: Optional[TrackRegistry] = None,
+    ) -> dict[str, Crate]:
+        """
+        Builds the crate tree from the names of the crate files alone, without reading them. The tracks of each crate
+        are read from its file when its tracks are first accessed, so listing the crates, or working on one subtree,
+        only costs the files that are actually used. The tree is otherwise the same as parse_crates_from_root_path's.
+        :param registry: see parse_crates_from_root_path, tracks are interned in it as each crate's file is read.
+        :return: map from top level crate name to crate.
+        """
+        if registry is None:
+            registry = TrackRegistry()
+        top_level_crate_map: dict[str, Crate] = {}
+        for filepath in sorted(f for f in subcrate_path.iterdir() if is_crate_file(f)):
+            crate_names = list(parse_crate_names(filepath))
+            _, crate = find_or_create(crate_names, top_level_crate_map)
+            crate.add_tracks_from_file(filepath, registry)
+        return top_level_crate_map
+
+    @staticmethod
+    def iter_crate_tracks(subcrate_path: Path, root: Optional[str] = None) -> Iterator[tuple[str, str]]:
+        """
+        Streams a (crate path, track path) pair for every track of every crate file, reading one record at a time so
+        memory use does not grow with the size of the library. The crate path is the file name without '.crate', the
+        crate names joined by '%%'. The files are read in the same order as parse_crates_from_root_path.
+        :param root: only the crates of this top level crate.
+        """
+        for filepath in sorted(f for f in subcrate_path.iterdir() if is_crate_file(f)):
+            crate_path = filepath.name[: -len(".crate")]
+            if root is not None and crate_path != root and not crate_path.startswith(f"{root}%%"):
+                continue
+            with filepath.open("rb") as fp:
+                for track_path in stream_track_paths(fp):
+                    yield crate_path, track_path
+
     def _build_crates_from_filepath(
             self,
             filepath: Path,
             top_level_crate_map: dict[str, Crate],
     ) -> Crate:
-        crate_names = list(self._parse_crate_names(filepath))
-        if not crate_names:
-            raise ValueError(f"No crates parsed from {filepath}")
-
-        tracks = [
-            Track.from_path(p)
-            for p in self._parse_crate_tracks(filepath)
-        ]
-
-        root = top_level_crate_map.get(crate_names[0])
-        if root is None:
-            root = Crate(crate_names[0])
-        current = root
-        for crate_name in crate_names[1:]:
-            next_crate = current.children.get(crate_name)
-            if next_crate is None:
-                next_crate = Crate(crate_name)
-                current.children[crate_name] = next_crate
-            current = next_crate
-
-        for track in tracks:
-            current.add_track(track)
-
-        return root
+        crate_names, track_paths = read_crate_paths(filepath)
+        return merge_crate(crate_names, track_paths, top_level_crate_map)
 
     @staticmethod
     def _parse_crate_tracks(filepath: Path) -> Iterator[Path]:
-        crate_content = filepath.read_bytes()
-        while crate_content:
-            otrk_idx = crate_content.find("otrk".encode("utf-8"))
-            if otrk_idx < 0:
-                break
-            assert "otrk".encode("utf-8") == crate_content[otrk_idx: otrk_idx + len("otrk")]
-            ptrk_idx = crate_content.find("ptrk".encode("utf-8"))
-            # Below would be the lgnth of the otrk data if needed for further parsing.
-            # otrk_section = crate_content[otrk_idx + len("otrk"): ptrk_idx]
-            # len_data = int.from_bytes(otrk_section, "big") - 8
-            ptrk_section = crate_content[ptrk_idx:]
-            track_name_length = int.from_bytes(ptrk_section[4:8], "big")
-            track_name_encoded = ptrk_section[8: 8 + track_name_length]
-            file_path = serato_decode(track_name_encoded)
-            if not file_path.startswith("/"):
-                file_path = "/" + file_path
-
+        """
+        Walks the records of the crate file in a single pass, yielding the path of each track.
+        """
+        for file_path in iter_track_paths(filepath.read_bytes()):
             yield Path(file_path)
-            crate_content = crate_content[ptrk_idx + 8 + track_name_length:]
 
-    def _construct(self, crate: Crate) -> bytes:
+    @staticmethod
+    def read_crate_file(filepath: Path) -> CrateFile:
+        """
+        Reads the full contents of a crate file, including the column and sorting settings Serato stores alongside
+        the tracks.
+        """
+        return read_crate(filepath.read_bytes())
+
+    def _write_tags(self, tracks: list[Track], max_workers: Optional[int]) -> TagWriteReport:
         """
-        Constructs the crate in bytes ready to save to disk.
-        Also writes any cues and meta info as tags to the track.
+        Writes the tags of each track with the encoder, on a bounded thread pool if max_workers is given.
+        When tagging concurrently an error tagging one file is recorded in the report and does not stop the others
+        being tagged. When tagging serially the error is raised, as for crate files.
         """
-        header = "vrsn".encode("latin1")
-        # byteorder is redundant here for a size of 1 but is a required arg in Python 3.10-
-        header += (0).to_bytes(1, byteorder="big")
-        header += (0).to_bytes(1, byteorder="big")
-        header += serato_encode("81.0")
-        header += serato_encode("/Serato ScratchLive Crate")
-
-        # sorting = "osrt".encode('latin1')
-        # default_sorting_type = "track"
-        # default_sorting_rev = (1 << 8)
-        # sorting += (len(default_sorting_type) * 2 + 17).to_bytes(4, 'big')
-        # sorting += "tvcn".encode('latin1')
-        # sorting += (len(default_sorting_type) * 2).to_bytes(4, 'big')
-        # sorting += default_sorting_type.encode('utf-16')
-        # sorting += "brev".encode('latin1')
-        # sorting += (default_sorting_rev).to_bytes(5, 'big')
-        DEFAULT_COLUMNS = ["track", "artist", "album", "length"]
-        column_section = bytes()
-        for column in DEFAULT_COLUMNS:
-            column_section += "ovct".encode()
-            column_section += (len(column) * 2 + 18).to_bytes(4, "big")
-            column_section += "tvcn".encode()
-            column_section += (len(column) * 2).to_bytes(4, "big")
-            column_section += serato_encode(column)
-            column_section += "tvcw".encode()
-            column_section += (2).to_bytes(4, "big")
-            column_section += "0".encode()
-            column_section += "0".encode()
-
-        playlist_section = bytes()
-        if crate.tracks:
-            for track in crate.tracks:
-                if self._encoder:
-                    self._encoder.write(track)
-                absolute_track_path = Path(track.path).resolve()
-
-                otrk_size = (len(str(absolute_track_path)) * 2 + 8).to_bytes(4, "big")
-                ptrk_size = (len(str(absolute_track_path)) * 2).to_bytes(4, "big")
-                playlist_section += "otrk".encode("latin1")
-                playlist_section += otrk_size
-                playlist_section += "ptrk".encode("latin1")
-                playlist_section += ptrk_size
-                playlist_section += serato_encode(str(absolute_track_path))
-
-        contents = header + column_section + playlist_section
-        return contents
+        report = TagWriteReport()
+        assert self._encoder is not None
+        write = self._encoder.write
+        observer = metrics.get_observer()
+        if observer is not None:
+            start = time.perf_counter()
+            write = partial(_timed_write, observer, write)
+        if max_workers is None:
+            for track in tracks:
+                write(track)
+                report.written.append(track.path)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {track.path: pool.submit(write, track) for track in tracks}
+                for path, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        report.failed[path] = e
+                    else:
+                        report.written.append(path)
+        if observer is not None:
+            observer.on_phase(metrics.WRITE_TAGS, time.perf_counter() - start, files=len(tracks))
+        return report
 
     def save(
         self,
         root: Crate,
         save_path: Path = DEFAULT_SERATO_FOLDER,
         overwrite: bool = False,
-    ):
-        for crate, filepath in self._build_crate_filepath(root, save_path):
-            if filepath.exists() and overwrite is False:
-                continue
-            buffer = self._construct(crate)
-            filepath.write_bytes(buffer)
+        stream: bool = False,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        tag_workers: Optional[int] = None,
+        incremental: bool = False,
+    ) -> SaveReport:
+        """
+        Saves the crate and all of its children to the SubCrates folder of save_path.
+        If the builder has an encoder, the tags of every track in the crates written are then written once per file.
+        :param overwrite: overwrite crate files that already exist on disk.
+        :param stream: write each crate to disk as it is serialized instead of building it in memory first. Useful
+        for very large crates.
+        :param max_workers: build and write the crate files concurrently on a thread pool of this size.
+        :param executor: an existing executor to build and write the crate files on. Takes precedence over
+        max_workers and is not shut down once the save completes.
+        When saving concurrently an error writing one crate file does not stop the others being written, it is
+        recorded in SaveReport.failed instead. When saving serially the error is raised.
+        :param tag_workers: write the track tags concurrently on a thread pool of this size. Errors tagging a file
+        are then recorded in SaveReport.tags.failed, when tagging serially the error is raised.
+        :param incremental: only write the crate files whose content differs from what is on disk, whatever the
+        value of overwrite. The tracks of unchanged crates are still tagged, since their cues may have changed, but
+        encoders that write through a TagTransaction only save files whose tags differ. Crate files under root for
+        crates no longer in the tree are reported in SaveReport.removed. Cannot be combined with stream.
+        :return: a report of the crate files written, skipped and failed, and of the tracks tagged.
+        """
+        if incremental and stream:
+            raise ValueError("an incremental save needs the serialized crate to compare, so cannot be streamed")
+        observer = metrics.get_observer()
+        if observer is not None:
+            start = time.perf_counter()
+        report = SaveReport()
+        crate_files = list(crate_filepaths(root, save_path))
+        if max_workers is None and executor is None:
+            for crate, filepath in crate_files:
+                report.record(filepath, save_crate(crate, filepath, overwrite, stream, incremental))
+        else:
+            pool = executor if executor is not None else ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                futures = {
+                    filepath: pool.submit(save_crate, crate, filepath, overwrite, stream, incremental)
+                    for crate, filepath in crate_files
+                }
+                # collect in submission order so the report matches the serial save
+                for filepath, future in futures.items():
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        report.failed[filepath] = e
+                        continue
+                    report.record(filepath, status)
+            finally:
+                if executor is None:
+                    pool.shutdown()
+
+        if incremental:
+            report.removed = find_removed(root, crate_files)
+        if self._encoder:
+            # the crate files of unchanged crates are not rewritten but the tags of their tracks may have changed
+            to_write, to_skip = plan_tag_writes(crate_files, set(report.written) | set(report.unchanged))
+            report.tags = self._write_tags(to_write, tag_workers)
+            report.tags.skipped.extend(track.path for track in to_skip)
+        if observer is not None:
+            observer.on_phase(metrics.SAVE, time.perf_counter() - start, files=len(crate_files))
+        return report
+
+
+def _timed_write(observer: metrics.Observer, write: Callable[[Track], object], track: Track) -> None:
+    start = time.perf_counter()
+    try:
+        write(track)
+    finally:
+        observer.on_file(metrics.TAG_WRITE, time.perf_counter() - start, track.path)
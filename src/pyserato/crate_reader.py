@@ -0,0 +1,146 @@
+import io
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Generator, Iterator, Optional
+
+from pyserato.util import serato_decode
+
+_LENGTH = struct.Struct(">I")
+# every record is a 4 byte ASCII tag followed by a 4 byte big-endian length
+RECORD_HEADER_SIZE = 8
+
+
+def is_crate_file(path: Path) -> bool:
+    """Whether path is a crate file, by its name, so the temporary files of a streamed save are not."""
+    return path.name.endswith(".crate")
+
+
+@dataclass
+class CrateColumn:
+    name: str
+    width: str = ""
+
+
+@dataclass
+class CrateSorting:
+    column: str
+    reverse: bool = False
+
+
+@dataclass
+class CrateFile:
+    """
+    The decoded contents of a .crate file. The name of the crate is not part of the file, it is the file name, the
+    names of the crate and its ancestors joined by '%%'.
+    """
+
+    version: str = ""
+    sorting: Optional[CrateSorting] = None
+    columns: list[CrateColumn] = field(default_factory=list)
+    tracks: list[str] = field(default_factory=list)
+
+
+def iter_records(data: memoryview | bytes) -> Generator[tuple[str, memoryview], None, None]:
+    """
+    Walk a sequence of tag-length-value records in a single pass.
+    The values are yielded as memoryview slices of data so no bytes are copied while walking. Nested records (tags
+    starting with 'o') can be walked by passing the value back in to iter_records.
+    :param data:
+    :return:
+    """
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    end = len(view)
+    offset = 0
+    while offset + RECORD_HEADER_SIZE <= end:
+        tag = bytes(view[offset: offset + 4]).decode("latin1")
+        (length,) = _LENGTH.unpack_from(view, offset + 4)
+        start = offset + RECORD_HEADER_SIZE
+        if start + length > end:
+            raise ValueError(f"record {tag} at offset {offset} overruns the buffer by {start + length - end} bytes")
+        yield tag, view[start: start + length]
+        offset = start + length
+
+
+def decode_track_path(value: memoryview | bytes) -> str:
+    """Decode a track path record. Serato stores paths relative to the root of the drive."""
+    file_path = serato_decode(value)
+    if not file_path.startswith("/"):
+        file_path = "/" + file_path
+    return file_path
+
+
+def iter_track_paths(data: memoryview | bytes) -> Iterator[str]:
+    """
+    Yields the path of every otrk record in the crate, skipping over all other records.
+    """
+    for tag, value in iter_records(data):
+        if tag != "otrk":
+            continue
+        for track_tag, track_value in iter_records(value):
+            if track_tag == "ptrk":
+                yield decode_track_path(track_value)
+                break
+
+
+def stream_track_paths(fp: BinaryIO) -> Iterator[str]:
+    """
+    Yields the path of every otrk record read from a binary file handle one record at a time, seeking past all other
+    records, so memory use does not grow with the size of the crate.
+    """
+    offset = fp.tell()
+    # the end of the file is needed up front, seeking past it while skipping a record would not fail
+    end = fp.seek(0, io.SEEK_END)
+    fp.seek(offset)
+    while True:
+        header = fp.read(RECORD_HEADER_SIZE)
+        if len(header) < RECORD_HEADER_SIZE:
+            return
+        tag = header[:4].decode("latin1")
+        (length,) = _LENGTH.unpack_from(header, 4)
+        start = offset + RECORD_HEADER_SIZE
+        if start + length > end:
+            raise ValueError(f"record {tag} at offset {offset} overruns the buffer by {start + length - end} bytes")
+        offset = start + length
+        if tag != "otrk":
+            fp.seek(length, io.SEEK_CUR)
+            continue
+        value = fp.read(length)
+        for track_tag, track_value in iter_records(value):
+            if track_tag == "ptrk":
+                yield decode_track_path(track_value)
+                break
+
+
+def read_crate(data: memoryview | bytes) -> CrateFile:
+    """
+    Decode a whole .crate file including the version, sorting and column definitions.
+    """
+    crate_file = CrateFile()
+    for tag, value in iter_records(data):
+        match tag:
+            case "vrsn":
+                crate_file.version = serato_decode(value)
+            case "osrt":
+                column = ""
+                reverse = False
+                for sort_tag, sort_value in iter_records(value):
+                    if sort_tag == "tvcn":
+                        column = serato_decode(sort_value)
+                    elif sort_tag == "brev":
+                        reverse = any(sort_value)
+                crate_file.sorting = CrateSorting(column=column, reverse=reverse)
+            case "ovct":
+                crate_column = CrateColumn(name="")
+                for column_tag, column_value in iter_records(value):
+                    if column_tag == "tvcn":
+                        crate_column.name = serato_decode(column_value)
+                    elif column_tag == "tvcw":
+                        crate_column.width = serato_decode(column_value)
+                crate_file.columns.append(crate_column)
+            case "otrk":
+                for track_tag, track_value in iter_records(value):
+                    if track_tag == "ptrk":
+                        crate_file.tracks.append(decode_track_path(track_value))
+                        break
+    return crate_file
@@ -0,0 +1,64 @@
+import struct
+from typing import BinaryIO, Iterable, Iterator
+
+from pyserato.util import serato_encode
+
+_LENGTH = struct.Struct(">I")
+
+CRATE_VERSION = "1.0/Serato ScratchLive Crate"
+DEFAULT_COLUMNS = ["track", "artist", "album", "length"]
+# Serato writes the column width as text, this has always been written as two ASCII zeros.
+DEFAULT_COLUMN_WIDTH = b"00"
+
+
+def encode_record(tag: str, value: bytes) -> bytes:
+    """Encode a single tag-length-value record."""
+    return tag.encode("latin1") + _LENGTH.pack(len(value)) + value
+
+
+def _encode_track(track_path: str) -> bytes:
+    ptrk = encode_record("ptrk", serato_encode(track_path))
+    return encode_record("otrk", ptrk)
+
+
+def encode_header(columns: Iterable[str] = DEFAULT_COLUMNS) -> bytes:
+    """The version record followed by the column definitions."""
+    header = bytearray(encode_record("vrsn", serato_encode(CRATE_VERSION)))
+    for column in columns:
+        header += encode_record(
+            "ovct",
+            encode_record("tvcn", serato_encode(column)) + encode_record("tvcw", DEFAULT_COLUMN_WIDTH),
+        )
+    return bytes(header)
+
+
+def iter_crate_chunks(track_paths: Iterable[str], columns: Iterable[str] = DEFAULT_COLUMNS) -> Iterator[bytes]:
+    """
+    Yields the crate file in chunks: the header and then one otrk record per track. The track paths are consumed
+    lazily so the whole crate never has to be held in memory.
+    :param track_paths: absolute paths of the tracks in the crate.
+    :param columns: names of the columns shown in the Serato browser.
+    :return:
+    """
+    yield encode_header(columns)
+    for track_path in track_paths:
+        yield _encode_track(track_path)
+
+
+def serialize_crate(track_paths: Iterable[str], columns: Iterable[str] = DEFAULT_COLUMNS) -> bytes:
+    """Serialize a crate in one linear pass in to a single buffer."""
+    buffer = bytearray()
+    for chunk in iter_crate_chunks(track_paths, columns):
+        buffer += chunk
+    return bytes(buffer)
+
+
+def write_crate(fp: BinaryIO, track_paths: Iterable[str], columns: Iterable[str] = DEFAULT_COLUMNS) -> int:
+    """
+    Stream a crate to a binary file handle.
+    :return: the number of bytes written.
+    """
+    written = 0
+    for chunk in iter_crate_chunks(track_paths, columns):
+        written += fp.write(chunk)
+    return written
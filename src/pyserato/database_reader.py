@@ -0,0 +1,99 @@
+import mmap
+from pathlib import Path
+from typing import Callable, Collection, Iterator, Optional
+
+from pyserato.crate_reader import decode_track_path, iter_records
+from pyserato.model.track import Track
+from pyserato.util import serato_decode
+
+DATABASE_V2_FILENAME = "database V2"
+
+
+def _decode_float(value: memoryview) -> float:
+    try:
+        return float(serato_decode(value))
+    except ValueError:
+        return 0.0
+
+
+def _decode_length(value: memoryview) -> float:
+    """
+    Decode a track length such as '04:21.33' or '1:02:03' in to seconds.
+    """
+    text = serato_decode(value)
+    seconds = 0.0
+    try:
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return 0.0
+    return seconds
+
+
+# map of the database field tag to the Track attribute it populates and how to decode it
+TRACK_FIELDS: dict[str, tuple[str, Callable[[memoryview], object]]] = {
+    "tbpm": ("average_bpm", _decode_float),
+    "tkey": ("tonality", serato_decode),
+    "tlen": ("total_time", _decode_length),
+    "tadd": ("date_added", serato_decode),
+}
+
+
+def _decode_track(
+    record: memoryview | bytes, fields: dict[str, tuple[str, Callable[[memoryview], object]]]
+) -> Optional[Track]:
+    path = None
+    values: dict[str, object] = {}
+    for tag, value in iter_records(record):
+        if tag == "pfil":
+            path = decode_track_path(value)
+        elif tag in fields:
+            attribute, decode = fields[tag]
+            values[attribute] = decode(value)
+    if path is None:
+        return None
+    # paths in the database are already absolute so are not resolved against the filesystem
+    track = Track.from_path(path, trust_path=True)
+    for attribute, decoded in values.items():
+        setattr(track, attribute, decoded)
+    return track
+
+
+def iter_database_tracks(database_path: Path, fields: Optional[Collection[str]] = None) -> Iterator[Track]:
+    """
+    Yields a Track for every track in a Serato 'database V2' file, one at a time.
+    The file is memory mapped and walked in place, so only the track being decoded, copied out of the map, is held in
+    memory however large the database is.
+    :param database_path: path to the database V2 file, usually DEFAULT_SERATO_FOLDER / DATABASE_V2_FILENAME.
+    :param fields: names of the Track attributes to decode, e.g. {'average_bpm'}. The path is always decoded. All the
+    attributes in TRACK_FIELDS are decoded by default.
+    :return:
+    """
+    wanted = TRACK_FIELDS
+    if fields is not None:
+        unknown = set(fields) - {attribute for attribute, _ in TRACK_FIELDS.values()}
+        if unknown:
+            raise ValueError(f"cannot decode track fields {sorted(unknown)} from the database")
+        wanted = {tag: field for tag, field in TRACK_FIELDS.items() if field[0] in fields}
+
+    with database_path.open("rb") as f:
+        if database_path.stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            records = iter_records(view)
+            value = None
+            try:
+                for tag, value in records:
+                    if tag != "otrk":
+                        continue
+                    # decode a copy of the record, so no view of the map outlives the loop in a traceback and an error
+                    # raised while decoding is not masked by a BufferError when the map is closed
+                    track = _decode_track(bytes(value), wanted)
+                    if track is not None:
+                        yield track
+            finally:
+                # every view of the map has to be released before it can be closed
+                records.close()
+                del value
+                view.release()
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from pyserato.encoders.serato_tags import SERATO_AUTOTAGS, load_id3
+from pyserato.model.track import Track
+
+AUTOTAGS_VERSION = b"\x01\x01"
+# the ID3 frames read for a track's analysis, all in a single read of the tag
+ANALYSIS_FRAMES = ("GEOB", "TKEY", "TLEN")
+
+
+@dataclass(slots=True)
+class Autotags:
+    """The results of Serato's analysis of a track: its BPM and the gain applied to it."""
+
+    bpm: Optional[float]
+    auto_gain: Optional[float]
+    gain_db: Optional[float]
+
+
+def _decode_number(value: bytes) -> Optional[float]:
+    try:
+        return float(value.decode("ascii"))
+    except ValueError:
+        return None
+
+
+def decode_autotags(data: bytes) -> Autotags:
+    """
+    Decode a Serato Autotags frame: the version then the BPM, auto gain and gain in dB as null-terminated ASCII
+    numbers, e.g. '115.00'.
+    """
+    if data[:2] != AUTOTAGS_VERSION:
+        raise ValueError(f"unsupported Serato Autotags version {data[:2].hex()}")
+    fields = data[2:].split(b"\x00")
+    bpm, auto_gain, gain_db = (_decode_number(field) for field in (fields + [b"", b"", b""])[:3])
+    return Autotags(bpm=bpm, auto_gain=auto_gain, gain_db=gain_db)
+
+
+def decode_analysis(data: bytes) -> tuple[int, int]:
+    """
+    Decode a Serato Analysis frame, which only holds the version of Serato's analysis of the track.
+    :return: the major and minor version, e.g. (2, 1).
+    """
+    if len(data) < 2:
+        raise ValueError("Serato Analysis frame is too short")
+    return data[0], data[1]
+
+
+def read_analysis(track: Track) -> Track:
+    """
+    Fills average_bpm from the Serato Autotags frame, tonality from the TKEY frame and total_time, in seconds, from
+    the TLEN frame of the track's file. Every frame comes from a single read of the ID3 tag and no audio is read.
+    Fields whose frame the file does not have are left as they are.
+    """
+    tags = load_id3(track.path, ANALYSIS_FRAMES)
+    if SERATO_AUTOTAGS in tags:
+        bpm = decode_autotags(tags[SERATO_AUTOTAGS].data).bpm
+        if bpm is not None:
+            track.average_bpm = bpm
+    if "TKEY" in tags and tags["TKEY"].text:
+        track.tonality = str(tags["TKEY"].text[0])
+    if "TLEN" in tags and tags["TLEN"].text:
+        try:
+            track.total_time = float(tags["TLEN"].text[0]) / 1000
+        except ValueError:
+            pass
+    return track
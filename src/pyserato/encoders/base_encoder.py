@@ -1,5 +1,7 @@
 from abc import abstractmethod, ABC
 
+from pyserato.encoders.serato_tags import TagTransaction
+from pyserato.model.hot_cue import HotCue
 from pyserato.model.track import Track
 
 
@@ -23,3 +25,29 @@ class BaseEncoder(ABC):
     @abstractmethod
     def write(self, track: Track):
         pass
+
+    def encode(self, track: Track) -> bytes:
+        """The data of the encoder's GEOB frame for the track."""
+        raise NotImplementedError(f"{type(self).__name__} cannot encode tags")
+
+    def stage(self, track: Track, transaction: TagTransaction) -> None:
+        """
+        Adds the encoder's changes for the track to transaction, to be saved with the changes of other encoders.
+        Encoders that only implement write, not encode, write the track straight away with their own save instead.
+        """
+        if type(self).encode is BaseEncoder.encode:
+            self.write(track)
+            return
+        transaction.set(self.tag_name, self.encode(track))
+
+    @property
+    def can_read_cues(self) -> bool:
+        """Whether the encoder implements read_cues."""
+        return type(self).read_cues is not BaseEncoder.read_cues
+
+    def read_cues(self, track: Track) -> list[HotCue]:
+        """
+        Reads the cues and loops stored in the track's file by this encoder. Not every encoder can read cues back,
+        see can_read_cues.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot read cues")
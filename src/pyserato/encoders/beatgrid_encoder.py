@@ -0,0 +1,96 @@
+import struct
+from functools import lru_cache
+
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.encoders.serato_tags import SERATO_BEATGRID, TagTransaction, read_serato_tags
+from pyserato.model.tempo import Tempo
+from pyserato.model.track import Track
+
+_HEADER = struct.Struct(">BBI")
+# every marker but the last: POSITION and BEATS TO THE NEXT MARKER
+_MARKER = struct.Struct(">fI")
+# the last marker: POSITION and BPM
+_LAST_MARKER = struct.Struct(">ff")
+
+
+@lru_cache(maxsize=64)
+def _grid_struct(marker_count: int) -> struct.Struct:
+    """
+    The layout of a whole beatgrid with marker_count markers, so every marker is unpacked in one call when decoding.
+    VERSION, MARKER COUNT, then for every marker but the last POSITION and BEATS TO THE NEXT MARKER, for the last
+    POSITION and BPM, then a footer byte.
+    """
+    if marker_count == 0:
+        return struct.Struct(">BBIB")
+    return struct.Struct(">BBI" + "fI" * (marker_count - 1) + "ffB")
+
+
+class BeatGridEncoder(BaseEncoder):
+    """
+    Reads and writes Track.beatgrid as the Serato BeatGrid tag. Marker positions are in seconds.
+    Serato stores the BPM of the last marker only. For every other marker it stores the number of beats to the next
+    marker, so their BPM is derived from the distance between the markers when read.
+    """
+
+    @property
+    def tag_name(self) -> str:
+        return SERATO_BEATGRID
+
+    @property
+    def tag_version(self) -> bytes:
+        return b"\x01\x00"
+
+    @property
+    def markers_name(self) -> str:
+        return "Serato BeatGrid"
+
+    def write(self, track: Track):
+        with TagTransaction(track.path) as transaction:
+            self.stage(track, transaction)
+
+    def stage(self, track: Track, transaction: TagTransaction) -> None:
+        # a track without a beatgrid leaves the grid in the file as it is
+        if track.beatgrid:
+            transaction.set(self.tag_name, self.encode(track))
+
+    def read(self, track: Track) -> Track:
+        """Reads the beatgrid of the track's file in to Track.beatgrid. Raises KeyError if the file has none."""
+        track.beatgrid = self.decode(read_serato_tags(track.path, [self.tag_name])[self.tag_name]) or None
+        return track
+
+    def encode(self, track: Track) -> bytes:
+        markers = track.get_beatgrid()
+        parts = [_HEADER.pack(*self.tag_version, len(markers))]
+        for index, (marker, next_marker) in enumerate(zip(markers, markers[1:])):
+            if marker.position is None or marker.bpm is None or next_marker.position is None:
+                raise ValueError(f"beatgrid marker {marker} of {track.path} needs a position and a BPM")
+            if next_marker.position <= marker.position:
+                raise ValueError(
+                    f"beatgrid marker {index} of {track.path} at {marker.position}s is not before the next marker at "
+                    f"{next_marker.position}s, markers must be sorted by position"
+                )
+            beats_to_next = round((next_marker.position - marker.position) * marker.bpm / 60)
+            parts.append(_MARKER.pack(marker.position, beats_to_next))
+        if markers:
+            last = markers[-1]
+            if last.position is None or last.bpm is None:
+                raise ValueError(f"beatgrid marker {last} of {track.path} needs a position and a BPM")
+            parts.append(_LAST_MARKER.pack(last.position, last.bpm))
+        parts.append(b"\x00")
+        return b"".join(parts)
+
+    def decode(self, data: bytes) -> list[Tempo]:
+        version_major, version_minor, marker_count = _HEADER.unpack_from(data)
+        assert bytes((version_major, version_minor)) == self.tag_version
+        if marker_count == 0:
+            return []
+        values = _grid_struct(marker_count).unpack_from(data)
+        positions = values[3:-1:2]
+        beats = values[4:-1:2]
+        markers = []
+        for index, (position, beats_to_next, next_position) in enumerate(zip(positions, beats, positions[1:])):
+            if next_position == position:
+                raise ValueError(f"beatgrid marker {index} at {position}s has the same position as the next marker")
+            markers.append(Tempo(position=position, bpm=beats_to_next * 60 / (next_position - position)))
+        markers.append(Tempo(position=positions[-1], bpm=beats[-1]))
+        return markers
@@ -0,0 +1,56 @@
+from typing import Iterable
+
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.encoders.serato_tags import TagTransaction
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.track import Track
+
+
+class CompositeEncoder(BaseEncoder):
+    """
+    Writes the tags of several encoders, and clears other Serato tags, with a single load and save of each file.
+    Can be passed to Builder in place of a single encoder:
+
+        Builder(encoder=CompositeEncoder([V2Mp3Encoder(), V1Mp3Encoder()], clear=[SERATO_OVERVIEW]))
+    """
+
+    def __init__(self, encoders: Iterable[BaseEncoder], clear: Iterable[str] = ()):
+        """
+        :param encoders: the encoders whose tags are written, in order.
+        :param clear: names of tags to remove from the file, e.g. SERATO_OVERVIEW. A tag that one of the encoders
+        writes is written rather than removed.
+        """
+        self.encoders = list(encoders)
+        if not self.encoders:
+            raise ValueError("CompositeEncoder needs at least one encoder")
+        self.clear = list(clear)
+
+    @property
+    def tag_name(self) -> str:
+        return ", ".join(encoder.tag_name for encoder in self.encoders)
+
+    @property
+    def tag_version(self) -> bytes:
+        return self.encoders[0].tag_version
+
+    @property
+    def markers_name(self) -> str:
+        return ", ".join(encoder.markers_name for encoder in self.encoders)
+
+    def write(self, track: Track):
+        with TagTransaction(track.path) as transaction:
+            self.stage(track, transaction)
+
+    def stage(self, track: Track, transaction: TagTransaction) -> None:
+        for tag in self.clear:
+            transaction.clear(tag)
+        for encoder in self.encoders:
+            encoder.stage(track, transaction)
+
+    @property
+    def can_read_cues(self) -> bool:
+        return self.encoders[0].can_read_cues
+
+    def read_cues(self, track: Track) -> list[HotCue]:
+        """Reads the cues with the first encoder."""
+        return self.encoders[0].read_cues(track)
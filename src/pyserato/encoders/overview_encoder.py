@@ -0,0 +1,138 @@
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from pyserato.batch import iter_completed
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.encoders.serato_tags import SERATO_OVERVIEW, TagTransaction
+from pyserato.model.track import Track
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only generating overviews needs it
+    np = None  # type: ignore[assignment]
+
+# the overview is 240 blocks across the track, each drawn from 16 amplitude values
+OVERVIEW_BLOCKS = 240
+OVERVIEW_BLOCK_SIZE = 16
+
+Samples = Any  # a numpy array of samples, shaped (frames,) or (frames, channels)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("generating Serato overviews needs numpy, install pyserato[numpy]")
+
+
+def read_wav(wav_path: Path) -> tuple[Samples, int]:
+    """
+    Reads a PCM WAV file with the standard library wave module.
+    :return: the samples as float32 in [-1, 1] shaped (frames, channels), and the sample rate.
+    """
+    _require_numpy()
+    with wave.open(str(wav_path), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    raw = np.frombuffer(frames, dtype=np.uint8)
+    if width == 1:
+        # 8 bit WAV is unsigned
+        samples = (raw.astype(np.float32) - 128) / 128
+    elif width == 3:
+        # 24 bit samples are widened to 32 bits, keeping the sign in the top byte
+        padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = raw.reshape(-1, 3)
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2**31
+    elif width in (2, 4):
+        samples = np.frombuffer(frames, dtype=f"<i{width}").astype(np.float32) / 2 ** (8 * width - 1)
+    else:
+        raise ValueError(f"unsupported WAV sample width of {width} bytes")
+    return samples.reshape(-1, channels), rate
+
+
+def compute_overview(samples: Samples) -> bytes:
+    """
+    Summarises the amplitude of a track as OVERVIEW_BLOCKS blocks of OVERVIEW_BLOCK_SIZE values, each the peak
+    amplitude of an equal slice of the track scaled to 0-255 against the loudest peak.
+    All the slices are reduced in a single numpy call.
+    :param samples: shaped (frames,) or (frames, channels), channels are combined by their peak.
+    """
+    _require_numpy()
+    amplitude = np.abs(np.asarray(samples, dtype=np.float32))
+    if amplitude.ndim == 1:
+        amplitude = amplitude[:, None]
+    slices = OVERVIEW_BLOCKS * OVERVIEW_BLOCK_SIZE
+    if len(amplitude) < slices:
+        amplitude = np.pad(amplitude, ((0, slices - len(amplitude)), (0, 0)))
+    frames, channels = amplitude.shape
+    starts = np.arange(slices) * frames // slices
+    # the frames of a slice are contiguous so the peak of all its channels is one reduction over the flat samples
+    peaks = np.maximum.reduceat(np.ascontiguousarray(amplitude).ravel(), starts * channels)
+    loudest = peaks.max()
+    if loudest > 0:
+        peaks = peaks * (255 / loudest)
+    return np.rint(peaks).astype(np.uint8).tobytes()
+
+
+class OverviewEncoder(BaseEncoder):
+    """
+    Writes the Serato Overview tag, the waveform Serato shows for the whole track, from the track's PCM audio so the
+    track does not have to be analysed by Serato first.
+    pyserato does not decode MP3s, so the samples of a track come from load_samples, e.g. reading a WAV render of the
+    track with read_wav. Use write_overviews to generate the overviews of many tracks on a process pool.
+    """
+
+    def __init__(self, load_samples: Optional[Callable[[Track], Samples]] = None):
+        self._load_samples = load_samples
+
+    @property
+    def tag_name(self) -> str:
+        return SERATO_OVERVIEW
+
+    @property
+    def tag_version(self) -> bytes:
+        return b"\x01\x05"
+
+    @property
+    def markers_name(self) -> str:
+        return "Serato Overview"
+
+    def write(self, track: Track):
+        with TagTransaction(track.path) as transaction:
+            self.stage(track, transaction)
+
+    def encode(self, track: Track) -> bytes:
+        if self._load_samples is None:
+            raise ValueError("OverviewEncoder needs load_samples to encode a track")
+        return self.encode_samples(self._load_samples(track))
+
+    def encode_samples(self, samples: Samples) -> bytes:
+        return self.tag_version + compute_overview(samples)
+
+
+def _write_overview(job: tuple[Path, Path]) -> None:
+    track_path, wav_path = job
+    samples, _ = read_wav(wav_path)
+    with TagTransaction(track_path) as transaction:
+        transaction.set(SERATO_OVERVIEW, OverviewEncoder().encode_samples(samples))
+
+
+def write_overviews(
+    jobs: Iterable[tuple[Path, Path]],
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[Path, Optional[Exception]]]:
+    """
+    Generates and writes the overviews of many tracks on a process pool, since the work is CPU bound.
+    :param jobs: pairs of the path of the track to tag and the path of a WAV file of its audio. The WAV is often the
+    track itself decoded by another tool.
+    :param max_workers: number of processes, the number of CPUs by default.
+    :return: yields each track path with the error writing it, or None, as the jobs complete.
+    """
+    _require_numpy()
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (track_path, _), _, error in iter_completed(_write_overview, jobs, workers, executor=pool):
+            yield track_path, error
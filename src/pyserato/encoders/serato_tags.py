@@ -1,19 +1,126 @@
+import time
 from pathlib import Path
+from typing import Iterable, Optional
 
-from mutagen.mp3 import MP3
+from mutagen import id3
+
+from pyserato import metrics
 
 SERATO_MARKERS_V2 = "GEOB:Serato Markers2"
 SERATO_OVERVIEW = "GEOB:Serato Overview"
 SERATO_MARKERS_V1 = "GEOB:Serato Markers_"
 SERATO_ANALYSIS = "GEOB:Serato Analysis"
+SERATO_BEATGRID = "GEOB:Serato BeatGrid"
+# written by Serato's analysis and only ever read, so it is not cleared with the tags pyserato writes
+SERATO_AUTOTAGS = "GEOB:Serato Autotags"
+
+SERATO_GEOB_TAGS = [SERATO_MARKERS_V2, SERATO_OVERVIEW, SERATO_MARKERS_V1, SERATO_ANALYSIS, SERATO_BEATGRID]
 
 
 def clear_all_tags(track_path: Path, audio_encoding="mp3"):
     assert audio_encoding == "mp3", "only mp3 supported"
-    track = MP3(track_path)
-    for tag in [SERATO_MARKERS_V2, SERATO_OVERVIEW, SERATO_MARKERS_V1, SERATO_ANALYSIS]:
+    with TagTransaction(track_path) as transaction:
+        transaction.clear_all()
+
+
+def load_id3(track_path: Path, frame_ids: Iterable[str] = ("GEOB",)) -> id3.ID3:
+    """
+    Loads only the ID3v2 tag of a file. Unlike opening the file with mutagen.mp3.MP3 the MPEG stream is never
+    scanned: just the tag header and the frame area it declares are read.
+    :param frame_ids: the frames to parse, all other frames are skipped over without being decoded.
+    :return: the tag, empty if the file has none.
+    """
+    known_frames = {frame_id: getattr(id3, frame_id) for frame_id in frame_ids}
+    try:
+        return id3.ID3(track_path, known_frames=known_frames, translate=False, load_v1=False)
+    except id3.ID3NoHeaderError:
+        return id3.ID3()
+
+
+def read_serato_tags(track_path: Path, tags: Iterable[str] = SERATO_GEOB_TAGS) -> dict[str, bytes]:
+    """
+    Reads the data of the Serato GEOB frames of a file without reading any audio data.
+    :return: map from tag name, e.g. SERATO_MARKERS_V2, to the frame data for the tags the file has.
+    """
+    id3_tags = load_id3(track_path)
+    return {tag: id3_tags[tag].data for tag in tags if tag in id3_tags}
+
+
+class TagTransaction:
+    """
+    Collects changes to the Serato GEOB frames of one file and applies them all with a single load and save of the
+    tag, rather than rewriting the file once per frame. Frames the transaction does not touch are kept.
+    Used as a context manager the changes are committed when the block exits without an error:
+
+        with TagTransaction(path) as transaction:
+            transaction.set(SERATO_MARKERS_V2, data)
+            transaction.clear(SERATO_OVERVIEW)
+    """
+
+    def __init__(self, track_path: Path):
+        self.track_path = track_path
+        # map from tag name to the new frame data, None to remove the frame
+        self._changes: dict[str, Optional[bytes]] = {}
+
+    @property
+    def pending(self) -> dict[str, Optional[bytes]]:
+        return dict(self._changes)
+
+    def set(self, tag: str, data: bytes) -> None:
+        """Adds the frame, replacing it if the file already has it. tag is the full name, e.g. SERATO_MARKERS_V2."""
+        self._changes[tag] = data
+
+    def clear(self, tag: str) -> None:
+        self._changes[tag] = None
+
+    def clear_all(self) -> None:
+        for tag in SERATO_GEOB_TAGS:
+            self.clear(tag)
+
+    def commit(self) -> bool:
+        """
+        Applies the pending changes. The file is only saved if a frame is actually added, changed or removed.
+        :return: True if the file was saved.
+        """
+        changes, self._changes = self._changes, {}
+        if not changes:
+            return False
+        observer = metrics.get_observer()
+        if observer is not None:
+            start = time.perf_counter()
         try:
-            track.pop(tag)
-        except Exception:
-            pass
-    track.save()
+            tags = id3.ID3(self.track_path)
+        except id3.ID3NoHeaderError:
+            tags = id3.ID3()
+        if observer is not None:
+            observer.on_file(metrics.TAG_LOAD, time.perf_counter() - start, self.track_path)
+        modified = False
+        for tag, data in changes.items():
+            frame = tags.get(tag)
+            if data is None:
+                if frame is not None:
+                    del tags[tag]
+                    modified = True
+            elif frame is None or frame.data != data:
+                tags[tag] = id3.GEOB(
+                    encoding=0,
+                    mime="application/octet-stream",
+                    desc=tag.partition(":")[2],
+                    data=data,
+                )
+                modified = True
+        if modified:
+            if observer is not None:
+                start = time.perf_counter()
+            tags.save(self.track_path)
+            if observer is not None:
+                nbytes = sum(len(data) for data in changes.values() if data is not None)
+                observer.on_file(metrics.TAG_SAVE, time.perf_counter() - start, self.track_path, nbytes)
+        return modified
+
+    def __enter__(self) -> "TagTransaction":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.commit()
@@ -1,20 +1,73 @@
-import struct
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the pure Python codec is used without it
+    np = None  # type: ignore[assignment]
+
+# below this many groups the pure Python codec is faster than converting to and from numpy arrays
+NUMPY_MIN_GROUPS = 32
 
 
 def encode(data):
     """Encode 3 byte plain text into 4 byte Serato binary format."""
-    a, b, c = struct.unpack("BBB", data)
-    z = c & 0x7F
-    y = ((c >> 7) | (b << 1)) & 0x7F
-    x = ((b >> 6) | (a << 2)) & 0x7F
-    w = a >> 5
-    return bytes(bytearray([w, x, y, z]))
+    if len(data) != 3:
+        raise ValueError(f"expected 3 bytes, got {len(data)}")
+    return encode_buffer(data)
 
 
 def decode(data):
     """Decode 4 byte Serato binary format into 3 byte plain text."""
-    w, x, y, z = struct.unpack("BBBB", data)
-    c = (z & 0x7F) | ((y & 0x01) << 7)
-    b = ((y & 0x7F) >> 1) | ((x & 0x03) << 6)
-    a = ((x & 0x7F) >> 2) | ((w & 0x07) << 5)
-    return struct.pack("BBB", a, b, c)
+    if len(data) != 4:
+        raise ValueError(f"expected 4 bytes, got {len(data)}")
+    return decode_buffer(data)
+
+
+def encode_buffer(data: bytes | bytearray | memoryview) -> bytes:
+    """
+    Encode a buffer of 3 byte groups into 4 byte Serato groups in a single pass.
+    Each 24 bit group is split in to 7 bit values with the top bit of every byte clear: 3, 7, 7 and 7 bits.
+    """
+    if len(data) % 3:
+        raise ValueError(f"buffer length {len(data)} is not a multiple of 3")
+    if np is not None and len(data) // 3 >= NUMPY_MIN_GROUPS:
+        return _encode_numpy(data)
+    out = bytearray()
+    for a, b, c in zip(data[0::3], data[1::3], data[2::3]):
+        value = a << 16 | b << 8 | c
+        out += bytes((value >> 21, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F))
+    return bytes(out)
+
+
+def decode_buffer(data: bytes | bytearray | memoryview) -> bytes:
+    """Decode a buffer of 4 byte Serato groups into 3 byte groups in a single pass."""
+    if len(data) % 4:
+        raise ValueError(f"buffer length {len(data)} is not a multiple of 4")
+    if np is not None and len(data) // 4 >= NUMPY_MIN_GROUPS:
+        return _decode_numpy(data)
+    out = bytearray()
+    for w, x, y, z in zip(data[0::4], data[1::4], data[2::4], data[3::4]):
+        value = (w & 0x07) << 21 | (x & 0x7F) << 14 | (y & 0x7F) << 7 | (z & 0x7F)
+        out += value.to_bytes(3, "big")
+    return bytes(out)
+
+
+def _encode_numpy(data: bytes | bytearray | memoryview) -> bytes:
+    groups = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.uint32)
+    value = groups[:, 0] << 16 | groups[:, 1] << 8 | groups[:, 2]
+    out = np.empty((len(groups), 4), dtype=np.uint8)
+    out[:, 0] = value >> 21
+    out[:, 1] = (value >> 14) & 0x7F
+    out[:, 2] = (value >> 7) & 0x7F
+    out[:, 3] = value & 0x7F
+    return out.tobytes()
+
+
+def _decode_numpy(data: bytes | bytearray | memoryview) -> bytes:
+    groups = np.frombuffer(data, dtype=np.uint8).reshape(-1, 4).astype(np.uint32)
+    value = (groups[:, 0] & 0x07) << 21 | (groups[:, 1] & 0x7F) << 14 | (groups[:, 2] & 0x7F) << 7 | (
+        groups[:, 3] & 0x7F
+    )
+    out = np.empty((len(groups), 3), dtype=np.uint8)
+    out[:, 0] = value >> 16
+    out[:, 1] = (value >> 8) & 0xFF
+    out[:, 2] = value & 0xFF
+    return out.tobytes()
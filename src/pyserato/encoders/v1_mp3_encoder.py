@@ -1,8 +1,58 @@
+import struct
+from typing import Iterator, List, Optional, Sequence
+
 from pyserato.encoders.base_encoder import BaseEncoder
-from pyserato.encoders.serato_tags import SERATO_MARKERS_V1
+from pyserato.encoders.serato_tags import SERATO_MARKERS_V1, read_serato_tags, TagTransaction
+from pyserato.encoders.utils import decode_buffer, encode_buffer
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.serato_color import SeratoColor
+from pyserato.model.track import Track
+
+# POSITION START SET, POSITION START, POSITION END SET, POSITION END, UNKNOWN, COLOR, TYPE, LOCKED
+_ENTRY_STRUCT = struct.Struct(">B4sB4s6s4sBB")
+_HEADER = struct.Struct(">BBI")
+
+# Serato Markers_ always holds 5 cue entries followed by 9 loop entries
+CUE_SLOTS = 5
+LOOP_SLOTS = 9
+# positions are stored as 3 plain bytes so must fit in 24 bits
+MAX_POSITION = 0xFFFFFF
+DEFAULT_TRACK_COLOR = "FFFFFF"
+
+_SET = 0x00
+_UNSET = 0x7F
+_UNSET_POSITION = b"\x7f\x7f\x7f\x7f"
+_UNKNOWN_FIELD = b"\x00\x7f\x7f\x7f\x7f\x7f"
+# the entry types used by Serato Markers_
+_TYPE_INVALID = 0x00
+_TYPE_CUE = 0x01
+_TYPE_LOOP = 0x03
+# every entry has a start, an end and a color, each 3 plain bytes
+_GROUPS_PER_ENTRY = 3
+
+
+def _position(value: int) -> bytes:
+    if not 0 <= value <= MAX_POSITION:
+        raise ValueError(f"position {value}ms cannot be stored in Serato Markers_")
+    return value.to_bytes(3, "big")
+
+
+def _color(value: str, slot: int) -> SeratoColor:
+    # raised rather than replaced with another color, so reading a tag and writing it back never changes it
+    try:
+        return SeratoColor(value)
+    except ValueError:
+        raise ValueError(f"Serato Markers_ cue {slot} has the color {value}, which is not a Serato color") from None
 
 
 class V1Mp3Encoder(BaseEncoder):
+    """
+    Reads and writes the legacy Serato Markers_ tag, still read by older Serato versions and some hardware.
+    Markers_ has fixed slots for 5 cues and 9 loops and no names, so cue names are not written and are read as ''.
+    The positions and colors of all the entries are encoded and decoded together in one pass over a single buffer.
+    """
+
     STRUCT_LENGTH = 0x16
 
     @property
@@ -16,3 +66,119 @@ class V1Mp3Encoder(BaseEncoder):
     @property
     def markers_name(self) -> str:
         return "Serato Markers_"
+
+    def write(self, track: Track):
+        with TagTransaction(track.path) as transaction:
+            self.stage(track, transaction)
+
+    def encode(self, track: Track) -> bytes:
+        return self._encode(track)
+
+    def read_cues(self, track: Track) -> List[HotCue]:
+        # raises KeyError if the file has no Serato Markers_ tag
+        data = read_serato_tags(track.path, [self.tag_name])[self.tag_name]
+        return list(self._decode(data))
+
+    def read(self, track: Track) -> Track:
+        """Reads the cues, loops and track color of the track's file in to the track."""
+        self.decode_into(track, read_serato_tags(track.path, [self.tag_name])[self.tag_name])
+        return track
+
+    def decode_into(self, track: Track, data: bytes) -> None:
+        hot_cues: list[HotCue] = []
+        cue_loops: list[HotCue] = []
+        for cue in self._decode(data):
+            (hot_cues if cue.type is HotCueType.CUE else cue_loops).append(cue)
+        # empty lists are left unallocated, see Track
+        track.hot_cues = hot_cues or None
+        track.cue_loops = cue_loops or None
+        track.color = self._decode_track_color(data)
+
+    def _decode(self, data: bytes) -> Iterator[HotCue]:
+        version_major, version_minor, count = _HEADER.unpack_from(data)
+        assert bytes((version_major, version_minor)) == self.tag_version
+        entries = [_ENTRY_STRUCT.unpack_from(data, _HEADER.size + i * _ENTRY_STRUCT.size) for i in range(count)]
+        plain = decode_buffer(b"".join(start + end + color for _, start, _, end, _, color, _, _ in entries))
+
+        for slot, (start_set, _, end_set, _, _, _, entry_type, locked) in enumerate(entries):
+            if start_set != _SET or entry_type == _TYPE_INVALID:
+                continue
+            offset = slot * _GROUPS_PER_ENTRY * 3
+            start = int.from_bytes(plain[offset: offset + 3], "big")
+            if entry_type == _TYPE_CUE:
+                yield HotCue(
+                    name="",
+                    type=HotCueType.CUE,
+                    start=start,
+                    index=slot,
+                    color=_color(plain[offset + 6: offset + 9].hex().upper(), slot),
+                )
+            elif entry_type == _TYPE_LOOP:
+                end = int.from_bytes(plain[offset + 3: offset + 6], "big") if end_set == _SET else None
+                yield HotCue(
+                    name="",
+                    type=HotCueType.LOOP,
+                    start=start,
+                    end=end,
+                    index=slot - CUE_SLOTS,
+                    is_locked=bool(locked),
+                )
+
+    def _decode_track_color(self, data: bytes) -> str:
+        (_, _, count) = _HEADER.unpack_from(data)
+        offset = _HEADER.size + count * _ENTRY_STRUCT.size
+        return decode_buffer(data[offset: offset + 4]).hex().upper()
+
+    def _encode(self, track: Track) -> bytes:
+        slots = self._slots(track.get_hot_cues(), CUE_SLOTS) + self._slots(track.get_cue_loops(), LOOP_SLOTS)
+
+        plain = bytearray()
+        for cue in slots:
+            if cue is None:
+                plain += bytes(_GROUPS_PER_ENTRY * 3)
+            elif cue.type is HotCueType.CUE:
+                plain += _position(cue.start or 0) + bytes(3) + bytes.fromhex(cue.color.value)
+            else:
+                plain += _position(cue.start or 0) + _position(cue.end or 0) + bytes(3)
+        plain += bytes.fromhex(track.color or DEFAULT_TRACK_COLOR)
+        encoded = encode_buffer(plain)
+
+        payload = bytearray(_HEADER.pack(*self.tag_version, len(slots)))
+        for slot, cue in enumerate(slots):
+            offset = slot * _GROUPS_PER_ENTRY * 4
+            start = encoded[offset: offset + 4]
+            end = encoded[offset + 4: offset + 8]
+            color = encoded[offset + 8: offset + 12]
+            if cue is None:
+                payload += _ENTRY_STRUCT.pack(
+                    _UNSET,
+                    _UNSET_POSITION,
+                    _UNSET,
+                    _UNSET_POSITION,
+                    _UNKNOWN_FIELD,
+                    color,
+                    _TYPE_INVALID if slot < CUE_SLOTS else _TYPE_LOOP,
+                    0,
+                )
+            elif cue.type is HotCueType.CUE:
+                payload += _ENTRY_STRUCT.pack(
+                    _SET, start, _UNSET, _UNSET_POSITION, _UNKNOWN_FIELD, color, _TYPE_CUE, 0
+                )
+            else:
+                payload += _ENTRY_STRUCT.pack(
+                    _SET, start, _SET, end, _UNKNOWN_FIELD, color, _TYPE_LOOP, bool(cue.is_locked)
+                )
+        payload += encoded[-4:]
+        return bytes(payload)
+
+    @staticmethod
+    def _slots(cues: Sequence[HotCue], slot_count: int) -> list[Optional[HotCue]]:
+        slots: list[Optional[HotCue]] = [None] * slot_count
+        for cue in cues:
+            if not 0 <= cue.index < slot_count:
+                raise ValueError(f"Serato Markers_ only has {slot_count} {cue.type.name} slots, cannot write index "
+                                 f"{cue.index}")
+            if slots[cue.index] is not None:
+                raise ValueError(f"more than one {cue.type.name} with index {cue.index}")
+            slots[cue.index] = cue
+        return slots
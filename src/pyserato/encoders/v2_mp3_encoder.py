@@ -3,16 +3,16 @@ import struct
 from io import BytesIO
 from typing import List, Iterator
 
-from mutagen.mp3 import MP3
-from mutagen import id3
-
 from pyserato.encoders.base_encoder import BaseEncoder
-from pyserato.encoders.serato_tags import SERATO_MARKERS_V2
-from pyserato.model.hot_cue import HotCue
+from pyserato.encoders.serato_tags import SERATO_MARKERS_V2, read_serato_tags, TagTransaction
+from pyserato.model.hot_cue import HotCue, encode_element
 from pyserato.model.hot_cue_type import HotCueType
 from pyserato.model.track import Track
 from pyserato.util import split_string
 
+_VERSION = struct.Struct("BB")
+_LENGTH = struct.Struct(">I")
+
 
 class V2Mp3Encoder(BaseEncoder):
 
@@ -33,46 +33,79 @@ class V2Mp3Encoder(BaseEncoder):
         return "Serato Markers2"
 
     def write(self, track: Track):
-        tagged_file = self._write(track, self._encode(track))
-        tagged_file.save()
+        with TagTransaction(track.path) as transaction:
+            self.stage(track, transaction)
+
+    def encode(self, track: Track) -> bytes:
+        return self._encode(track)
 
     def read_cues(self, track: Track) -> List[HotCue]:
-        tags = MP3(track.path)
-        tag_data = tags[self.tag_name]
-        data = tag_data.data
+        # only the tag is read, not the audio. Raises KeyError if the file has no Serato Markers2 tag
+        data = read_serato_tags(track.path, [self.tag_name])[self.tag_name]
         return list(self._decode(data))
 
-    def _decode(self, data: bytes) -> Iterator[HotCue]:
-        fp = BytesIO(data)
-        assert struct.unpack(self.fmt_version, fp.read(2)) == (0x01, 0x01)
-        payload = fp.read()
-        data = b"".join(self._remove_null_padding(payload).split(b"\n"))
-        data = self._pad_encoded_data(data)
-        decoded = base64.b64decode(data)
-
-        fp = BytesIO(decoded)
-        assert struct.unpack(self.fmt_version, fp.read(2)) == (0x01, 0x01)
-
-        while True:
-            entry_name = self._get_entry_name(fp)  # NULL byte between name and length is already omitted
-            if len(entry_name) == 0:
-                break  # End of data
-
-            struct_length = struct.unpack(">I", fp.read(4))[0]
-            assert struct_length > 0  # normally this should not happen
-            entry_data = fp.read(struct_length)
-
+    def read(self, track: Track) -> Track:
+        """
+        Reads every Serato Markers2 entry of the track's file in to the track: cues, loops, the track color and
+        BPM lock. Entries that are not understood are kept in Track.unknown_markers so they are written back as they
+        were.
+        """
+        self.decode_into(track, read_serato_tags(track.path, [self.tag_name])[self.tag_name])
+        return track
+
+    def decode_into(self, track: Track, data: bytes) -> None:
+        hot_cues: list[HotCue] = []
+        cue_loops: list[HotCue] = []
+        unknown_markers: list[tuple[str, bytes]] = []
+        for entry_name, entry_data in self._decode_entries(data):
             match entry_name:
                 case "COLOR":
-                    # not yet implemented
-                    continue
+                    # NULL separator then RGB
+                    track.color = bytes(entry_data[1:4]).hex().upper()
+                case "CUE":
+                    hot_cues.append(HotCue.from_bytes(entry_data, hotcue_type=HotCueType.CUE))
+                case "LOOP":
+                    cue_loops.append(HotCue.from_bytes(entry_data, hotcue_type=HotCueType.LOOP))
+                case "BPMLOCK":
+                    track.bpm_locked = bool(entry_data[0])
+                case _:
+                    unknown_markers.append((entry_name, bytes(entry_data)))
+        # empty lists are left unallocated, see Track
+        track.hot_cues = hot_cues or None
+        track.cue_loops = cue_loops or None
+        track.unknown_markers = unknown_markers or None
+
+    def _decode(self, data: bytes) -> Iterator[HotCue]:
+        for entry_name, entry_data in self._decode_entries(data):
+            match entry_name:
                 case "CUE":
                     yield HotCue.from_bytes(entry_data, hotcue_type=HotCueType.CUE)
                 case "LOOP":
                     yield HotCue.from_bytes(entry_data, hotcue_type=HotCueType.LOOP)
-                case "BPMLOCK":
-                    # not yet implemented
-                    continue
+
+    def _decode_entries(self, data: bytes) -> Iterator[tuple[str, memoryview]]:
+        """
+        Yields the name and data of each entry in the tag. The entry data are memoryview slices of the decoded
+        payload and the entry boundaries are found with bytes.find, so no per entry buffers are created.
+        """
+        assert _VERSION.unpack_from(data) == (0x01, 0x01)
+        payload = self._remove_null_padding(data[2:])
+        decoded = base64.b64decode(self._pad_encoded_data(payload.replace(b"\n", b"")))
+        assert _VERSION.unpack_from(decoded) == (0x01, 0x01)
+
+        view = memoryview(decoded)
+        offset = 2
+        end = len(decoded)
+        while offset < end:
+            name_end = decoded.find(b"\x00", offset)
+            if name_end <= offset:
+                break  # End of data
+            entry_name = decoded[offset:name_end].decode("utf-8")
+            (struct_length,) = _LENGTH.unpack_from(decoded, name_end + 1)
+            assert struct_length > 0  # normally this should not happen
+            offset = name_end + 1 + _LENGTH.size
+            yield entry_name, view[offset: offset + struct_length]
+            offset += struct_length
 
     def _get_entry_count(self, buffer: BytesIO):
         return struct.unpack(">I", buffer.read(4))[0]
@@ -81,17 +114,8 @@ class V2Mp3Encoder(BaseEncoder):
         """
         Used when reading the data from the tags
         """
-        return payload[: payload.index(b"\x00")]
-
-    def _get_entry_name(self, fp) -> str:
-        entry_name = b""
-        for x in iter(lambda: fp.read(1), b""):
-            if x == b"\00":
-                return entry_name.decode("utf-8")
-
-            entry_name += x
-
-        return ""
+        end = payload.find(b"\x00")
+        return payload[:end] if end >= 0 else payload
 
     def _pad_encoded_data(self, data: bytes) -> bytes:
         """
@@ -101,24 +125,19 @@ class V2Mp3Encoder(BaseEncoder):
 
         return data + padding
 
-    def _write(self, track: Track, payload: bytes) -> MP3:
-        mutagen_file = MP3(track.path)
-        mutagen_file[self.tag_name] = id3.GEOB(
-            encoding=0,
-            mime="application/octet-stream",
-            desc=self.markers_name,
-            data=payload,
-        )
-
-        return mutagen_file
-
     def _encode(self, track: Track) -> bytes:
-        payload = b""
-        for cue in track.hot_cues:
+        payload = bytearray()
+        if track.color is not None:
+            payload += encode_element("COLOR", b"\x00" + bytes.fromhex(track.color))
+        for cue in track.get_hot_cues():
             payload += cue.to_v2_bytes()
-        for loop in track.cue_loops:
+        for loop in track.get_cue_loops():
             payload += loop.to_v2_bytes()
-        return self._pad(payload)
+        for entry_name, entry_data in track.get_unknown_markers():
+            payload += encode_element(entry_name, entry_data)
+        if track.bpm_locked is not None:
+            payload += encode_element("BPMLOCK", bytes([track.bpm_locked]))
+        return self._pad(bytes(payload))
 
     def _pad(self, payload: bytes, entries_count: int | None = None):
         """
@@ -0,0 +1,142 @@
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pyserato._crate_steps import read_crate_paths
+from pyserato.crate_reader import is_crate_file
+
+CRATE_SEPARATOR = "%%"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crates (
+    crate_path TEXT PRIMARY KEY,
+    parent_path TEXT,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS crates_parent ON crates(parent_path);
+CREATE TABLE IF NOT EXISTS memberships (
+    crate_path TEXT NOT NULL,
+    track_path TEXT NOT NULL,
+    PRIMARY KEY (crate_path, track_path)
+);
+CREATE INDEX IF NOT EXISTS memberships_track ON memberships(track_path);
+"""
+
+
+@dataclass
+class IndexRefreshReport:
+    """
+    Summary of a LibraryIndex.refresh, listing crate paths.
+    added: crate files that were not in the index.
+    updated: crate files whose size or mtime changed so were parsed again.
+    removed: crate files that no longer exist.
+    unchanged: crate files that were not parsed.
+    """
+
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+
+class LibraryIndex:
+    """
+    A persistent index of the crates in a SubCrates folder and the tracks in them, stored in SQLite.
+    Crates are identified by their crate path: the names of the crate and its ancestors joined by '%%', as in the
+    crate file names, e.g. 'root%%child'.
+    Once refreshed, queries are answered from the index alone without reading the SubCrates folder.
+    Use one index per SubCrates folder.
+    """
+
+    def __init__(self, db_path: Path | str = ":memory:"):
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "LibraryIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self, subcrate_path: Path) -> IndexRefreshReport:
+        """
+        Brings the index up to date with subcrate_path, only parsing the crate files whose size or mtime changed
+        since the last refresh.
+        """
+        report = IndexRefreshReport()
+        indexed = {
+            crate_path: (size, mtime_ns)
+            for crate_path, size, mtime_ns in self._conn.execute("SELECT crate_path, size, mtime_ns FROM crates")
+        }
+        with self._conn:
+            for filepath in sorted(subcrate_path.iterdir()):
+                if not is_crate_file(filepath):
+                    continue
+                stat = filepath.stat()
+                crate_path = filepath.name[: -len(".crate")]
+                previous = indexed.pop(crate_path, None)
+                if previous == (stat.st_size, stat.st_mtime_ns):
+                    report.unchanged.append(crate_path)
+                    continue
+                (report.added if previous is None else report.updated).append(crate_path)
+                crate_names, track_paths = read_crate_paths(filepath)
+                parent_path = CRATE_SEPARATOR.join(crate_names[:-1]) or None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO crates VALUES (?, ?, ?, ?, ?)",
+                    (crate_path, parent_path, crate_names[-1], stat.st_size, stat.st_mtime_ns),
+                )
+                self._conn.execute("DELETE FROM memberships WHERE crate_path = ?", (crate_path,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO memberships VALUES (?, ?)",
+                    ((crate_path, track_path) for track_path in track_paths),
+                )
+            for crate_path in sorted(indexed):
+                self._conn.execute("DELETE FROM crates WHERE crate_path = ?", (crate_path,))
+                self._conn.execute("DELETE FROM memberships WHERE crate_path = ?", (crate_path,))
+                report.removed.append(crate_path)
+        return report
+
+    def crates(self) -> list[str]:
+        """All the indexed crate paths."""
+        return [row[0] for row in self._conn.execute("SELECT crate_path FROM crates ORDER BY crate_path")]
+
+    def children(self, crate_path: str) -> list[str]:
+        """The crate paths of the direct children of crate_path."""
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT crate_path FROM crates WHERE parent_path = ? ORDER BY crate_path", (crate_path,)
+            )
+        ]
+
+    def tracks(self, crate_path: str, recursive: bool = False) -> list[Path]:
+        """
+        The tracks in crate_path.
+        :param recursive: also include the tracks in all of the crate's descendants.
+        """
+        if recursive:
+            prefix = crate_path + CRATE_SEPARATOR
+            rows = self._conn.execute(
+                "SELECT DISTINCT track_path FROM memberships WHERE crate_path = ? OR substr(crate_path, 1, ?) = ? "
+                "ORDER BY track_path",
+                (crate_path, len(prefix), prefix),
+            )
+        else:
+            rows = self._conn.execute(
+                "SELECT track_path FROM memberships WHERE crate_path = ? ORDER BY track_path", (crate_path,)
+            )
+        return [Path(row[0]) for row in rows]
+
+    def crates_containing(self, track_path: Path | str) -> list[str]:
+        """The crate paths of every crate that track_path is in."""
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT crate_path FROM memberships WHERE track_path = ? ORDER BY crate_path", (str(track_path),)
+            )
+        ]
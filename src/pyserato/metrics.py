@@ -0,0 +1,156 @@
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+# the phases reported, a whole call is reported once with the number of files it covered
+PARSE = "parse"  # Builder.parse_crates_from_root_path
+SAVE = "save"  # Builder.save
+WRITE_TAGS = "write_tags"  # all the tag writes of a Builder.save
+# and each file, or crate, within a call
+READ_CRATE = "read_crate"  # reading and splitting one crate file
+RESOLVE = "resolve"  # resolving the track paths of one crate, see Builder.save
+SERIALIZE = "serialize"  # serializing one crate
+WRITE_CRATE = "write_crate"  # writing one crate file to disk, serializing included when streamed
+TAG_WRITE = "tag_write"  # one encoder.write call
+TAG_LOAD = "tag_load"  # loading the ID3 tag of one file in TagTransaction.commit
+TAG_SAVE = "tag_save"  # saving the ID3 tag of one file in TagTransaction.commit
+
+
+class Observer:
+    """
+    Receives timings from Builder, the encoders and TagTransaction while it is installed with set_observer or
+    observe. The methods are called from whichever thread does the work, so implementations must be thread safe.
+    Work done in other processes, e.g. parsing on a ProcessPoolExecutor, is not reported.
+    """
+
+    def on_phase(self, phase: str, seconds: float, files: int = 0, nbytes: int = 0) -> None:
+        """A whole call, e.g. a Builder.save, took seconds and covered files files of nbytes bytes."""
+
+    def on_file(self, phase: str, seconds: float, path: Optional[Path] = None, nbytes: int = 0) -> None:
+        """
+        One file, or one crate, took seconds.
+        :param path: the file, None for work on a crate that is not tied to a file such as RESOLVE and SERIALIZE.
+        :param nbytes: the bytes read or written, 0 if not known.
+        """
+
+
+# None unless an observer is installed, so the instrumented code only checks for None when metrics are disabled
+_observer: Optional[Observer] = None
+
+
+def get_observer() -> Optional[Observer]:
+    return _observer
+
+
+def set_observer(observer: Optional[Observer]) -> Optional[Observer]:
+    """
+    Installs observer for the whole process, None to disable metrics.
+    :return: the observer that was installed before.
+    """
+    global _observer
+    previous, _observer = _observer, observer
+    return previous
+
+
+@contextmanager
+def observe(observer: Optional[Observer] = None) -> Iterator[Observer]:
+    """
+    Installs observer, a new MetricsCollector by default, for the duration of the block:
+
+        with observe() as collector:
+            builder.save(root)
+        collector.print_summary()
+    """
+    installed = observer if observer is not None else MetricsCollector()
+    previous = set_observer(installed)
+    try:
+        yield installed
+    finally:
+        set_observer(previous)
+
+
+@dataclass
+class PhaseStats:
+    """
+    The totals of one phase.
+    calls: the number of times it was reported.
+    files: the files it covered, one per call for per file phases.
+    latencies: the duration of each call, in the order they were reported.
+    slowest: the paths of the slowest files and their durations, slowest first.
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+    files: int = 0
+    nbytes: int = 0
+    latencies: list[float] = field(default_factory=list)
+    slowest: list[tuple[float, Path]] = field(default_factory=list)
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class MetricsCollector(Observer):
+    """Totals the timings, bytes and files of every phase and prints a summary of them."""
+
+    def __init__(self, keep_slowest: int = 5):
+        """:param keep_slowest: the number of slowest files to keep for each phase."""
+        self.phases: dict[str, PhaseStats] = {}
+        self._keep_slowest = keep_slowest
+        self._lock = threading.Lock()
+
+    def _stats(self, phase: str) -> PhaseStats:
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        return stats
+
+    def on_phase(self, phase: str, seconds: float, files: int = 0, nbytes: int = 0) -> None:
+        with self._lock:
+            stats = self._stats(phase)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.files += files
+            stats.nbytes += nbytes
+            stats.latencies.append(seconds)
+
+    def on_file(self, phase: str, seconds: float, path: Optional[Path] = None, nbytes: int = 0) -> None:
+        with self._lock:
+            stats = self._stats(phase)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.files += 1
+            stats.nbytes += nbytes
+            stats.latencies.append(seconds)
+            if path is not None and self._keep_slowest:
+                stats.slowest.append((seconds, path))
+                if len(stats.slowest) > self._keep_slowest:
+                    stats.slowest.sort(key=lambda slow: slow[0], reverse=True)
+                    stats.slowest.pop()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.phases.clear()
+
+    def summary(self) -> str:
+        lines = [f"{'phase':<12} {'calls':>7} {'files':>7} {'total':>9} {'p50':>9} {'p95':>9} {'max':>9} {'bytes':>12}"]
+        with self._lock:
+            for phase, stats in self.phases.items():
+                lines.append(
+                    f"{phase:<12} {stats.calls:>7} {stats.files:>7} {stats.seconds:>8.3f}s"
+                    f" {stats.percentile(50) * 1000:>7.2f}ms {stats.percentile(95) * 1000:>7.2f}ms"
+                    f" {max(stats.latencies) * 1000:>7.2f}ms {stats.nbytes:>12}"
+                )
+            for phase, stats in self.phases.items():
+                for seconds, path in sorted(stats.slowest, key=lambda slow: slow[0], reverse=True):
+                    lines.append(f"slowest {phase}: {seconds * 1000:.2f}ms {path}")
+        return "\n".join(lines)
+
+    def print_summary(self, file: Optional[TextIO] = None) -> None:
+        print(self.summary(), file=file or sys.stdout)
@@ -1,31 +1,372 @@
-from typing import Optional
+import hashlib
+import weakref
+from array import array
+from collections.abc import Set
+from pathlib import Path
+from typing import AbstractSet, Iterable, Iterator, Mapping, Optional
 from typing_extensions import Self
 
-from pyserato.model.track import Track
+from pyserato.crate_reader import stream_track_paths
+from pyserato.model.track import Track, TrackRegistry
+from pyserato.model.track_table import TrackTable
 from pyserato.util import sanitize_filename, DuplicateTrackError
 
 
+DIGEST_SIZE = 16
+
+
+class _ChildMap(dict):
+    """
+    The children of a crate by name. Adding, replacing or removing a child invalidates the digest of the crate and
+    its ancestors.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "Crate", children: Optional[Mapping[str, "Crate"]] = None):
+        super().__init__()
+        # a weak reference so the crate and its children map do not form a cycle
+        self._owner = weakref.ref(owner)
+        if children:
+            self.update(children)
+
+    def _changed(self) -> None:
+        owner = self._owner()
+        if owner is not None:
+            owner._invalidate()
+
+    def _detach(self, crate: "Crate") -> None:
+        owner = self._owner()
+        if owner is not None:
+            crate._remove_parent(owner)
+
+    def __setitem__(self, name: str, crate: "Crate") -> None:
+        previous = self.get(name)
+        if previous is crate:
+            return
+        if previous is not None:
+            self._detach(previous)
+        super().__setitem__(name, crate)
+        owner = self._owner()
+        if owner is not None:
+            crate._add_parent(owner)
+        self._changed()
+
+    def __delitem__(self, name: str) -> None:
+        crate = self[name]
+        super().__delitem__(name)
+        self._detach(crate)
+        self._changed()
+
+    def pop(self, name, *default):
+        if name not in self:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        crate = self[name]
+        del self[name]
+        return crate
+
+    def popitem(self):
+        name, crate = super().popitem()
+        self._detach(crate)
+        self._changed()
+        return name, crate
+
+    def clear(self) -> None:
+        for crate in list(self.values()):
+            self._detach(crate)
+        super().clear()
+        self._changed()
+
+    def update(self, *args, **kwargs) -> None:
+        for name, crate in dict(*args, **kwargs).items():
+            self[name] = crate
+
+    def setdefault(self, name, default=None):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def __ior__(self, other):  # type: ignore[misc]
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        # pickled as a plain dict, the crate wraps it again when it is unpickled
+        return dict, (dict(self),)
+
+
+class _TrackSet(Set[Track]):
+    """
+    A read-only view of the tracks of a crate, see Crate.tracks. Tracks are added and removed through the crate so
+    its digest stays current. Set operations return a plain set.
+    """
+
+    __slots__ = ("_tracks",)
+
+    def __init__(self, tracks: set[Track]):
+        self._tracks = tracks
+
+    @classmethod
+    def _from_iterable(cls, tracks: Iterable[Track]) -> set[Track]:  # type: ignore[override]
+        return set(tracks)
+
+    def __contains__(self, track: object) -> bool:
+        return track in self._tracks
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(self._tracks)
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._tracks!r})"
+
+
 class Crate:
+    """
+    A crate and its children. Each crate caches a digest of its name, its tracks and the digests of its children, so
+    two trees are compared in constant time at the root and only the subtrees whose digests differ need to be walked,
+    see diff. The digest is invalidated by add_track, remove_track and by changes to children, for the crate and all
+    its ancestors. tracks is a read-only view, so the tracks cannot change without the digest being invalidated.
+    The children passed in are copied in to the crate's own map, so changes to the dict passed in are not seen by
+    the crate. Change crate.children instead.
+    """
+
+    __slots__ = (
+        "_children",
+        "name",
+        "_tracks",
+        "_track_ids",
+        "_table",
+        "_source",
+        "_pending_count",
+        "_pending_set",
+        "_registry",
+        "_digest",
+        "_tracks_digest",
+        "_parents",
+        "__weakref__",
+    )
+
     def __init__(self, name: str, children: Optional[dict[str, Self]] = None):
-        self._children = children if children else {}
         self.name = sanitize_filename(name)
         self._tracks: set[Track] = set()
+        # ids of rows in a TrackTable that have not yet been turned in to Tracks
+        self._track_ids: Optional[array] = None
+        self._table: Optional[TrackTable] = None
+        # a crate file whose tracks have not been read yet, see add_tracks_from_file
+        self._source: Optional[Path] = None
+        # the number of distinct tracks added by id or in the unread crate file, counted once when first needed
+        self._pending_count: Optional[int] = None
+        # the distinct paths added by id or in the unread crate file, kept once add_track has needed them
+        self._pending_set: Optional[set[str]] = None
+        self._registry: Optional[TrackRegistry] = None
+        self._digest: Optional[bytes] = None
+        self._tracks_digest: Optional[bytes] = None
+        # weak references to the crates this crate is a child of, to invalidate their digests
+        self._parents: list[weakref.ref] = []
+        self._children = _ChildMap(self, children)
 
     @property
     def children(self) -> dict[str, Self]:
         return self._children
 
     @property
-    def tracks(self) -> set[Track]:
-        return self._tracks
+    def tracks(self) -> AbstractSet[Track]:
+        """A read-only view of the tracks in the crate, use add_track and remove_track to change them."""
+        if self._source is not None:
+            self._load_source()
+        if self._track_ids:
+            self._materialize_tracks()
+        return _TrackSet(self._tracks)
+
+    @property
+    def track_count(self) -> int:
+        """
+        The number of tracks in the crate, without creating Tracks for any rows added by id or for the tracks of a
+        crate file that has not been read yet. A track that is added more than once is counted once.
+        """
+        if self._track_ids is None and self._source is None:
+            return len(self._tracks)
+        if self._pending_count is None:
+            existing = {str(track.path) for track in self._tracks}
+            pending = self._pending_set if self._pending_set is not None else set(self._pending_paths())
+            self._pending_count = len(pending - existing)
+        return len(self._tracks) + self._pending_count
 
     def add_track(self, track: Track) -> None:
         """
         Adds a unique Track to the Crate
         """
-        if track in self._tracks:
+        # checked against the pending paths so adding a track does not read the crate file or create Tracks
+        if track in self._tracks or self._is_pending(track):
             raise DuplicateTrackError(f"track {track} is already in the crate {self.name}")
         self._tracks.add(track)
+        self._invalidate(tracks=True)
+
+    def remove_track(self, track: Track) -> None:
+        """
+        Removes a Track from the Crate. Raises KeyError if it is not in the crate.
+        """
+        # reading tracks first turns any pending ids or crate file in to Tracks
+        if track not in self.tracks:
+            raise KeyError(track)
+        self._tracks.remove(track)
+        self._invalidate(tracks=True)
+
+    def add_track_id(self, track_id: int, table: TrackTable) -> None:
+        """
+        Adds a row of a TrackTable to the Crate without creating a Track for it. The Track is created when tracks is
+        first accessed, which is also when duplicates are detected. All the ids in a crate must be from one table.
+        """
+        if self._table is None:
+            self._table = table
+        elif self._table is not table:
+            raise ValueError(f"crate {self.name} already holds ids from a different track table")
+        if self._track_ids is None:
+            self._track_ids = array("L")
+        self._track_ids.append(track_id)
+        self._pending_set = None
+        self._invalidate(tracks=True)
+
+    def add_tracks_from_file(self, filepath: Path, registry: Optional[TrackRegistry] = None) -> None:
+        """
+        Adds the tracks of a crate file without reading it. The file is read, and its Tracks created, when tracks is
+        first accessed, which is also when duplicates are detected.
+        :param registry: the registry the tracks are interned in when they are read.
+        """
+        if self._source is not None:
+            raise ValueError(f"crate {self.name} already has tracks to read from {self._source}")
+        self._source = filepath
+        self._registry = registry
+        self._pending_set = None
+        self._invalidate(tracks=True)
+
+    def _iter_source_paths(self) -> Iterator[str]:
+        assert self._source is not None
+        with self._source.open("rb") as fp:
+            yield from stream_track_paths(fp)
+
+    def _load_source(self) -> None:
+        paths = list(self._iter_source_paths())
+        # paths read back from a crate file are already absolute
+        tracks = set(self._tracks)
+        for track in Track.from_paths(paths, trust_paths=True, registry=self._registry):
+            if track in tracks:
+                raise DuplicateTrackError(f"track {track} is already in the crate {self.name}")
+            tracks.add(track)
+        # only swapped in once every track is read, so a duplicate leaves the crate as it was
+        # the same paths as the file, so the digest does not change
+        self._tracks = tracks
+        self._source = self._registry = None
+        self._pending_set = None
+
+    def _materialize_tracks(self) -> None:
+        assert self._table is not None and self._track_ids is not None
+        tracks = set(self._tracks)
+        for track_id in self._track_ids:
+            track = self._table.track(track_id)
+            if track in tracks:
+                raise DuplicateTrackError(f"track {track} is already in the crate {self.name}")
+            tracks.add(track)
+        # only swapped in once every id is checked, so a duplicate leaves the crate as it was
+        # the same paths as the ids, so the digest does not change
+        self._tracks = tracks
+        self._track_ids = None
+        self._pending_set = None
+
+    def _pending_paths(self) -> Iterator[str]:
+        """The paths of the tracks added by id and in the unread crate file, for which no Track exists yet."""
+        if self._track_ids:
+            assert self._table is not None
+            for track_id in self._track_ids:
+                yield str(self._table.path(track_id))
+        if self._source is not None:
+            yield from self._iter_source_paths()
+
+    def _is_pending(self, track: Track) -> bool:
+        """Whether track is one of the tracks added by id or in the unread crate file."""
+        if not self._track_ids and self._source is None:
+            return False
+        if self._pending_set is None:
+            self._pending_set = set(self._pending_paths())
+        return str(track.path) in self._pending_set
+
+    def _track_paths(self) -> list[str]:
+        paths = [str(track.path) for track in self._tracks]
+        paths.extend(self._pending_paths())
+        return paths
+
+    def _add_parent(self, parent: "Crate") -> None:
+        if not any(ref() is parent for ref in self._parents):
+            self._parents.append(weakref.ref(parent))
+
+    def _remove_parent(self, parent: "Crate") -> None:
+        self._parents = [ref for ref in self._parents if ref() is not parent and ref() is not None]
+
+    def _invalidate(self, tracks: bool = False) -> None:
+        if tracks:
+            self._tracks_digest = None
+            self._pending_count = None
+        if self._digest is None:
+            # the digest of an ancestor is only ever cached along with the digests below it, so they are already stale
+            return
+        self._digest = None
+        for ref in self._parents:
+            parent = ref()
+            if parent is not None:
+                parent._invalidate()
+
+    @property
+    def tracks_digest(self) -> bytes:
+        """A digest of the paths of the crate's own tracks, in any order."""
+        if self._tracks_digest is None:
+            hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            for path in sorted(self._track_paths()):
+                hasher.update(path.encode("utf-8", "surrogatepass"))
+                hasher.update(b"\x00")
+            self._tracks_digest = hasher.digest()
+        return self._tracks_digest
+
+    @property
+    def digest(self) -> bytes:
+        """
+        A digest of the crate's name, its tracks and, recursively, its children. Cached until the crate or one of its
+        descendants changes.
+        """
+        if self._digest is None:
+            hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            hasher.update(self.name.encode("utf-8", "surrogatepass"))
+            hasher.update(b"\x00")
+            hasher.update(self.tracks_digest)
+            for name in sorted(self._children):
+                hasher.update(self._children[name].digest)
+            self._digest = hasher.digest()
+        return self._digest
+
+    def diff(self, other: "Crate") -> Iterator[str]:
+        """
+        Yields the crate path, the names from this crate down joined by '%%', of every crate that differs between the
+        two trees: crates whose tracks differ and crates only in one of them. Only subtrees whose digests differ are
+        walked.
+        """
+        stack = [(self, other, self.name)]
+        while stack:
+            crate, other_crate, path = stack.pop()
+            if crate.digest == other_crate.digest:
+                continue
+            if crate.name != other_crate.name or crate.tracks_digest != other_crate.tracks_digest:
+                yield path
+            for name in sorted(crate.children.keys() | other_crate.children.keys(), reverse=True):
+                child = crate.children.get(name)
+                other_child = other_crate.children.get(name)
+                if child is None or other_child is None:
+                    yield from _iter_paths(child or other_child, f"{path}%%{name}")  # type: ignore[arg-type]
+                else:
+                    stack.append((child, other_child, f"{path}%%{name}"))
 
     def __str__(self):
         return f"Crate<{self.name}>"
@@ -34,12 +375,28 @@ class Crate:
         return f"Crate<{self.name}>"
 
     def __eq__(self, other):
-        "comparison for two root crates"
-        if self.name != other.name:
-            return False
-        if self.children.keys() != other.children.keys():
-            return False
-        for child_name in self.children:
-            if self.children[child_name] != other.children[child_name]:
-                return False
-        return True
+        "comparison for two root crates, by name, tracks and children"
+        if not isinstance(other, Crate):
+            return NotImplemented
+        return self.digest == other.digest
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __getstate__(self):
+        # a registry holds a lock so cannot be pickled, the tracks of an unread crate file are read without one
+        return self.name, dict(self._children), self._tracks, self._track_ids, self._table, self._source
+
+    def __setstate__(self, state):
+        name, children, tracks, track_ids, table, source = state
+        self.__init__(name, children)
+        self._tracks = tracks
+        self._track_ids = track_ids
+        self._table = table
+        self._source = source
+
+
+def _iter_paths(crate: Crate, path: str) -> Iterator[str]:
+    """Yields the crate path of crate and of each of its descendants."""
+    yield path
+    for name, child in crate.children.items():
+        yield from _iter_paths(child, f"{path}%%{name}")
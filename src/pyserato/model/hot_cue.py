@@ -1,6 +1,5 @@
 import struct
 from dataclasses import dataclass
-from io import BytesIO
 from typing import Optional
 
 from pyserato.model.serato_color import SeratoColor
@@ -26,7 +25,19 @@ def encode_element(name: str, data: bytes) -> bytearray:
     return concat_bytearrays([name_bytes, bytearray(length_bytes), bytearray(data)])
 
 
-@dataclass
+# INDEX, POSITION START, POSITION END, COLOR, NULL, LOCKED
+_CUE_STRUCT = struct.Struct(">BIB3sB?")
+# INDEX, POSITION START, POSITION END
+_LOOP_STRUCT = struct.Struct(">BII")
+
+
+def _read_name(data: bytes | memoryview, offset: int) -> str:
+    """Read a null-terminated UTF-8 string starting at offset."""
+    tail = bytes(data[offset:])
+    return tail.partition(b"\x00")[0].decode("utf-8")
+
+
+@dataclass(slots=True)
 class HotCue:
     name: str
     type: HotCueType
@@ -126,45 +137,37 @@ class HotCue:
         return bytes(encode_element("CUE", data))
 
     @staticmethod
-    def from_bytes(data: bytes, hotcue_type: HotCueType) -> "HotCue":
-        fp = BytesIO(data)
-        fp.seek(1)  # first byte is NULL as it's a separator
+    def from_bytes(data: bytes | memoryview, hotcue_type: HotCueType) -> "HotCue":
+        """
+        Decode the data of a CUE or LOOP entry. The fields are unpacked in place so data can be a memoryview in to
+        the whole decoded tag.
+        """
+        # first byte is NULL as it's a separator
         if hotcue_type is HotCueType.CUE:
-            result = (
-                struct.unpack(">B", fp.read(1))[0],  # INDEX
-                struct.unpack(">I", fp.read(4))[0],  # POSITION START
-                struct.unpack(">B", fp.read(1))[0],  # NULL separator (aka POSITION END)
-                None,  # aka. some field containing (4294967295, 39)
-                struct.unpack(">3s", fp.read(3))[0],  # COLOR
-                struct.unpack(">B", fp.read(1))[0],  # NULL separator
-                struct.unpack(">?", fp.read(1))[0],  # LOCKED
-                fp.read().partition(b"\x00")[0].decode("utf-8"),  # NAME + ending NULL separator
-            )
-            index, start, end, _1, color, _2, locked, name = result
-            color = SeratoColor(color.hex().upper())
-            hot_cue = HotCue(
+            (
+                index,  # INDEX
+                start,  # POSITION START
+                _end,  # NULL separator (aka POSITION END)
+                color,  # COLOR
+                _null,  # NULL separator
+                _locked,  # LOCKED
+            ) = _CUE_STRUCT.unpack_from(data, 1)
+            name = _read_name(data, _CUE_STRUCT.size + 1)  # NAME + ending NULL separator
+            return HotCue(
                 name=name,
                 type=HotCueType.CUE,
-                color=color,
+                color=SeratoColor(color.hex().upper()),
                 start=start,
                 index=index,
             )
-            return hot_cue
         elif hotcue_type is HotCueType.LOOP:
-            index = struct.unpack(">B", fp.read(1))[0]
-            start = struct.unpack(">I", fp.read(4))[0]
-            end = struct.unpack(">I", fp.read(4))[0]
-
-            # skip bytes 0x0E–0x13 (fixed flags and color placeholders)
-            fp.seek(0x0E, 0)  # move to offset 0x0E in stream
-            _ = fp.read(2)  # bytes 0x0E, 0x0F (color?)
-            _ = fp.read(2)  # bytes 0x10, 0x11 (color?)
-            _ = fp.read(1)  # byte 0x12 (padding 0)
-            is_locked = struct.unpack(">B", fp.read(1))[0]  # byte 0x13 (locked = 1)
-
+            index, start, end = _LOOP_STRUCT.unpack_from(data, 1)
+            # bytes 0x0E–0x12 are fixed flags and color placeholders
+            is_locked = data[0x13]  # byte 0x13 (locked = 1)
             # read the null-terminated name string
-            name = fp.read().partition(b"\x00")[0].decode("utf-8")
-
-            return HotCue(name=name, type=HotCueType.LOOP, start=start, end=end, index=index, is_locked=is_locked)
+            name = _read_name(data, 0x14)
+            return HotCue(
+                name=name, type=HotCueType.LOOP, start=start, end=end, index=index, is_locked=bool(is_locked)
+            )
         else:
             raise ValueError(f"unknown type {hotcue_type}")
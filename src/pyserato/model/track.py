@@ -1,7 +1,9 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import logging
-from typing import Optional
+import threading
+from typing import Iterable, Iterator, Optional, Sequence
 
 from pyserato.model.hot_cue import HotCue
 from pyserato.model.hot_cue_type import HotCueType
@@ -9,9 +11,57 @@ from pyserato.model.tempo import Tempo
 
 logger = logging.getLogger(__name__)
 
+PATH_CACHE_SIZE = 1 << 16
 
-@dataclass
+# returned by the read accessors of a Track whose list has not been allocated, shared by every track
+_EMPTY: tuple = ()
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _resolve_directory(directory: Path) -> Path:
+    return directory.resolve()
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _resolve_absolute(full_path: Path) -> Path:
+    if full_path.name in ("", ".", ".."):
+        return full_path.resolve()
+    resolved = _resolve_directory(full_path.parent) / full_path.name
+    if resolved.is_symlink():
+        return resolved.resolve()
+    return resolved
+
+
+def resolve_track_path(path: Path | str, user_root: Optional[Path] = None) -> Path:
+    """
+    Resolves a track path to an absolute path, the same as Path.resolve. Absolute paths are resolved through a
+    bounded LRU cache, and their directories are resolved once and cached separately, so tracks in the same folder
+    only cost a symlink check of the file itself.
+    Call clear_path_cache if symlinks on disk change while the process is running.
+    """
+    if isinstance(path, str):
+        path = Path(path)
+    full_path = (user_root / path if user_root else path).expanduser()
+    if not full_path.is_absolute():
+        # relative paths depend on the working directory so are never cached
+        return full_path.resolve()
+    return _resolve_absolute(full_path)
+
+
+def clear_path_cache() -> None:
+    _resolve_absolute.cache_clear()
+    _resolve_directory.cache_clear()
+
+
+@dataclass(slots=True)
 class Track:
+    """
+    A track in the library. Tracks are slotted rather than having a per-instance __dict__, since a large library
+    holds hundreds of thousands of them. The beatgrid, cue, loop and unknown marker lists are None until something
+    is added, as most tracks have none. Read them through get_beatgrid, get_hot_cues, get_cue_loops and
+    get_unknown_markers, which return an empty tuple rather than allocating a list.
+    """
+
     path: Path
     track_id: str = ""
     average_bpm: float = 0.0
@@ -20,41 +70,100 @@ class Track:
     tonality: str = ""
     total_time: float = 0.0
 
-    beatgrid: list[Tempo] = field(default_factory=list)
-    hot_cues: list[HotCue] = field(default_factory=list)
-    cue_loops: list[HotCue] = field(default_factory=list)
+    beatgrid: Optional[list[Tempo]] = None
+    hot_cues: Optional[list[HotCue]] = None
+    cue_loops: Optional[list[HotCue]] = None
+    # track color as RRGGBB hex, None if it has not been read from or set for the file
+    color: Optional[str] = None
+    bpm_locked: Optional[bool] = None
+    # Serato Markers2 entries pyserato does not understand, kept so they are written back unchanged
+    unknown_markers: Optional[list[tuple[str, bytes]]] = None
+
+    @property
+    def has_markers(self) -> bool:
+        """Whether the track has any beatgrid markers, cues or loops."""
+        return bool(self.beatgrid or self.hot_cues or self.cue_loops)
 
     @staticmethod
-    def from_path(path: Path | str, user_root: Optional[Path] = None) -> "Track":
+    def from_path(
+        path: Path | str,
+        user_root: Optional[Path] = None,
+        trust_path: bool = False,
+        registry: Optional["TrackRegistry"] = None,
+    ) -> "Track":
         """
         Adds a unique track path to the crate. Raises DuplicateTrackError if track path is already present in the Crate.
         :param track_path:
         :param user_root: Support adding an arbitrary root to the tracks.
         This is useful when run in a docker container and the path needs to refer to one on the host.
+        :param trust_path: the path is already absolute and resolved, e.g. it was read back from a crate file, so skip
+        resolving it against the filesystem.
+        :param registry: return the Track already registered for the resolved path, if any, so every crate shares it.
         :return:
         """
-        if isinstance(path, str):
-            path = Path(path)
-        full_path = user_root / path if user_root else path
         # note the path on the system may not yet exist. This is acceptable. As long as the path of the track is present
         # on the host system where the Serato crates are located at the point of opening Serato, the tracks will be
         # found.
         # assert full_path.exists(), f"path of track does not exist {full_path}"
-        resolved = full_path.expanduser().resolve()
+        if trust_path:
+            if isinstance(path, str):
+                path = Path(path)
+            resolved = user_root / path if user_root else path
+        else:
+            resolved = resolve_track_path(path, user_root)
+        if registry is not None:
+            return registry.get_or_create(resolved)
         return Track(resolved)
 
+    @staticmethod
+    def from_paths(
+        paths: Iterable[Path | str],
+        user_root: Optional[Path] = None,
+        trust_paths: bool = False,
+        registry: Optional["TrackRegistry"] = None,
+    ) -> list["Track"]:
+        """
+        Creates a Track for each path, see from_path.
+        """
+        return [
+            Track.from_path(path, user_root=user_root, trust_path=trust_paths, registry=registry) for path in paths
+        ]
+
+    def get_beatgrid(self) -> Sequence[Tempo]:
+        return self.beatgrid or _EMPTY
+
+    def get_hot_cues(self) -> Sequence[HotCue]:
+        return self.hot_cues or _EMPTY
+
+    def get_cue_loops(self) -> Sequence[HotCue]:
+        return self.cue_loops or _EMPTY
+
+    def get_unknown_markers(self) -> Sequence[tuple[str, bytes]]:
+        return self.unknown_markers or _EMPTY
+
     def add_beatgrid_marker(self, tempo: Tempo):
+        if self.beatgrid is None:
+            self.beatgrid = []
         self.beatgrid.append(tempo)
 
     def add_hot_cue(self, hot_cue: HotCue):
-        assert len(self.hot_cues) < 8, "cannot have more than 8 hot cues on a track"
-        assert len(self.cue_loops) < 4, "cannot have more than 4 loops on a track"
+        assert len(self.get_hot_cues()) < 8, "cannot have more than 8 hot cues on a track"
+        assert len(self.get_cue_loops()) < 4, "cannot have more than 4 loops on a track"
         at_index = hot_cue.index
         if hot_cue.type == HotCueType.LOOP:
+            if self.cue_loops is None:
+                self.cue_loops = []
             self.cue_loops.insert(at_index, hot_cue)
         else:
+            if self.hot_cues is None:
+                self.hot_cues = []
             self.hot_cues.insert(at_index, hot_cue)
 
+    def add_unknown_marker(self, name: str, data: bytes):
+        if self.unknown_markers is None:
+            self.unknown_markers = []
+        self.unknown_markers.append((name, data))
+
     # TODO
     # def apply_beatgrid_offsets(self, offsets: list[Offset]):
     #     try:
@@ -73,3 +182,45 @@ class Track:
 
     def __hash__(self):
         return hash(self.path)
+
+
+class TrackRegistry:
+    """
+    Interns Tracks so that each resolved path maps to exactly one shared Track object. Cues added through one crate's
+    Track are then seen by every crate the track is in.
+    """
+
+    def __init__(self) -> None:
+        self._tracks: dict[Path, Track] = {}
+        self._lock = threading.Lock()
+        # number of times an existing Track was returned instead of a new one being created
+        self.deduplicated = 0
+
+    def get_or_create(self, path: Path) -> Track:
+        with self._lock:
+            track = self._tracks.get(path)
+            if track is None:
+                track = self._tracks[path] = Track(path)
+            else:
+                self.deduplicated += 1
+            return track
+
+    def intern(self, track: Track) -> Track:
+        """Registers track, or returns the Track already registered for its path."""
+        with self._lock:
+            existing = self._tracks.setdefault(track.path, track)
+            if existing is not track:
+                self.deduplicated += 1
+            return existing
+
+    def get(self, path: Path) -> Optional[Track]:
+        return self._tracks.get(path)
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._tracks
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(list(self._tracks.values()))
@@ -0,0 +1,55 @@
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from pyserato.model.track import Track
+
+
+class TrackTable:
+    """
+    Column oriented storage for bulk loading a library. Each track is a row referenced by an integer id: its path is
+    kept as a str and its numeric fields in arrays, so a row costs a fraction of a Track object. Crates can hold
+    these ids instead of Tracks, see Crate.add_track_id. A Track is only created for a row when it is accessed, and
+    the same Track is returned for that row from then on.
+    """
+
+    def __init__(self) -> None:
+        self._paths: list[str] = []
+        self._ids: dict[str, int] = {}
+        self.average_bpm = array("d")
+        self.total_time = array("d")
+        self._tracks: dict[int, Track] = {}
+
+    def add(self, path: str, average_bpm: float = 0.0, total_time: float = 0.0) -> int:
+        """
+        Adds a row for path, unless the path already has one.
+        :return: the id of the row.
+        """
+        track_id = self._ids.get(path)
+        if track_id is not None:
+            return track_id
+        track_id = len(self._paths)
+        self._paths.append(path)
+        self._ids[path] = track_id
+        self.average_bpm.append(average_bpm)
+        self.total_time.append(total_time)
+        return track_id
+
+    def id_of(self, path: Path | str) -> Optional[int]:
+        return self._ids.get(str(path))
+
+    def path(self, track_id: int) -> Path:
+        return Path(self._paths[track_id])
+
+    def track(self, track_id: int) -> Track:
+        track = self._tracks.get(track_id)
+        if track is None:
+            track = self._tracks[track_id] = Track(
+                self.path(track_id),
+                average_bpm=self.average_bpm[track_id],
+                total_time=self.total_time[track_id],
+            )
+        return track
+
+    def __len__(self) -> int:
+        return len(self._paths)
@@ -0,0 +1,66 @@
+import enum
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+class CrateSaveStatus(enum.Enum):
+    ADDED = "added"
+    CHANGED = "changed"
+    UNCHANGED = "unchanged"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class TagWriteReport:
+    """
+    Summary of the tags written by an encoder during Builder.save, one entry per unique track file.
+    written: files that were tagged.
+    skipped: files only in crates that were not written, so were left untagged.
+    failed: files that could not be tagged, mapped to the error raised while tagging them.
+    """
+
+    written: list[Path] = field(default_factory=list)
+    skipped: list[Path] = field(default_factory=list)
+    failed: dict[Path, Exception] = field(default_factory=dict)
+
+
+@dataclass
+class SaveReport:
+    """
+    Summary of a Builder.save call.
+    written: crate files that were written to disk, i.e. added and changed.
+    added: crate files that did not exist before the save.
+    changed: existing crate files that were rewritten.
+    unchanged: existing crate files that already had the same content, so were not rewritten. Incremental saves only.
+    skipped: crate files that already existed and were left untouched.
+    removed: crate files on disk under the saved root for crates that are no longer in the tree. Incremental saves
+    only. These files are reported but not deleted.
+    failed: crate files that could not be written, mapped to the error raised while writing them.
+    tags: the tags written for the tracks in the crates, if the builder has an encoder.
+    """
+
+    written: list[Path] = field(default_factory=list)
+    added: list[Path] = field(default_factory=list)
+    changed: list[Path] = field(default_factory=list)
+    unchanged: list[Path] = field(default_factory=list)
+    skipped: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+    failed: dict[Path, Exception] = field(default_factory=dict)
+    tags: TagWriteReport = field(default_factory=TagWriteReport)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.tags.failed
+
+    def record(self, filepath: Path, status: CrateSaveStatus) -> None:
+        match status:
+            case CrateSaveStatus.ADDED:
+                self.written.append(filepath)
+                self.added.append(filepath)
+            case CrateSaveStatus.CHANGED:
+                self.written.append(filepath)
+                self.changed.append(filepath)
+            case CrateSaveStatus.UNCHANGED:
+                self.unchanged.append(filepath)
+            case CrateSaveStatus.SKIPPED:
+                self.skipped.append(filepath)
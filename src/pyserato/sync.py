@@ -0,0 +1,162 @@
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pyserato._crate_steps import resolve_crate_paths, resolved_track_paths
+from pyserato.builder import DEFAULT_SERATO_FOLDER, Builder
+from pyserato.crate_reader import is_crate_file
+from pyserato.crate_writer import serialize_crate
+from pyserato.model.crate import Crate
+
+
+@dataclass
+class CrateUpdate:
+    """A crate whose file exists but whose tracks differ."""
+
+    crate_path: str
+    added_tracks: list[str] = field(default_factory=list)
+    removed_tracks: list[str] = field(default_factory=list)
+
+
+@dataclass
+class SyncPlan:
+    """
+    The file operations that bring a SubCrates folder in line with a crate tree. Crates are identified by their crate
+    path, the names of the crate and its ancestors joined by '%%' as in the crate file names, e.g. 'root%%child'.
+    creates: crates with no file.
+    updates: crates whose file has different tracks.
+    deletes: crate files under the root whose crate is no longer in the tree.
+    renames: (old, new) crate paths of crates that moved or were renamed without their tracks changing, so the file
+    is renamed rather than deleted and written again.
+    unchanged: crates whose file is already up to date.
+    """
+
+    creates: list[str] = field(default_factory=list)
+    updates: list[CrateUpdate] = field(default_factory=list)
+    deletes: list[str] = field(default_factory=list)
+    renames: list[tuple[str, str]] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    # the track paths of every crate that is created or updated, in the order they are written
+    tracks: dict[str, list[str]] = field(default_factory=dict, repr=False)
+
+    @property
+    def operations(self) -> int:
+        """The number of files written, renamed or deleted to apply the plan."""
+        return len(self.creates) + len(self.updates) + len(self.deletes) + len(self.renames)
+
+    def __bool__(self) -> bool:
+        return self.operations > 0
+
+
+def _iter_crate_paths(root: Crate) -> Iterator[tuple[str, Crate]]:
+    for crate, filename in resolve_crate_paths(root):
+        yield filename[: -len(".crate")], crate
+
+
+def _current_tracks(current: dict[str, Crate], root_name: str) -> dict[str, list[str]]:
+    crate = current.get(root_name)
+    if crate is None:
+        return {}
+    return {crate_path: [str(track.path) for track in crate.tracks] for crate_path, crate in _iter_crate_paths(crate)}
+
+
+def plan_sync(
+    root: Crate,
+    current: dict[str, Crate],
+    existing: Optional[set[str]] = None,
+) -> SyncPlan:
+    """
+    Works out the fewest file operations that make the crate files of root match the tree. Only crates under root
+    are considered, other top level crates in current are left alone.
+    :param current: the crates on disk, as returned by Builder.parse_crates_from_root_path.
+    :param existing: the crate paths that have a file. Parsing creates the ancestors of every crate file, so a crate
+    in current may not have a file of its own. All the crates in current are assumed to have one by default.
+    The track paths are resolved as Builder.save writes them.
+    """
+    before = _current_tracks(current, root.name)
+    if existing is not None:
+        before = {crate_path: tracks for crate_path, tracks in before.items() if crate_path in existing}
+    after = {crate_path: list(resolved_track_paths(crate)) for crate_path, crate in _iter_crate_paths(root)}
+
+    plan = SyncPlan()
+    for crate_path, tracks in after.items():
+        previous = before.get(crate_path)
+        if previous is None:
+            plan.creates.append(crate_path)
+        else:
+            # a crate's tracks are a set, so only membership is compared and not the order they were written in
+            previous_set, tracks_set = set(previous), set(tracks)
+            if previous_set == tracks_set:
+                plan.unchanged.append(crate_path)
+                continue
+            plan.updates.append(
+                CrateUpdate(
+                    crate_path,
+                    added_tracks=[t for t in tracks if t not in previous_set],
+                    removed_tracks=[t for t in previous if t not in tracks_set],
+                )
+            )
+    deletes = [crate_path for crate_path in before if crate_path not in after]
+
+    # a deleted crate with exactly the tracks of a created one is renamed instead
+    deleted_by_tracks: dict[frozenset[str], list[str]] = {}
+    for crate_path in deletes:
+        deleted_by_tracks.setdefault(frozenset(before[crate_path]), []).append(crate_path)
+    creates = []
+    for crate_path in plan.creates:
+        candidates = deleted_by_tracks.get(frozenset(after[crate_path]))
+        if candidates:
+            plan.renames.append((candidates.pop(0), crate_path))
+        else:
+            creates.append(crate_path)
+    renamed = {old for old, _ in plan.renames}
+    plan.creates = creates
+    plan.deletes = sorted(crate_path for crate_path in deletes if crate_path not in renamed)
+    plan.tracks = {crate_path: after[crate_path] for crate_path in creates}
+    plan.tracks.update((update.crate_path, after[update.crate_path]) for update in plan.updates)
+    return plan
+
+
+def apply_sync(plan: SyncPlan, subcrate_path: Path) -> None:
+    """
+    Applies the plan to the crate files in subcrate_path. Renames are applied first, so they never overwrite a file
+    that is still to be written.
+    """
+    subcrate_path.mkdir(parents=True, exist_ok=True)
+
+    def filepath(crate_path: str) -> Path:
+        return subcrate_path / f"{crate_path}.crate"
+
+    for old, new in plan.renames:
+        os.replace(filepath(old), filepath(new))
+    for crate_path, tracks in plan.tracks.items():
+        filepath(crate_path).write_bytes(serialize_crate(tracks))
+    for crate_path in plan.deletes:
+        filepath(crate_path).unlink(missing_ok=True)
+
+
+def sync(
+    root: Crate,
+    save_path: Path = DEFAULT_SERATO_FOLDER,
+    dry_run: bool = False,
+    builder: Optional[Builder] = None,
+) -> SyncPlan:
+    """
+    Makes the crate files of root in the SubCrates folder of save_path match the tree, writing only the crates that
+    changed, renaming moved crates and deleting crates no longer in the tree. Track tags are not written.
+    :param dry_run: work out the plan without changing any files.
+    :param builder: parses the crate files already on disk, a plain Builder by default.
+    :return: the plan, applied unless dry_run.
+    """
+    builder = builder or Builder()
+    subcrate_path = save_path / "SubCrates"
+    current: dict[str, Crate] = {}
+    existing: set[str] = set()
+    if subcrate_path.exists():
+        current = builder.parse_crates_from_root_path(subcrate_path)
+        existing = {f.name[: -len(".crate")] for f in subcrate_path.iterdir() if is_crate_file(f)}
+    plan = plan_sync(root, current, existing)
+    if not dry_run:
+        apply_sync(plan, subcrate_path)
+    return plan
@@ -12,21 +12,17 @@ def split_string(string: bytes, after: int = 72, delimiter: bytes = b"\n"):
     return delimiter.join(pieces)
 
 
-def serato_decode(s: bytes) -> str:
+def serato_decode(s: bytes | memoryview) -> str:
     """
     Decode a string that's been encoded in to bytes Serato style.
     This is a Python implementation of Java's bytes to string utf16 which Serato appears to use from looking at:
     https://github.com/markusschmitz53/serato-itch-sync
+    Java writes each char as two big-endian bytes so this is equivalent to decoding the whole buffer as UTF-16-BE in
+    one go, which avoids copying the remaining bytes for every character.
     :param s:
     :return:
     """
-    result = ""
-    while s:
-        chunk = s[:2]
-        chunk = chunk[::-1]
-        result += chunk.decode("utf16")
-        s = s[2:]
-    return result
+    return bytes(s).decode("utf-16-be")
 
 
 def serato_encode(s: str) -> bytes:
@@ -34,14 +30,11 @@ def serato_encode(s: str) -> bytes:
     Encode a string Serato style.
     This is a Python implementation of Java's 'writeChars' which Serato appears to use from looking at:
     https://github.com/markusschmitz53/serato-itch-sync
+    Java writes each char as two big-endian bytes, which is what encoding as UTF-16-BE produces.
     :param s:
     :return:
     """
-    result = []
-    for c in s:
-        result.append(int.from_bytes(c.encode("utf16"), byteorder="big") >> 0 & 255)
-        result.append(int.from_bytes(c.encode("utf16"), byteorder="big") >> 8 & 255)
-    return bytes(result)
+    return s.encode("utf-16-be")
 
 
 def sanitize_filename(filename: str) -> str:
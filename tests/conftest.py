@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+
+# a silent MPEG-1 layer III frame at 128kbps and 44.1kHz
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+@pytest.fixture
+def mp3_path(tmp_path) -> Path:
+    """An untagged MP3 file that mutagen can open."""
+    path = tmp_path / "song.mp3"
+    path.write_bytes(MP3_FRAME * 10)
+    return path
+
+
+class RecordingEncoder(BaseEncoder):
+    """Records the tracks it is asked to tag instead of tagging them, and fails on the file named fail_on."""
+
+    def __init__(self, fail_on: str = ""):
+        self.written: list[Path] = []
+        self.fail_on = fail_on
+
+    @property
+    def tag_name(self) -> str:
+        return "GEOB:Test"
+
+    @property
+    def tag_version(self) -> bytes:
+        return b"\x01\x01"
+
+    @property
+    def markers_name(self) -> str:
+        return "Test"
+
+    def write(self, track: Track):
+        if self.fail_on and track.path.name == self.fail_on:
+            raise ValueError("cannot tag")
+        self.written.append(track.path)
+
+
+@pytest.fixture
+def recording_encoder() -> type[RecordingEncoder]:
+    return RecordingEncoder
+
+
+@pytest.fixture
+def make_tree(tmp_path) -> Callable[..., Crate]:
+    """Builds a tree of crates, each with a track of its own and a track every crate shares."""
+
+    def make_tree(width: int = 3, depth: int = 2) -> Crate:
+        def make(name: str, level: int) -> Crate:
+            children = [make(f"{name}_{i}", level + 1) for i in range(width)] if level < depth else []
+            crate = Crate(name, children={c.name: c for c in children})
+            crate.add_track(Track.from_path(Path(f"music/{name}.mp3"), user_root=tmp_path))
+            crate.add_track(Track.from_path(Path("music/shared.mp3"), user_root=tmp_path))
+            return crate
+
+        return make("root", 0)
+
+    return make_tree
+
+
+@pytest.fixture
+def read_all() -> Callable[[Path], dict[str, bytes]]:
+    """Reads every file in a folder, by name."""
+
+    def read_all(folder: Path) -> dict[str, bytes]:
+        return {f.name: f.read_bytes() for f in folder.iterdir()}
+
+    return read_all
+
+
+@pytest.fixture
+def tree_shape() -> Callable[[dict[str, Crate]], list]:
+    """The names, track paths and children of a crate map, to compare two trees."""
+
+    def tree_shape(crates: dict[str, Crate]) -> list:
+        def shape(crate: Crate) -> tuple:
+            tracks = sorted(str(t.path) for t in crate.tracks)
+            return crate.name, tracks, [shape(c) for c in crate.children.values()]
+
+        return [shape(c) for c in crates.values()]
+
+    return tree_shape
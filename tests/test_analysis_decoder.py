@@ -0,0 +1,47 @@
+import pytest
+from mutagen import id3
+
+from pyserato.encoders.analysis_decoder import decode_analysis, decode_autotags, read_analysis
+from pyserato.encoders.serato_tags import SERATO_ANALYSIS, SERATO_AUTOTAGS, TagTransaction
+from pyserato.model.track import Track
+
+AUTOTAGS = b"\x01\x01" + b"115.00\x00" + b"-3.257\x00" + b"0.000\x00"
+
+
+def _tag(path, autotags: bytes = AUTOTAGS, key: str = "Am", length: str = "261330") -> None:
+    with TagTransaction(path) as transaction:
+        transaction.set(SERATO_AUTOTAGS, autotags)
+        transaction.set(SERATO_ANALYSIS, b"\x02\x01")
+    tags = id3.ID3(path)
+    tags.add(id3.TKEY(encoding=3, text=key))
+    tags.add(id3.TLEN(encoding=3, text=length))
+    tags.save()
+
+
+def test_decode_autotags():
+    autotags = decode_autotags(AUTOTAGS)
+    assert (autotags.bpm, autotags.auto_gain, autotags.gain_db) == (115.0, -3.257, 0.0)
+    assert decode_autotags(b"\x01\x01" + b"\x00" * 3).bpm is None
+    with pytest.raises(ValueError):
+        decode_autotags(b"\x02\x01")
+
+
+def test_decode_analysis():
+    assert decode_analysis(b"\x02\x01") == (2, 1)
+    with pytest.raises(ValueError):
+        decode_analysis(b"\x02")
+
+
+def test_read_analysis(mp3_path):
+    _tag(mp3_path)
+    track = read_analysis(Track.from_path(mp3_path))
+    assert track.average_bpm == 115.0
+    assert track.tonality == "Am"
+    assert track.total_time == 261.33
+
+
+def test_read_analysis_keeps_missing_fields(mp3_path):
+    track = Track.from_path(mp3_path)
+    track.average_bpm = 120.0
+    read_analysis(track)
+    assert (track.average_bpm, track.tonality, track.total_time) == (120.0, "", 0.0)
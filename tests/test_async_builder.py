@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from pyserato import async_builder
+from pyserato.async_builder import AsyncBuilder, _as_completed, _in_order
+from pyserato.builder import Builder
+
+
+def test_save_matches_builder(tmp_path, make_tree, read_all, recording_encoder):
+    root = make_tree()
+    sync_path = tmp_path / "sync"
+    async_path = tmp_path / "async"
+    sync_path.mkdir()
+    async_path.mkdir()
+
+    sync_report = Builder(recording_encoder()).save(root, sync_path)
+    async_report = asyncio.run(AsyncBuilder(recording_encoder(), concurrency=3).save(root, async_path))
+
+    assert read_all(sync_path / "SubCrates") == read_all(async_path / "SubCrates")
+    assert [p.name for p in async_report.written] == [p.name for p in sync_report.written]
+    assert async_report.tags.written == sync_report.tags.written
+    assert async_report.ok
+
+
+def test_iter_save_progress(tmp_path, make_tree, recording_encoder):
+    root = make_tree(width=2, depth=1)
+    encoder = recording_encoder(fail_on="root_1.mp3")
+
+    async def run():
+        return [progress async for progress in AsyncBuilder(encoder).iter_save(root, tmp_path)]
+
+    progress = asyncio.run(run())
+    assert [(p.phase, p.done, p.total) for p in progress] == [
+        ("crates", 1, 3), ("crates", 2, 3), ("crates", 3, 3), ("tags", 1, 4), ("tags", 2, 4), ("tags", 3, 4),
+        ("tags", 4, 4),
+    ]
+    failed = [p for p in progress if p.error is not None]
+    assert [p.path.name for p in failed] == ["root_1.mp3"]
+    report = progress[-1].report
+    assert len(report.written) == 3
+    assert list(report.tags.failed) == [failed[0].path]
+
+
+def test_save_reports_failures(tmp_path, make_tree):
+    root = make_tree(width=2, depth=1)
+    subcrates = tmp_path / "SubCrates"
+    subcrates.mkdir()
+    (subcrates / "root%%root_0.crate").mkdir()
+
+    report = asyncio.run(AsyncBuilder().save(root, tmp_path, overwrite=True))
+    assert list(report.failed) == [subcrates / "root%%root_0.crate"]
+    assert sorted(p.name for p in report.written) == ["root%%root_1.crate", "root.crate"]
+
+
+def test_incremental_stream_rejected(tmp_path, make_tree):
+    with pytest.raises(ValueError):
+        asyncio.run(AsyncBuilder().save(make_tree(), tmp_path, stream=True, incremental=True))
+
+
+def test_parse_matches_builder(tmp_path, make_tree, tree_shape):
+    root = make_tree()
+    Builder().save(root, tmp_path)
+    subcrates = tmp_path / "SubCrates"
+
+    async def run():
+        builder = AsyncBuilder(concurrency=2)
+        progress = [p async for p in builder.iter_parse(subcrates)]
+        return progress, await builder.parse_crates_from_root_path(subcrates)
+
+    progress, crates = asyncio.run(run())
+    assert tree_shape(crates) == tree_shape(Builder().parse_crates_from_root_path(subcrates))
+    assert [p.done for p in progress] == list(range(1, 14))
+    assert [p.filepath for p in progress] == sorted(Path(subcrates).iterdir())
+
+
+def test_parse_stops_early(tmp_path, make_tree):
+    Builder().save(make_tree(), tmp_path)
+
+    async def run():
+        async for progress in AsyncBuilder().iter_parse(tmp_path / "SubCrates"):
+            return progress
+
+    assert asyncio.run(run()).done == 1
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncBuilder(concurrency=0)
+
+
+def test_save_plans_tag_writes_off_the_event_loop(tmp_path, monkeypatch, make_tree, recording_encoder):
+    threads = []
+    plan = async_builder.plan_tag_writes
+
+    def recording_plan(*args):
+        threads.append(threading.current_thread())
+        return plan(*args)
+
+    monkeypatch.setattr(async_builder, "plan_tag_writes", recording_plan)
+    report = asyncio.run(AsyncBuilder(recording_encoder()).save(make_tree(), tmp_path))
+    assert report.tags.written
+    assert threads and threads[0] is not threading.main_thread()
+
+
+@pytest.mark.parametrize("iterate", [_as_completed, _in_order])
+def test_task_creation_is_bounded(iterate):
+    created = []
+    running = []
+    most_running = 0
+
+    async def work(i):
+        nonlocal most_running
+        running.append(i)
+        most_running = max(most_running, len(running))
+        await asyncio.sleep(0.001 * (i % 3))
+        running.remove(i)
+        return i
+
+    def coroutines():
+        for i in range(20):
+            created.append(i)
+            yield work(i)
+
+    async def run():
+        results = []
+        async for result in iterate(coroutines(), 3):
+            # coroutines are only taken from the iterable as others complete
+            assert len(created) <= len(results) + 4
+            results.append(result)
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(results) == list(range(20))
+    assert most_running <= 3
+    if iterate is _in_order:
+        assert results == list(range(20))
@@ -0,0 +1,128 @@
+import shutil
+import threading
+import time
+
+import pytest
+from mutagen import MutagenError
+
+from pyserato.batch import BulkAnalysisLoader, BulkCueReader, iter_completed, iter_unique_tracks
+from pyserato.encoders.beatgrid_encoder import BeatGridEncoder
+from pyserato.encoders.composite_encoder import CompositeEncoder
+from pyserato.encoders.serato_tags import SERATO_AUTOTAGS, TagTransaction
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.crate import Crate
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.track import Track
+
+
+def test_iter_unique_tracks(tmp_path):
+    a, b, c = (Track.from_path(tmp_path / f"{n}.mp3") for n in "abc")
+    child = Crate("child")
+    child.add_track(a)
+    child.add_track(c)
+    root = Crate("root", children={child.name: child})
+    root.add_track(a)
+    root.add_track(b)
+
+    assert sorted(t.path.name for t in iter_unique_tracks(root)) == ["a.mp3", "b.mp3", "c.mp3"]
+    assert sorted(t.path.name for t in iter_unique_tracks({"root": root})) == ["a.mp3", "b.mp3", "c.mp3"]
+    assert [t.path.name for t in iter_unique_tracks([a, b, a])] == ["a.mp3", "b.mp3"]
+    assert list(iter_unique_tracks({})) == []
+
+
+def test_iter_completed_bounds_in_flight():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(i: int) -> int:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.001)
+        with lock:
+            in_flight -= 1
+        if i == 3:
+            raise ValueError("bad item")
+        return i * 2
+
+    results = {item: (result, error) for item, result, error in iter_completed(work, range(50), max_workers=2)}
+    assert len(results) == 50
+    assert peak <= 2
+    assert results[4] == (8, None)
+    assert results[3][0] is None
+    assert isinstance(results[3][1], ValueError)
+
+
+def test_bulk_cue_reader(tmp_path, mp3_path):
+    encoder = V2Mp3Encoder()
+    tagged = []
+    for i in range(5):
+        path = tmp_path / f"tagged{i}.mp3"
+        shutil.copy(mp3_path, path)
+        track = Track.from_path(path)
+        track.add_hot_cue(HotCue(name=f"cue{i}", type=HotCueType.CUE, start=i * 1000, index=0))
+        encoder.write(track)
+        tagged.append(track)
+    # an untagged file raises KeyError, mutagen wraps the error of a missing file
+    untagged = Track.from_path(mp3_path)
+    missing = Track.from_path(tmp_path / "missing.mp3")
+
+    crate = Crate("root")
+    for track in tagged + [untagged, missing]:
+        crate.add_track(track)
+
+    reader = BulkCueReader(encoder, max_workers=3)
+    results = {r.track.path.name: r for r in reader.read(crate)}
+    assert len(results) == 7
+    for i in range(5):
+        result = results[f"tagged{i}.mp3"]
+        assert result.ok
+        assert [c.name for c in result.cues] == [f"cue{i}"]
+    assert isinstance(results["song.mp3"].error, KeyError)
+    assert isinstance(results["missing.mp3"].error, MutagenError)
+    assert reader.stats.completed == 7
+    assert reader.stats.failed == 2
+    assert reader.stats.succeeded == 5
+    assert reader.stats.files_per_second > 0
+
+
+def test_bulk_cue_reader_stops_early(mp3_path):
+    reader = BulkCueReader(max_workers=2)
+    results = reader.read([Track.from_path(mp3_path)])
+    assert not next(results).ok
+    with pytest.raises(StopIteration):
+        next(results)
+    assert reader.stats.finished is not None
+
+
+def test_bulk_analysis_loader(tmp_path, mp3_path):
+    tracks = []
+    for i in range(4):
+        path = tmp_path / f"analysed{i}.mp3"
+        shutil.copy(mp3_path, path)
+        with TagTransaction(path) as transaction:
+            transaction.set(SERATO_AUTOTAGS, b"\x01\x01" + f"{120 + i}.00".encode() + b"\x00-1.0\x000.0\x00")
+        tracks.append(Track.from_path(path))
+    child = Crate("child")
+    child.add_track(tracks[0])
+    child.add_track(Track.from_path(tmp_path / "missing.mp3"))
+    root = Crate("root", children={child.name: child})
+    for track in tracks:
+        root.add_track(track)
+
+    loader = BulkAnalysisLoader(max_workers=2)
+    failed = [result.track.path.name for result in loader.load(root) if not result.ok]
+    assert failed == ["missing.mp3"]
+    assert [track.average_bpm for track in tracks] == [120.0, 121.0, 122.0, 123.0]
+    assert (loader.stats.completed, loader.stats.failed) == (5, 1)
+
+
+def test_bulk_cue_reader_needs_an_encoder_that_reads_cues():
+    with pytest.raises(TypeError, match="BeatGridEncoder cannot read cues"):
+        BulkCueReader(BeatGridEncoder())
+    with pytest.raises(TypeError):
+        BulkCueReader(CompositeEncoder([BeatGridEncoder(), V2Mp3Encoder()]))
+    assert CompositeEncoder([V2Mp3Encoder(), BeatGridEncoder()]).can_read_cues
@@ -0,0 +1,82 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from pyserato.builder import Builder
+from pyserato.encoders.beatgrid_encoder import BeatGridEncoder
+from pyserato.encoders.composite_encoder import CompositeEncoder
+from pyserato.encoders.serato_tags import SERATO_BEATGRID, SERATO_MARKERS_V2, read_serato_tags
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.crate import Crate
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.tempo import Tempo
+from pyserato.model.track import Track
+
+
+def _track(path: Path = Path("/song.mp3")) -> Track:
+    track = Track(path)
+    # 32 beats at 120 BPM then 128 BPM from 16.5s
+    track.add_beatgrid_marker(Tempo(position=0.5, bpm=120.0))
+    track.add_beatgrid_marker(Tempo(position=16.5, bpm=128.0))
+    return track
+
+
+def test_encode_layout():
+    data = BeatGridEncoder().encode(_track())
+    assert data == (
+        b"\x01\x00"
+        + b"\x00\x00\x00\x02"
+        + b"\x3f\x00\x00\x00" + b"\x00\x00\x00\x20"
+        + b"\x41\x84\x00\x00" + b"\x43\x00\x00\x00"
+        + b"\x00"
+    )
+
+
+def test_roundtrip():
+    encoder = BeatGridEncoder()
+    track = _track()
+    assert encoder.decode(encoder.encode(track)) == track.beatgrid
+    single = Track(Path("/song.mp3"), beatgrid=[Tempo(position=0.25, bpm=174.0)])
+    assert encoder.decode(encoder.encode(single)) == single.beatgrid
+    assert encoder.decode(encoder.encode(Track(Path("/song.mp3")))) == []
+
+
+def test_encode_needs_positions_and_bpm():
+    with pytest.raises(ValueError):
+        BeatGridEncoder().encode(Track(Path("/song.mp3"), beatgrid=[Tempo(position=0.5)]))
+
+
+def test_decode_rejects_markers_at_the_same_position():
+    data = struct.pack(">BBIfIfIffB", 1, 0, 3, 0.5, 16, 8.5, 0, 8.5, 120.0, 0)
+    with pytest.raises(ValueError, match="marker 1 at 8.5s"):
+        BeatGridEncoder().decode(data)
+
+
+@pytest.mark.parametrize("positions", [(0.5, 8.5, 4.5), (0.5, 8.5, 8.5)])
+def test_encode_rejects_markers_out_of_order(positions):
+    track = Track(Path("/song.mp3"))
+    for position in positions:
+        track.add_beatgrid_marker(Tempo(position=position, bpm=120.0))
+    with pytest.raises(ValueError, match="marker 1 of .* at 8.5s is not before"):
+        BeatGridEncoder().encode(track)
+
+
+def test_write_and_read(mp3_path):
+    encoder = BeatGridEncoder()
+    encoder.write(_track(mp3_path))
+    assert encoder.read(Track(mp3_path)).beatgrid == _track().beatgrid
+
+    # a track without a beatgrid does not remove the one in the file
+    encoder.write(Track(mp3_path))
+    assert SERATO_BEATGRID in read_serato_tags(mp3_path)
+
+
+def test_builder_save_with_cues(tmp_path, mp3_path):
+    track = _track(mp3_path)
+    track.add_hot_cue(HotCue(name="drop", type=HotCueType.CUE, start=16500, index=0))
+    crate = Crate("root")
+    crate.add_track(track)
+    Builder(CompositeEncoder([V2Mp3Encoder(), BeatGridEncoder()])).save(crate, tmp_path)
+    assert set(read_serato_tags(mp3_path)) == {SERATO_MARKERS_V2, SERATO_BEATGRID}
@@ -0,0 +1,257 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from pyserato._crate_steps import construct
+from pyserato.builder import Builder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.crate import Crate
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.track import Track, TrackRegistry
+from pyserato.util import DuplicateTrackError
+
+
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_parallel_save_matches_serial(tmp_path, use_executor, make_tree, read_all):
+    root = make_tree()
+    serial_path = tmp_path / "serial"
+    parallel_path = tmp_path / "parallel"
+    serial_path.mkdir()
+    parallel_path.mkdir()
+
+    builder = Builder()
+    serial_report = builder.save(root, serial_path)
+    if use_executor:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            parallel_report = builder.save(root, parallel_path, executor=executor)
+    else:
+        parallel_report = builder.save(root, parallel_path, max_workers=4)
+
+    assert read_all(serial_path / "SubCrates") == read_all(parallel_path / "SubCrates")
+    assert [p.name for p in serial_report.written] == [p.name for p in parallel_report.written]
+    assert len(parallel_report.written) == 13
+    assert parallel_report.ok
+
+
+def test_parallel_save_reports_failures(tmp_path, make_tree):
+    root = make_tree(width=2, depth=1)
+    subcrates = tmp_path / "SubCrates"
+    subcrates.mkdir()
+    # a directory in place of the crate file makes the write fail
+    (subcrates / "root%%root_0.crate").mkdir()
+
+    report = Builder().save(root, tmp_path, overwrite=True, max_workers=2)
+
+    assert list(report.failed) == [subcrates / "root%%root_0.crate"]
+    assert isinstance(report.failed[subcrates / "root%%root_0.crate"], IsADirectoryError)
+    assert sorted(p.name for p in report.written) == ["root%%root_1.crate", "root.crate"]
+    assert not report.ok
+
+
+def test_save_reports_skipped(tmp_path, make_tree):
+    root = make_tree(width=1, depth=1)
+    builder = Builder()
+    assert len(builder.save(root, tmp_path).written) == 2
+    report = builder.save(root, tmp_path, max_workers=2)
+    assert report.written == []
+    assert len(report.skipped) == 2
+
+
+@pytest.mark.parametrize("tag_workers", [None, 4])
+def test_save_tags_each_track_once(tmp_path, tag_workers, make_tree, recording_encoder):
+    root = make_tree()
+    encoder = recording_encoder()
+    report = Builder(encoder=encoder).save(root, tmp_path, tag_workers=tag_workers)
+
+    # 13 crates each with their own track and the shared track
+    assert len(encoder.written) == 14
+    assert len(set(encoder.written)) == 14
+    assert sorted(report.tags.written) == sorted(encoder.written)
+    assert report.ok
+
+
+def test_save_tags_skipped_and_failed(tmp_path, make_tree, recording_encoder):
+    root = make_tree(width=1, depth=1)
+    subcrates = tmp_path / "SubCrates"
+    subcrates.mkdir()
+    (subcrates / "root%%root_0.crate").write_bytes(b"")
+
+    encoder = recording_encoder(fail_on="shared.mp3")
+    report = Builder(encoder=encoder).save(root, tmp_path, tag_workers=2)
+
+    # root%%root_0.crate already exists, so only the tracks of root.crate are tagged
+    assert report.skipped == [subcrates / "root%%root_0.crate"]
+    assert [p.name for p in report.tags.written] == ["root.mp3"]
+    assert [p.name for p in report.tags.skipped] == ["root_0.mp3"]
+    assert [p.name for p in report.tags.failed] == ["shared.mp3"]
+    assert not report.ok
+
+
+def test_serial_save_raises_tag_errors(tmp_path, make_tree, recording_encoder):
+    root = make_tree(width=1, depth=1)
+    with pytest.raises(ValueError, match="cannot tag"):
+        Builder(encoder=recording_encoder(fail_on="shared.mp3")).save(root, tmp_path)
+
+
+def test_incremental_save(tmp_path, make_tree):
+    root = make_tree(width=2, depth=1)
+    builder = Builder()
+    report = builder.save(root, tmp_path, incremental=True)
+    assert len(report.added) == 3
+    assert report.written == report.added
+
+    subcrates = tmp_path / "SubCrates"
+    mtimes = {f.name: f.stat().st_mtime_ns for f in subcrates.iterdir()}
+    root.children["root_0"].add_track(Track.from_path(Path("music/new.mp3"), user_root=tmp_path))
+    del root.children["root_1"]
+    (subcrates / "other.crate").write_bytes(b"")
+
+    report = builder.save(root, tmp_path, incremental=True)
+    assert report.added == []
+    assert report.changed == [subcrates / "root%%root_0.crate"]
+    assert report.unchanged == [subcrates / "root.crate"]
+    assert report.removed == [subcrates / "root%%root_1.crate"]
+    assert (subcrates / "root.crate").stat().st_mtime_ns == mtimes["root.crate"]
+    assert (subcrates / "root%%root_0.crate").read_bytes() == construct(root.children["root_0"])
+    # removed crates are only reported
+    assert (subcrates / "root%%root_1.crate").exists()
+
+
+def test_incremental_save_cannot_stream(tmp_path):
+    with pytest.raises(ValueError):
+        Builder().save(Crate("root"), tmp_path, incremental=True, stream=True)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 8])
+def test_parallel_parse_matches_serial(tmp_path, max_workers, make_tree, tree_shape):
+    root = make_tree()
+    builder = Builder()
+    builder.save(root, tmp_path)
+    subcrates = tmp_path / "SubCrates"
+
+    serial = builder.parse_crates_from_root_path(subcrates)
+    parallel = builder.parse_crates_from_root_path(subcrates, max_workers=max_workers)
+    assert serial == {"root": root}
+    assert parallel == serial
+    assert tree_shape(parallel) == tree_shape(serial)
+
+
+def test_parse_with_process_pool(tmp_path, make_tree, tree_shape):
+    root = make_tree(width=2, depth=1)
+    builder = Builder()
+    builder.save(root, tmp_path)
+    subcrates = tmp_path / "SubCrates"
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parsed = builder.parse_crates_from_root_path(subcrates, executor=executor)
+    assert tree_shape(parsed) == tree_shape(builder.parse_crates_from_root_path(subcrates))
+
+
+def test_parse_interns_tracks(tmp_path, make_tree):
+    root = make_tree()
+    Builder().save(root, tmp_path)
+    registry = TrackRegistry()
+    crates = Builder().parse_crates_from_root_path(tmp_path / "SubCrates", registry=registry)
+
+    # the shared track is in all 13 crates but is only created once
+    assert len(registry) == 14
+    assert registry.deduplicated == 12
+    shared = registry.get((tmp_path / "music" / "shared.mp3").resolve())
+    child = crates["root"].children["root_0"]
+    assert any(t is shared for t in child.tracks)
+    assert any(t is shared for t in crates["root"].tracks)
+
+
+def test_parse_lazily_reads_crate_files_on_first_access(tmp_path, make_tree, tree_shape):
+    root = make_tree()
+    builder = Builder()
+    builder.save(root, tmp_path)
+    subcrates = tmp_path / "SubCrates"
+    registry = TrackRegistry()
+
+    crates = builder.parse_crates_lazily(subcrates, registry=registry)
+    assert sorted(crates["root"].children) == ["root_0", "root_1", "root_2"]
+    assert len(registry) == 0
+    child = crates["root"].children["root_1"]
+    assert child.track_count == 2
+    assert len(registry) == 0
+
+    assert {str(t.path) for t in child.tracks} == {str(t.path) for t in root.children["root_1"].tracks}
+    assert len(registry) == 2
+    assert crates == {"root": root}
+    assert tree_shape(crates) == tree_shape(builder.parse_crates_from_root_path(subcrates))
+
+
+def test_parse_lazily_fails_on_missing_file_when_accessed(tmp_path, make_tree):
+    Builder().save(make_tree(width=1, depth=1), tmp_path)
+    crates = Builder().parse_crates_lazily(tmp_path / "SubCrates")
+    (tmp_path / "SubCrates" / "root%%root_0.crate").unlink()
+    with pytest.raises(FileNotFoundError):
+        crates["root"].children["root_0"].tracks
+
+
+def test_iter_crate_tracks(tmp_path, make_tree):
+    root = make_tree(width=2, depth=1)
+    Builder().save(root, tmp_path)
+    Builder().save(Crate("other"), tmp_path)
+    subcrates = tmp_path / "SubCrates"
+
+    pairs = list(Builder.iter_crate_tracks(subcrates))
+    expected = {
+        ("root", str(t.path)) for t in root.tracks
+    } | {
+        (f"root%%{name}", str(t.path)) for name, child in root.children.items() for t in child.tracks
+    }
+    assert set(pairs) == expected
+    assert len(pairs) == 6
+    assert list(Builder.iter_crate_tracks(subcrates, root="other")) == []
+    assert set(Builder.iter_crate_tracks(subcrates, root="root")) == expected
+
+
+def test_stream_save_lazy_tree_over_its_own_files(tmp_path, make_tree):
+    root = make_tree(width=2, depth=1)
+    builder = Builder()
+    builder.save(root, tmp_path)
+    lazy = builder.parse_crates_lazily(tmp_path / "SubCrates")
+
+    builder.save(lazy["root"], tmp_path, overwrite=True, stream=True)
+    assert lazy["root"] == root
+    assert builder.parse_crates_from_root_path(tmp_path / "SubCrates") == {"root": root}
+    assert not list((tmp_path / "SubCrates").glob("*.tmp"))
+
+
+def test_lazy_track_count_reads_the_file_once(tmp_path, make_tree):
+    Builder().save(make_tree(width=1, depth=1), tmp_path)
+    crate = Builder().parse_crates_lazily(tmp_path / "SubCrates")["root"]
+    assert crate.track_count == 2
+    (tmp_path / "SubCrates" / "root.crate").unlink()
+    assert crate.track_count == 2
+
+
+def test_add_track_to_lazy_crate_does_not_load_it(tmp_path, make_tree):
+    Builder().save(make_tree(width=1, depth=1), tmp_path)
+    crate = Builder().parse_crates_lazily(tmp_path / "SubCrates")["root"]
+    with pytest.raises(DuplicateTrackError):
+        crate.add_track(Track.from_path(Path("music/shared.mp3"), user_root=tmp_path))
+    # the paths are read once, the Tracks are only created when tracks is read
+    (tmp_path / "SubCrates" / "root.crate").rename(tmp_path / "root.crate")
+    crate.add_track(Track.from_path(Path("music/new.mp3"), user_root=tmp_path))
+    assert crate.track_count == 3
+    (tmp_path / "root.crate").rename(tmp_path / "SubCrates" / "root.crate")
+    assert len(crate.tracks) == 3
+
+
+def test_incremental_save_tags_tracks_of_unchanged_crates(tmp_path, mp3_path):
+    root = Crate("root")
+    track = Track(mp3_path)
+    root.add_track(track)
+    encoder = V2Mp3Encoder()
+    builder = Builder(encoder=encoder)
+    builder.save(root, tmp_path, incremental=True)
+
+    track.add_hot_cue(HotCue(name="drop", type=HotCueType.CUE, start=1000, index=0))
+    report = builder.save(root, tmp_path, incremental=True)
+    assert report.unchanged == [tmp_path / "SubCrates" / "root.crate"]
+    assert report.tags.written == [mp3_path]
+    assert [cue.name for cue in encoder.read_cues(Track(mp3_path))] == ["drop"]
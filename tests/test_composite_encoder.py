@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+from mutagen import id3
+
+from pyserato.builder import Builder
+from pyserato.encoders.base_encoder import BaseEncoder
+from pyserato.encoders.composite_encoder import CompositeEncoder
+from pyserato.encoders.serato_tags import (
+    SERATO_MARKERS_V1,
+    SERATO_MARKERS_V2,
+    SERATO_OVERVIEW,
+    TagTransaction,
+    read_serato_tags,
+)
+from pyserato.encoders.v1_mp3_encoder import V1Mp3Encoder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.crate import Crate
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.track import Track
+
+
+def _track(path: Path) -> Track:
+    track = Track.from_path(path)
+    track.add_hot_cue(HotCue(name="", type=HotCueType.CUE, start=50, index=0))
+    track.add_hot_cue(HotCue(name="", type=HotCueType.LOOP, start=1900, end=3600, index=0))
+    return track
+
+
+def test_write_in_one_save(mp3_path, monkeypatch):
+    with TagTransaction(mp3_path) as transaction:
+        transaction.set(SERATO_OVERVIEW, b"overview")
+    saves = []
+    save = id3.ID3.save
+    monkeypatch.setattr(id3.ID3, "save", lambda self, *args, **kwargs: saves.append(1) or save(self, *args, **kwargs))
+
+    track = _track(mp3_path)
+    v2, v1 = V2Mp3Encoder(), V1Mp3Encoder()
+    CompositeEncoder([v2, v1], clear=[SERATO_OVERVIEW]).write(track)
+    assert len(saves) == 1
+    assert read_serato_tags(mp3_path) == {SERATO_MARKERS_V2: v2.encode(track), SERATO_MARKERS_V1: v1.encode(track)}
+
+
+def test_written_tags_win_over_clear(mp3_path):
+    track = _track(mp3_path)
+    encoder = CompositeEncoder([V2Mp3Encoder()], clear=[SERATO_MARKERS_V2])
+    encoder.write(track)
+    assert [c.start for c in encoder.read_cues(track)] == [50, 1900]
+
+
+def test_needs_an_encoder():
+    with pytest.raises(ValueError):
+        CompositeEncoder([])
+
+
+def test_builder_save(tmp_path, mp3_path):
+    track = _track(mp3_path)
+    crate = Crate("root")
+    crate.add_track(track)
+    encoder = CompositeEncoder([V2Mp3Encoder(), V1Mp3Encoder()])
+    report = Builder(encoder).save(crate, tmp_path)
+    assert report.tags.written == [track.path]
+    assert set(read_serato_tags(mp3_path)) == {SERATO_MARKERS_V2, SERATO_MARKERS_V1}
+
+
+def test_encoder_without_encode_falls_back_to_write(mp3_path):
+    class WriteOnlyEncoder(V2Mp3Encoder):
+        """An encoder written before encode existed, that only implements write."""
+
+        encode = BaseEncoder.encode  # type: ignore[assignment]
+
+        def write(self, track: Track):
+            with TagTransaction(track.path) as transaction:
+                transaction.set(SERATO_OVERVIEW, b"legacy")
+
+    track = _track(mp3_path)
+    CompositeEncoder([WriteOnlyEncoder(), V1Mp3Encoder()]).write(track)
+    tags = read_serato_tags(mp3_path)
+    assert tags[SERATO_OVERVIEW] == b"legacy"
+    assert SERATO_MARKERS_V1 in tags
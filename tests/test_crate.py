@@ -100,3 +100,67 @@ def test_crate_overwrite(tmp_path):
     expected_crates = {"root": Crate("root", children={c.name: c for c in [child_crate1, child_crate2]})}
     actual_crates = builder.parse_crates_from_root_path(subcrates_path)
     assert actual_crates == expected_crates
+
+
+def _tree(tmp_path, extra=None):
+    leaf = Crate("leaf")
+    leaf.add_track(Track.from_path(Path("a.mp3"), user_root=tmp_path))
+    if extra:
+        leaf.add_track(Track.from_path(Path(extra), user_root=tmp_path))
+    return Crate("root", children={"mid": Crate("mid", children={"leaf": leaf}), "other": Crate("other")})
+
+
+def test_digest_includes_tracks_and_children(tmp_path):
+    assert _tree(tmp_path).digest == _tree(tmp_path).digest
+    assert _tree(tmp_path) == _tree(tmp_path)
+    assert _tree(tmp_path) != _tree(tmp_path, extra="b.mp3")
+
+
+def test_digest_is_invalidated_up_the_tree(tmp_path):
+    root = _tree(tmp_path)
+    before = root.digest
+    leaf = root.children["mid"].children["leaf"]
+    leaf.add_track(Track.from_path(Path("b.mp3"), user_root=tmp_path))
+    assert root.digest != before
+    assert root == _tree(tmp_path, extra="b.mp3")
+
+    leaf.remove_track(Track.from_path(Path("b.mp3"), user_root=tmp_path))
+    assert root.digest == before
+
+    root.children["new"] = Crate("new")
+    assert root.digest != before
+    del root.children["new"]
+    assert root.digest == before
+
+
+def test_tracks_is_read_only(tmp_path):
+    crate = Crate("crate")
+    track = Track.from_path(Path("a.mp3"), user_root=tmp_path)
+    other = Track.from_path(Path("b.mp3"), user_root=tmp_path)
+    crate.add_track(track)
+    before = crate.digest
+    assert not hasattr(crate.tracks, "add")
+    assert crate.tracks == {track}
+    union = crate.tracks | {other}
+    assert isinstance(union, set) and union == {track, other}
+    assert crate.digest == before
+    with pytest.raises(KeyError):
+        crate.remove_track(other)
+
+
+def test_diff_only_reports_changed_crates(tmp_path):
+    root = _tree(tmp_path)
+    changed = _tree(tmp_path, extra="b.mp3")
+    changed.children["added"] = Crate("added", children={"below": Crate("below")})
+    assert list(root.diff(root)) == []
+    assert sorted(root.diff(changed)) == ["root%%added", "root%%added%%below", "root%%mid%%leaf"]
+
+
+def test_digest_survives_pickling(tmp_path):
+    import pickle
+
+    root = _tree(tmp_path)
+    copy = pickle.loads(pickle.dumps(root))
+    assert copy == root
+    copy.children["mid"].children["leaf"].add_track(Track.from_path(Path("b.mp3"), user_root=tmp_path))
+    assert copy != root
@@ -0,0 +1,93 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from pyserato.builder import Builder
+from pyserato.crate_reader import (
+    CrateColumn,
+    CrateSorting,
+    is_crate_file,
+    iter_records,
+    iter_track_paths,
+    read_crate,
+    stream_track_paths,
+)
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+from pyserato.crate_writer import encode_record
+from pyserato.util import serato_encode
+
+
+def test_read_crate_built_by_builder(tmp_path):
+    crate = Crate("root")
+    crate.add_track(Track.from_path(Path("a/one.mp3"), user_root=tmp_path))
+    crate.add_track(Track.from_path(Path("b/two.mp3"), user_root=tmp_path))
+    builder = Builder()
+    builder.save(crate, tmp_path)
+
+    crate_file = builder.read_crate_file(tmp_path / "SubCrates" / "root.crate")
+    assert crate_file.version == "1.0/Serato ScratchLive Crate"
+    assert [c.name for c in crate_file.columns] == ["track", "artist", "album", "length"]
+    assert set(crate_file.tracks) == {str(t.path) for t in crate.tracks}
+
+
+def test_read_crate_sorting_and_relative_paths():
+    data = b"".join(
+        (
+            encode_record("vrsn", serato_encode("1.0/Serato ScratchLive Crate")),
+            encode_record("osrt", encode_record("tvcn", serato_encode("bpm")) + encode_record("brev", b"\x01")),
+            encode_record(
+                "ovct", encode_record("tvcn", serato_encode("bpm")) + encode_record("tvcw", serato_encode("0"))
+            ),
+            encode_record("otrk", encode_record("ptrk", serato_encode("Music/Arca/10 Desafío.mp3"))),
+            encode_record(
+                "otrk", encode_record("ttyp", serato_encode("mp3")) + encode_record("ptrk", serato_encode("/abs.mp3"))
+            ),
+        )
+    )
+    crate_file = read_crate(data)
+    assert crate_file.sorting == CrateSorting(column="bpm", reverse=True)
+    assert crate_file.columns == [CrateColumn(name="bpm", width="0")]
+    assert crate_file.tracks == ["/Music/Arca/10 Desafío.mp3", "/abs.mp3"]
+    assert list(iter_track_paths(data)) == crate_file.tracks
+
+
+def test_iter_records_is_zero_copy():
+    data = bytearray(encode_record("otrk", encode_record("ptrk", serato_encode("/a.mp3"))))
+    (tag, value), = iter_records(data)
+    assert tag == "otrk"
+    assert isinstance(value, memoryview)
+    assert value.obj is data
+
+
+def test_iter_records_truncated():
+    data = encode_record("otrk", encode_record("ptrk", serato_encode("/a.mp3")))
+    with pytest.raises(ValueError):
+        list(iter_records(data[:-2]))
+
+
+def test_stream_track_paths_matches_iter_track_paths(tmp_path):
+    crate = Crate("root")
+    for name in ("one", "tw\u00f6", "\U0001f3a7"):
+        crate.add_track(Track.from_path(Path(f"{name}.mp3"), user_root=tmp_path))
+    Builder().save(crate, tmp_path)
+    data = (tmp_path / "SubCrates" / "root.crate").read_bytes()
+    assert list(stream_track_paths(io.BytesIO(data))) == list(iter_track_paths(data))
+    with pytest.raises(ValueError):
+        list(stream_track_paths(io.BytesIO(data[:-3])))
+
+
+def test_stream_track_paths_truncated_skipped_record():
+    data = encode_record("vrsn", serato_encode("1.0/Serato ScratchLive Crate")) + encode_record("otrk", b"")
+    with pytest.raises(ValueError) as streamed:
+        list(stream_track_paths(io.BytesIO(data[:10])))
+    with pytest.raises(ValueError) as walked:
+        list(iter_records(data[:10]))
+    assert str(streamed.value) == str(walked.value)
+
+
+def test_is_crate_file():
+    assert is_crate_file(Path("SubCrates/root%%child.crate"))
+    assert not is_crate_file(Path("SubCrates/root.crate.tmp"))
+    assert not is_crate_file(Path("SubCrates/notacrate"))
@@ -0,0 +1,38 @@
+from io import BytesIO
+from pathlib import Path
+
+from pyserato._crate_steps import construct
+from pyserato.builder import Builder
+from pyserato.crate_reader import read_crate
+from pyserato.crate_writer import encode_header, serialize_crate, write_crate
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+
+
+def test_header_matches_serato_layout():
+    header = encode_header(["track"])
+    assert header.startswith(b"vrsn\x00\x00\x00\x38\x001\x00.\x000")
+    assert header.endswith(b"ovct\x00\x00\x00\x1ctvcn\x00\x00\x00\x0a\x00t\x00r\x00a\x00c\x00ktvcw\x00\x00\x00\x0200")
+
+
+def test_serialize_roundtrip():
+    paths = ["/music/one.mp3", "/music/Arca/10 Desafío.mp3"]
+    crate_file = read_crate(serialize_crate(paths))
+    assert crate_file.tracks == paths
+
+
+def test_write_crate_matches_serialize():
+    paths = [f"/music/{i}.mp3" for i in range(100)]
+    fp = BytesIO()
+    written = write_crate(fp, iter(paths))
+    assert fp.getvalue() == serialize_crate(paths)
+    assert written == len(fp.getvalue())
+
+
+def test_save_stream(tmp_path):
+    crate = Crate("root")
+    for i in range(10):
+        crate.add_track(Track.from_path(Path(f"music/{i}.mp3"), user_root=tmp_path))
+    builder = Builder()
+    builder.save(crate, tmp_path, stream=True)
+    assert (tmp_path / "SubCrates" / "root.crate").read_bytes() == construct(crate)
@@ -0,0 +1,88 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from pyserato import database_reader
+from pyserato.database_reader import iter_database_tracks
+from pyserato.crate_writer import encode_record
+from pyserato.util import serato_encode
+
+
+def _text(tag: str, text: str) -> bytes:
+    return encode_record(tag, serato_encode(text))
+
+
+@pytest.fixture
+def database(tmp_path) -> Path:
+    database = tmp_path / "database V2"
+    database.write_bytes(
+        b"".join(
+            (
+                _text("vrsn", "2.0/Serato Scratch LIVE Database"),
+                encode_record(
+                    "otrk",
+                    b"".join(
+                        (
+                            _text("ttyp", "mp3"),
+                            _text("pfil", "Music/Arca/10 Desafío.mp3"),
+                            _text("tbpm", "124.00"),
+                            _text("tkey", "Am"),
+                            _text("tlen", "04:21.50"),
+                            _text("tadd", "1700000000"),
+                            encode_record("uadd", struct.pack(">I", 1700000000)),
+                        )
+                    ),
+                ),
+                encode_record("otrk", _text("pfil", "Music/untagged.mp3") + _text("tbpm", "")),
+                # a track record without a path is skipped
+                encode_record("otrk", _text("tbpm", "90")),
+            )
+        )
+    )
+    return database
+
+
+def test_iter_database_tracks(database):
+    first, second = iter_database_tracks(database)
+    assert first.path == Path("/Music/Arca/10 Desafío.mp3")
+    assert first.average_bpm == 124.0
+    assert first.tonality == "Am"
+    assert first.total_time == 261.5
+    assert first.date_added == "1700000000"
+    assert second.path == Path("/Music/untagged.mp3")
+    assert second.average_bpm == 0.0
+
+
+def test_iter_database_tracks_field_filter(database):
+    track = next(iter_database_tracks(database, fields={"average_bpm"}))
+    assert track.average_bpm == 124.0
+    assert track.tonality == ""
+    with pytest.raises(ValueError):
+        next(iter_database_tracks(database, fields={"title"}))
+
+
+def test_iter_database_tracks_empty(tmp_path):
+    database = tmp_path / "database V2"
+    database.write_bytes(b"")
+    assert list(iter_database_tracks(database)) == []
+
+
+def test_iter_database_tracks_closed_early(database):
+    tracks = iter_database_tracks(database)
+    next(tracks)
+    # closing the generator part way through releases the memory map without raising BufferError
+    tracks.close()
+    assert tracks.gi_frame is None
+    assert next(tracks, None) is None
+    database.unlink()
+    assert not database.exists()
+
+
+def test_iter_database_tracks_decode_error_propagates(database, monkeypatch):
+    def fail(value):
+        raise RuntimeError("bad bpm")
+
+    monkeypatch.setitem(database_reader.TRACK_FIELDS, "tbpm", ("average_bpm", fail))
+    with pytest.raises(RuntimeError, match="bad bpm"):
+        list(iter_database_tracks(database))
@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+from pyserato._crate_steps import construct
+from pyserato.builder import Builder
+from pyserato.library_index import LibraryIndex
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+
+
+def _save_library(tmp_path: Path) -> Path:
+    def track(name: str) -> Track:
+        return Track.from_path(Path(f"music/{name}.mp3"), user_root=tmp_path)
+
+    grandchild = Crate("grandchild")
+    grandchild.add_track(track("c"))
+    child = Crate("child", children={grandchild.name: grandchild})
+    child.add_track(track("b"))
+    child.add_track(track("shared"))
+    root = Crate("root", children={child.name: child})
+    root.add_track(track("a"))
+    root.add_track(track("shared"))
+    # a crate whose name starts with the root name must not count as a descendant of it
+    other = Crate("root2")
+    other.add_track(track("d"))
+
+    builder = Builder()
+    builder.save(root, tmp_path)
+    builder.save(other, tmp_path)
+    return tmp_path / "SubCrates"
+
+
+def test_index_queries(tmp_path):
+    subcrates = _save_library(tmp_path)
+    music = (tmp_path / "music").resolve()
+    with LibraryIndex(tmp_path / "index.db") as index:
+        report = index.refresh(subcrates)
+        assert sorted(report.added) == ["root", "root%%child", "root%%child%%grandchild", "root2"]
+
+        assert index.crates() == ["root", "root%%child", "root%%child%%grandchild", "root2"]
+        assert index.children("root") == ["root%%child"]
+        assert index.tracks("root") == [music / "a.mp3", music / "shared.mp3"]
+        assert index.tracks("root", recursive=True) == [music / n for n in ("a.mp3", "b.mp3", "c.mp3", "shared.mp3")]
+        assert index.crates_containing(music / "shared.mp3") == ["root", "root%%child"]
+        assert index.crates_containing(music / "missing.mp3") == []
+
+
+def test_index_refresh_only_parses_changed_files(tmp_path):
+    subcrates = _save_library(tmp_path)
+    db_path = tmp_path / "index.db"
+    with LibraryIndex(db_path) as index:
+        index.refresh(subcrates)
+
+    crate = Crate("child")
+    crate.add_track(Track.from_path(Path("music/new.mp3"), user_root=tmp_path))
+    child_file = subcrates / "root%%child.crate"
+    child_file.write_bytes(construct(crate))
+    stat = child_file.stat()
+    os.utime(child_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (subcrates / "root2.crate").unlink()
+
+    # a fresh connection reads the state persisted by the first refresh
+    with LibraryIndex(db_path) as index:
+        report = index.refresh(subcrates)
+        assert report.added == []
+        assert report.updated == ["root%%child"]
+        assert report.removed == ["root2"]
+        assert sorted(report.unchanged) == ["root", "root%%child%%grandchild"]
+        assert index.tracks("root%%child") == [(tmp_path / "music/new.mp3").resolve()]
+        assert index.crates_containing((tmp_path / "music/b.mp3").resolve()) == []
@@ -0,0 +1,60 @@
+import io
+
+from pyserato import metrics
+from pyserato.builder import Builder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.metrics import MetricsCollector, Observer, observe
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+
+
+def _tree(mp3_path):
+    child = Crate("child")
+    child.add_track(Track(mp3_path))
+    return Crate("root", children={"child": child})
+
+
+def test_save_and_parse_report_phases(tmp_path, mp3_path):
+    builder = Builder(encoder=V2Mp3Encoder())
+    with observe() as collector:
+        builder.save(_tree(mp3_path), tmp_path)
+        builder.parse_crates_from_root_path(tmp_path / "SubCrates")
+    assert metrics.get_observer() is None
+    assert isinstance(collector, MetricsCollector)
+
+    phases = collector.phases
+    assert phases[metrics.SAVE].files == 2
+    assert phases[metrics.RESOLVE].files == phases[metrics.SERIALIZE].files == 2
+    written = sum(f.stat().st_size for f in (tmp_path / "SubCrates").iterdir())
+    assert phases[metrics.WRITE_CRATE].nbytes == phases[metrics.SERIALIZE].nbytes == written
+    assert phases[metrics.WRITE_TAGS].files == phases[metrics.TAG_WRITE].files == 1
+    assert phases[metrics.TAG_SAVE].slowest[0][1] == mp3_path
+    assert phases[metrics.TAG_SAVE].nbytes > 0
+    assert phases[metrics.PARSE].files == 2
+    assert phases[metrics.READ_CRATE].nbytes == written
+
+    out = io.StringIO()
+    collector.print_summary(out)
+    assert metrics.WRITE_CRATE in out.getvalue()
+
+
+def test_custom_observer_and_streamed_save(tmp_path, mp3_path):
+    class Recorder(Observer):
+        def __init__(self):
+            self.files = []
+
+        def on_file(self, phase, seconds, path=None, nbytes=0):
+            self.files.append((phase, path, nbytes))
+
+    recorder = Recorder()
+    previous = metrics.set_observer(recorder)
+    try:
+        Builder().save(_tree(mp3_path), tmp_path, stream=True)
+    finally:
+        metrics.set_observer(previous)
+    # a streamed crate is serialized as it is written, so only the write is reported
+    assert sorted((phase, path.name) for phase, path, _ in recorder.files) == [
+        (metrics.WRITE_CRATE, "root%%child.crate"),
+        (metrics.WRITE_CRATE, "root.crate"),
+    ]
+    assert all(nbytes > 0 for _, _, nbytes in recorder.files)
@@ -0,0 +1,89 @@
+import shutil
+import wave
+from pathlib import Path
+
+import pytest
+
+from pyserato.encoders.serato_tags import SERATO_OVERVIEW, read_serato_tags
+from pyserato.model.track import Track
+
+np = pytest.importorskip("numpy")
+from pyserato.encoders.overview_encoder import (  # noqa: E402
+    OVERVIEW_BLOCK_SIZE,
+    OVERVIEW_BLOCKS,
+    OverviewEncoder,
+    compute_overview,
+    read_wav,
+    write_overviews,
+)
+
+RATE = 8000
+
+
+def _ramp(seconds: int = 4):
+    # a tone whose volume rises linearly from silence to full scale
+    t = np.arange(seconds * RATE) / RATE
+    return np.sin(2 * np.pi * 2000 * t) * np.linspace(0, 1, len(t))
+
+
+def _write_wav(path: Path, samples, width: int = 2, channels: int = 1) -> Path:
+    scale = 2 ** (8 * width - 1) - 1
+    ints = np.rint(np.repeat(samples[:, None], channels, axis=1) * scale).astype("<i4")
+    if width == 2:
+        frames = ints.astype("<i2").tobytes()
+    else:
+        frames = ints.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(width)
+        wav.setframerate(RATE)
+        wav.writeframes(frames)
+    return path
+
+
+@pytest.mark.parametrize("width,channels", [(2, 1), (3, 2)])
+def test_read_wav(tmp_path, width, channels):
+    samples = _ramp(1)
+    read, rate = read_wav(_write_wav(tmp_path / "song.wav", samples, width, channels))
+    assert rate == RATE
+    assert read.shape == (len(samples), channels)
+    assert np.allclose(read[:, -1], samples, atol=1e-4)
+
+
+def test_compute_overview():
+    overview = compute_overview(_ramp())
+    assert len(overview) == OVERVIEW_BLOCKS * OVERVIEW_BLOCK_SIZE
+    values = list(overview)
+    assert values[0] == 0
+    assert max(values) == 255
+    # the volume rises so the peaks only ever rise, give or take rounding
+    assert all(b >= a - 1 for a, b in zip(values, values[1:]))
+    assert compute_overview(np.zeros(100)) == bytes(OVERVIEW_BLOCKS * OVERVIEW_BLOCK_SIZE)
+
+
+def test_encoder_write(tmp_path, mp3_path):
+    wav_path = _write_wav(tmp_path / "song.wav", _ramp())
+    encoder = OverviewEncoder(lambda track: read_wav(wav_path)[0])
+    encoder.write(Track.from_path(mp3_path))
+    data = read_serato_tags(mp3_path)[SERATO_OVERVIEW]
+    assert data[:2] == b"\x01\x05"
+    assert data[2:] == compute_overview(read_wav(wav_path)[0])
+
+    with pytest.raises(ValueError):
+        OverviewEncoder().encode(Track.from_path(mp3_path))
+
+
+def test_write_overviews(tmp_path, mp3_path):
+    wav_path = _write_wav(tmp_path / "song.wav", _ramp())
+    jobs = []
+    for i in range(3):
+        track_path = tmp_path / f"{i}.mp3"
+        shutil.copy(mp3_path, track_path)
+        jobs.append((track_path, wav_path))
+    jobs.append((mp3_path, tmp_path / "missing.wav"))
+
+    results = dict(write_overviews(jobs, max_workers=2))
+    assert isinstance(results.pop(mp3_path), FileNotFoundError)
+    assert set(results.values()) == {None}
+    for track_path in results:
+        assert read_serato_tags(track_path)[SERATO_OVERVIEW][2:] == compute_overview(read_wav(wav_path)[0])
@@ -0,0 +1,99 @@
+import pytest
+from mutagen import id3
+from mutagen.mp3 import MP3
+
+from pyserato.encoders.serato_tags import (
+    SERATO_MARKERS_V1,
+    SERATO_MARKERS_V2,
+    SERATO_OVERVIEW,
+    TagTransaction,
+    clear_all_tags,
+    load_id3,
+    read_serato_tags,
+)
+
+
+def _geob(desc: str, data: bytes) -> id3.GEOB:
+    return id3.GEOB(encoding=0, mime="application/octet-stream", desc=desc, data=data)
+
+
+def test_read_serato_tags(mp3_path):
+    tags = MP3(mp3_path)
+    tags[SERATO_MARKERS_V2] = _geob("Serato Markers2", b"markers")
+    tags[SERATO_OVERVIEW] = _geob("Serato Overview", b"overview")
+    tags["TIT2"] = id3.TIT2(encoding=3, text="title")
+    tags.save()
+
+    assert read_serato_tags(mp3_path) == {SERATO_MARKERS_V2: b"markers", SERATO_OVERVIEW: b"overview"}
+    assert read_serato_tags(mp3_path, [SERATO_OVERVIEW]) == {SERATO_OVERVIEW: b"overview"}
+    # frames that were not asked for are skipped without being decoded
+    assert "TIT2" not in load_id3(mp3_path)
+    assert load_id3(mp3_path, ["GEOB", "TIT2"])["TIT2"].text == ["title"]
+
+
+def test_read_serato_tags_without_audio(tmp_path):
+    # the audio is never scanned, so a tag followed by data that is not MPEG can still be read
+    path = tmp_path / "song.mp3"
+    tags = id3.ID3()
+    tags.add(_geob("Serato Markers2", b"markers"))
+    tags.save(path)
+    with path.open("ab") as f:
+        f.write(b"\x00" * 4096)
+    assert read_serato_tags(path) == {SERATO_MARKERS_V2: b"markers"}
+
+
+def test_read_serato_tags_untagged(mp3_path):
+    assert read_serato_tags(mp3_path) == {}
+
+
+def test_tag_transaction(mp3_path):
+    tags = MP3(mp3_path)
+    tags[SERATO_OVERVIEW] = _geob("Serato Overview", b"overview")
+    tags["TIT2"] = id3.TIT2(encoding=3, text="title")
+    tags.save()
+
+    with TagTransaction(mp3_path) as transaction:
+        transaction.set(SERATO_MARKERS_V2, b"markers")
+        transaction.set(SERATO_MARKERS_V1, b"markers_")
+        transaction.clear(SERATO_OVERVIEW)
+        assert read_serato_tags(mp3_path) == {SERATO_OVERVIEW: b"overview"}
+    assert read_serato_tags(mp3_path) == {SERATO_MARKERS_V2: b"markers", SERATO_MARKERS_V1: b"markers_"}
+    assert load_id3(mp3_path, ["GEOB", "TIT2"])["TIT2"].text == ["title"]
+    assert load_id3(mp3_path)[SERATO_MARKERS_V2].desc == "Serato Markers2"
+
+
+def test_tag_transaction_saves_once_and_only_when_changed(mp3_path, monkeypatch):
+    saves = []
+    save = id3.ID3.save
+    monkeypatch.setattr(id3.ID3, "save", lambda self, *args, **kwargs: saves.append(1) or save(self, *args, **kwargs))
+
+    transaction = TagTransaction(mp3_path)
+    transaction.set(SERATO_MARKERS_V2, b"markers")
+    transaction.set(SERATO_MARKERS_V2, b"replaced")
+    transaction.clear_all()
+    transaction.set(SERATO_MARKERS_V1, b"markers_")
+    assert transaction.commit()
+    assert len(saves) == 1
+    assert read_serato_tags(mp3_path) == {SERATO_MARKERS_V1: b"markers_"}
+
+    transaction.set(SERATO_MARKERS_V1, b"markers_")
+    transaction.clear(SERATO_OVERVIEW)
+    assert not transaction.commit()
+    assert not transaction.commit()
+    assert len(saves) == 1
+
+
+def test_tag_transaction_discarded_on_error(mp3_path):
+    with pytest.raises(RuntimeError):
+        with TagTransaction(mp3_path) as transaction:
+            transaction.set(SERATO_MARKERS_V2, b"markers")
+            raise RuntimeError()
+    assert read_serato_tags(mp3_path) == {}
+
+
+def test_clear_all_tags(mp3_path):
+    with TagTransaction(mp3_path) as transaction:
+        transaction.set(SERATO_MARKERS_V2, b"markers")
+        transaction.set(SERATO_OVERVIEW, b"overview")
+    clear_all_tags(mp3_path)
+    assert read_serato_tags(mp3_path) == {}
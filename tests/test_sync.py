@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from pyserato.builder import Builder
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+from pyserato.sync import apply_sync, plan_sync, sync
+
+
+def _crate(name: str, tracks: list[str], tmp_path: Path, children: tuple[Crate, ...] = ()) -> Crate:
+    crate = Crate(name, children={c.name: c for c in children})
+    for track in tracks:
+        crate.add_track(Track.from_path(Path(f"music/{track}.mp3"), user_root=tmp_path))
+    return crate
+
+
+def _library(tmp_path: Path) -> Crate:
+    return _crate(
+        "root",
+        ["a"],
+        tmp_path,
+        (_crate("house", ["b", "c"], tmp_path), _crate("techno", ["d"], tmp_path), _crate("old", ["e"], tmp_path)),
+    )
+
+
+def _files(tmp_path: Path) -> dict[str, bytes]:
+    return {f.name: f.read_bytes() for f in sorted((tmp_path / "SubCrates").iterdir())}
+
+
+def test_sync_empty_folder_creates_everything(tmp_path):
+    plan = sync(_library(tmp_path), tmp_path)
+    assert sorted(plan.creates) == ["root", "root%%house", "root%%old", "root%%techno"]
+    assert plan.operations == 4
+    assert not sync(_library(tmp_path), tmp_path)
+
+
+def test_plan(tmp_path):
+    sync(_library(tmp_path), tmp_path)
+    other = tmp_path / "SubCrates" / "other.crate"
+    other.write_bytes(b"")
+
+    root = _crate(
+        "root",
+        ["a"],
+        tmp_path,
+        (
+            # gains a track and loses one
+            _crate("house", ["b", "f"], tmp_path),
+            # renamed with the same tracks
+            _crate("minimal", ["d"], tmp_path),
+            _crate("new", ["g"], tmp_path),
+        ),
+    )
+    plan = sync(root, tmp_path, dry_run=True)
+    assert plan.creates == ["root%%new"]
+    assert [(u.crate_path, u.added_tracks, u.removed_tracks) for u in plan.updates] == [
+        ("root%%house", [str(tmp_path / "music/f.mp3")], [str(tmp_path / "music/c.mp3")])
+    ]
+    assert plan.renames == [("root%%techno", "root%%minimal")]
+    assert plan.deletes == ["root%%old"]
+    assert plan.unchanged == ["root"]
+    assert plan.operations == 4
+    # a dry run changes nothing
+    assert "root%%old.crate" in _files(tmp_path)
+
+    sync(root, tmp_path)
+    expected = tmp_path / "expected"
+    expected.mkdir()
+    Builder().save(root, expected)
+    files = _files(tmp_path)
+    assert files.pop("other.crate") == b""
+    assert files == _files(expected)
+    assert not sync(root, tmp_path)
+
+
+def test_order_is_ignored(tmp_path):
+    sync(_crate("root", ["a", "b"], tmp_path), tmp_path)
+    assert not sync(_crate("root", ["b", "a"], tmp_path), tmp_path)
+
+
+def test_plan_with_parents_that_have_no_file(tmp_path):
+    subcrates = tmp_path / "SubCrates"
+    Builder().save(_library(tmp_path), tmp_path)
+    (subcrates / "root.crate").unlink()
+    current = Builder().parse_crates_from_root_path(subcrates)
+
+    # root is in the parsed tree, so is assumed to have a file unless the existing files are given
+    assert plan_sync(_library(tmp_path), current).creates == []
+    existing = {f.name[: -len(".crate")] for f in subcrates.iterdir()}
+    plan = plan_sync(_library(tmp_path), current, existing)
+    assert plan.creates == ["root"]
+    apply_sync(plan, subcrates)
+    assert (subcrates / "root.crate").exists()
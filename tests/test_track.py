@@ -0,0 +1,94 @@
+import dataclasses
+import os
+from pathlib import Path
+
+from pyserato.model.tempo import Tempo
+from pyserato.model.track import (
+    Track,
+    TrackRegistry,
+    _resolve_absolute,
+    _resolve_directory,
+    clear_path_cache,
+    resolve_track_path,
+)
+
+
+def test_resolve_track_path_matches_resolve(tmp_path):
+    real = tmp_path / "real"
+    real.mkdir()
+    (tmp_path / "link").symlink_to(real)
+    (real / "target.mp3").write_bytes(b"")
+    (real / "linked.mp3").symlink_to(real / "target.mp3")
+
+    for path in [
+        tmp_path / "link" / "song.mp3",
+        tmp_path / "link" / ".." / "real" / "song.mp3",
+        real / "linked.mp3",
+        tmp_path / "missing" / "song.mp3",
+        tmp_path / "link" / "..",
+    ]:
+        assert resolve_track_path(path) == path.resolve()
+    assert resolve_track_path("song.mp3", user_root=tmp_path / "link") == real / "song.mp3"
+
+
+def test_resolve_track_path_caches_directories(tmp_path):
+    clear_path_cache()
+    for i in range(10):
+        resolve_track_path(tmp_path / f"{i}.mp3")
+    resolve_track_path(tmp_path / "0.mp3")
+    assert _resolve_directory.cache_info().misses == 1
+    assert _resolve_absolute.cache_info().hits == 1
+    clear_path_cache()
+    assert _resolve_absolute.cache_info().currsize == 0
+
+
+def test_relative_paths_follow_working_directory(tmp_path, monkeypatch):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    monkeypatch.chdir(tmp_path / "a")
+    assert resolve_track_path("song.mp3") == tmp_path.resolve() / "a" / "song.mp3"
+    os.chdir(tmp_path / "b")
+    assert resolve_track_path("song.mp3") == tmp_path.resolve() / "b" / "song.mp3"
+
+
+def test_from_paths(tmp_path):
+    tracks = Track.from_paths(["a.mp3", Path("b.mp3")], user_root=tmp_path / "x" / "..")
+    assert [t.path for t in tracks] == [tmp_path.resolve() / "a.mp3", tmp_path.resolve() / "b.mp3"]
+
+
+def test_from_paths_trusted():
+    tracks = Track.from_paths(["/music/../a.mp3"], trust_paths=True)
+    # trusted paths are used as they are
+    assert tracks[0].path == Path("/music/../a.mp3")
+
+
+def test_registry_shares_tracks(tmp_path):
+    registry = TrackRegistry()
+    first = Track.from_path("a.mp3", user_root=tmp_path, registry=registry)
+    second = Track.from_path(tmp_path / "x" / ".." / "a.mp3", registry=registry)
+    other = Track.from_path("b.mp3", user_root=tmp_path, registry=registry)
+    assert first is second
+    assert other is not first
+    assert len(registry) == 2
+    assert registry.deduplicated == 1
+    assert first.path in registry
+
+    assert registry.intern(Track(first.path)) is first
+    assert registry.deduplicated == 2
+    assert set(registry) == {first, other}
+
+
+def test_track_is_a_slotted_dataclass():
+    track = Track(Path("/a.mp3"))
+    assert not hasattr(track, "__dict__")
+    assert not track.has_markers
+    assert "hot_cues=None" in repr(track)
+    # the lists are only allocated once something is added
+    assert track.get_hot_cues() == () and track.get_beatgrid() == () and track.get_unknown_markers() == ()
+    assert track.hot_cues is None and track.cue_loops is None
+    assert dataclasses.asdict(track)["path"] == Path("/a.mp3")
+    assert dataclasses.replace(track, tonality="Am").tonality == "Am"
+
+    track.add_beatgrid_marker(Tempo(position=0.0, bpm=120.0))
+    assert track.has_markers
+    assert track.beatgrid == [Tempo(position=0.0, bpm=120.0)]
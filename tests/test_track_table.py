@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from pyserato.builder import Builder
+from pyserato.model.crate import Crate
+from pyserato.model.track import Track
+from pyserato.model.track_table import TrackTable
+from pyserato.util import DuplicateTrackError
+
+
+def test_track_table_rows():
+    table = TrackTable()
+    a = table.add("/music/a.mp3", average_bpm=120.0)
+    b = table.add("/music/b.mp3")
+    assert table.add("/music/a.mp3") == a
+    assert len(table) == 2
+    assert table.id_of(Path("/music/b.mp3")) == b
+    assert table.id_of("/music/c.mp3") is None
+
+    track = table.track(a)
+    assert track.path == Path("/music/a.mp3")
+    assert track.average_bpm == 120.0
+    assert table.track(a) is track
+
+
+def test_crate_track_ids():
+    table = TrackTable()
+    crate = Crate("crate")
+    crate.add_track_id(table.add("/music/a.mp3"), table)
+    crate.add_track_id(table.add("/music/b.mp3"), table)
+    assert crate.track_count == 2
+    assert crate._track_ids is not None
+
+    assert crate.tracks == {Track(Path("/music/a.mp3")), Track(Path("/music/b.mp3"))}
+    assert crate._track_ids is None
+    assert crate.track_count == 2
+
+    with pytest.raises(DuplicateTrackError):
+        crate.add_track(Track(Path("/music/a.mp3")))
+    with pytest.raises(ValueError):
+        crate.add_track_id(0, TrackTable())
+
+
+def test_parse_in_to_table(tmp_path):
+    child = Crate("child")
+    child.add_track(Track.from_path(Path("music/a.mp3"), user_root=tmp_path))
+    root = Crate("root", children={child.name: child})
+    root.add_track(Track.from_path(Path("music/a.mp3"), user_root=tmp_path))
+    root.add_track(Track.from_path(Path("music/b.mp3"), user_root=tmp_path))
+    builder = Builder()
+    builder.save(root, tmp_path)
+
+    table = TrackTable()
+    crates = builder.parse_crates_from_root_path(tmp_path / "SubCrates", table=table)
+    assert len(table) == 2
+    parsed_root = crates["root"]
+    assert parsed_root.track_count == 2
+    assert parsed_root.tracks == root.tracks
+    parsed_child = parsed_root.children["child"]
+    # the track shared by both crates is the same object
+    (shared,) = parsed_child.tracks
+    assert any(t is shared for t in parsed_root.tracks)
+
+
+def test_duplicate_track_ids_leave_the_crate_unchanged():
+    table = TrackTable()
+    crate = Crate("crate")
+    crate.add_track(Track(Path("/music/a.mp3")))
+    for path in ("/music/b.mp3", "/music/c.mp3", "/music/b.mp3"):
+        crate.add_track_id(table.add(path), table)
+    assert crate.track_count == 3
+
+    for _ in range(2):
+        with pytest.raises(DuplicateTrackError):
+            crate.tracks
+        assert crate.track_count == 3
@@ -0,0 +1,102 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from pyserato.encoders import utils
+from pyserato.encoders.v1_mp3_encoder import CUE_SLOTS, LOOP_SLOTS, V1Mp3Encoder
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.serato_color import SeratoColor
+from pyserato.model.track import Track
+
+
+def _track(path: Path = Path("/song.mp3")) -> Track:
+    track = Track(path)
+    track.color = "FF99FF"
+    track.add_hot_cue(HotCue(name="", type=HotCueType.CUE, start=50, index=0, color=SeratoColor.BLUE))
+    track.add_hot_cue(HotCue(name="", type=HotCueType.CUE, start=61000, index=4))
+    track.add_hot_cue(HotCue(name="", type=HotCueType.LOOP, start=1900, end=3600, index=2, is_locked=True))
+    return track
+
+
+def test_buffer_codec_matches_single_group_codec():
+    groups = [bytes((a, b, c)) for a, b, c in zip(range(0, 256, 3), range(255, 0, -3), range(7, 256, 3))]
+    plain = b"".join(groups)
+    encoded = utils.encode_buffer(plain)
+    assert all(byte < 0x80 for byte in encoded)
+    assert utils.decode_buffer(encoded) == plain
+    assert [encoded[i * 4: i * 4 + 4] for i in range(len(groups))] == [utils.encode(g) for g in groups]
+    assert utils.encode(b"\xff\xff\xff") == b"\x07\x7f\x7f\x7f"
+
+
+@pytest.mark.skipif(utils.np is None, reason="numpy is not installed")
+def test_numpy_codec_matches_python_codec(monkeypatch):
+    plain = os.urandom(3 * utils.NUMPY_MIN_GROUPS * 4)
+    encoded = utils.encode_buffer(plain)
+    decoded = utils.decode_buffer(encoded)
+    monkeypatch.setattr(utils, "np", None)
+    assert utils.encode_buffer(plain) == encoded
+    assert utils.decode_buffer(encoded) == decoded == plain
+
+
+def test_buffer_codec_rejects_partial_groups():
+    with pytest.raises(ValueError):
+        utils.encode_buffer(b"\x00" * 4)
+    with pytest.raises(ValueError):
+        utils.decode_buffer(b"\x00" * 3)
+
+
+def test_encode_layout():
+    data = V1Mp3Encoder()._encode(_track())
+    assert data[:6] == b"\x02\x05\x00\x00\x00\x0e"
+    assert len(data) == 6 + (CUE_SLOTS + LOOP_SLOTS) * V1Mp3Encoder.STRUCT_LENGTH + 4
+    # an empty cue slot
+    empty = data[6 + V1Mp3Encoder.STRUCT_LENGTH: 6 + 2 * V1Mp3Encoder.STRUCT_LENGTH]
+    assert empty[:10] == b"\x7f" * 10
+
+
+def test_decode_into_roundtrip():
+    encoder = V1Mp3Encoder()
+    track = _track()
+    data = encoder._encode(track)
+    decoded = Track(track.path)
+    encoder.decode_into(decoded, data)
+    assert decoded.color == "FF99FF"
+    assert decoded.hot_cues == track.hot_cues
+    assert decoded.cue_loops == track.cue_loops
+    assert encoder._encode(decoded) == data
+
+
+def test_decode_rejects_colors_that_are_not_serato_colors():
+    encoder = V1Mp3Encoder()
+    data = bytearray(encoder._encode(_track()))
+    # the color of the first cue entry, which follows its start, end and unknown fields
+    color_offset = 6 + 16
+    data[color_offset: color_offset + 4] = utils.encode(bytes.fromhex("123456"))
+    with pytest.raises(ValueError, match="123456"):
+        encoder.decode_into(Track(Path("/song.mp3")), bytes(data))
+
+
+def test_encode_rejects_cues_that_do_not_fit():
+    encoder = V1Mp3Encoder()
+    track = Track(Path("/song.mp3"))
+    track.add_hot_cue(HotCue(name="", type=HotCueType.CUE, start=0, index=CUE_SLOTS))
+    with pytest.raises(ValueError):
+        encoder._encode(track)
+    track = Track(Path("/song.mp3"))
+    track.add_hot_cue(HotCue(name="", type=HotCueType.CUE, start=1 << 24, index=0))
+    with pytest.raises(ValueError):
+        encoder._encode(track)
+
+
+def test_write_alongside_markers2(mp3_path):
+    track = _track(mp3_path)
+    V2Mp3Encoder().write(track)
+    V1Mp3Encoder().write(track)
+
+    read = V1Mp3Encoder().read(Track(mp3_path))
+    assert read.hot_cues == track.hot_cues
+    assert read.cue_loops == track.cue_loops
+    assert [c.start for c in V2Mp3Encoder().read_cues(Track(mp3_path))] == [50, 61000, 1900]
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from pyserato.encoders.v2_mp3_encoder import V2Mp3Encoder
+from pyserato.model.hot_cue import HotCue
+from pyserato.model.hot_cue_type import HotCueType
+from pyserato.model.serato_color import SeratoColor
+from pyserato.model.track import Track
+
+
+def _fields(cues: list[HotCue]) -> list[tuple]:
+    return [(c.name, c.type, c.start, c.end, c.index, c.color) for c in cues]
+
+
+def _track(path: Path = Path("/song.mp3")) -> Track:
+    track = Track(path)
+    track.add_hot_cue(HotCue(name="intro", type=HotCueType.CUE, start=50, index=0, color=SeratoColor.BLUE))
+    track.add_hot_cue(HotCue(name="drop", type=HotCueType.CUE, start=61000, index=1))
+    track.add_hot_cue(HotCue(name="loop", type=HotCueType.LOOP, start=1900, end=3600, index=0))
+    return track
+
+
+def test_decode_cues():
+    encoder = V2Mp3Encoder()
+    cues = list(encoder._decode(encoder._encode(_track())))
+    assert [(c.name, c.type, c.start, c.end, c.index) for c in cues] == [
+        ("intro", HotCueType.CUE, 50, None, 0),
+        ("drop", HotCueType.CUE, 61000, None, 1),
+        ("loop", HotCueType.LOOP, 1900, 3600, 0),
+    ]
+    assert cues[0].color == SeratoColor.BLUE
+
+
+def test_decode_into_roundtrip():
+    encoder = V2Mp3Encoder()
+    track = _track()
+    track.color = "FF99FF"
+    track.bpm_locked = True
+    track.add_unknown_marker("FLIP", b"\x00\x01flip\x00")
+    data = encoder._encode(track)
+
+    decoded = Track(track.path)
+    encoder.decode_into(decoded, data)
+    assert decoded.color == "FF99FF"
+    assert decoded.bpm_locked is True
+    assert decoded.unknown_markers == [("FLIP", b"\x00\x01flip\x00")]
+    assert decoded.hot_cues == track.hot_cues
+    assert _fields(decoded.cue_loops) == _fields(track.cue_loops)
+    assert encoder._encode(decoded) == data
+
+
+def test_encode_without_color_or_bpm_lock():
+    encoder = V2Mp3Encoder()
+    entries = [name for name, _ in encoder._decode_entries(encoder._encode(_track()))]
+    assert entries == ["CUE", "CUE", "LOOP"]
+
+
+def test_write_and_read(mp3_path):
+    encoder = V2Mp3Encoder()
+    track = _track(mp3_path)
+    track.color = "FFFFFF"
+    track.bpm_locked = False
+    encoder.write(track)
+
+    assert _fields(encoder.read_cues(Track(mp3_path))) == _fields(track.hot_cues + track.cue_loops)
+    read = encoder.read(Track(mp3_path))
+    assert read.color == "FFFFFF"
+    assert read.bpm_locked is False